@@ -0,0 +1,77 @@
+# =============================================================================
+# INCREMENTAL PER-STUDENT AGGREGATES (APPEND-ONLY FOLD, REBUILD ON EDITS)
+# =============================================================================
+#
+# Stored aggregates remember the dataset version they were built from and one
+# signature per student (hash of the student's rows, over the columns the
+# aggregates read; one pass is shared by every aggregate of a refresh). A new dataset version
+# whose already-counted students are unchanged is folded in with only the new
+# students; any edited or removed student makes the aggregate rebuild from
+# scratch, so the stored statistics never mix two versions of the data.
+
+
+# Columns read by the aggregates (item view, teacher cube and its score histograms)
+COLUNAS_AGREGADAS = ['RA', 'Série', 'Disciplina', 'questao_numero', 'Conteúdo', 'Descritor', 'acerto']
+
+
+def assinaturas_alunos(df, pd):
+    """{RA: hash of the student's rows over COLUNAS_AGREGADAS} (order-independent, one vectorized pass)"""
+    colunas = [c for c in COLUNAS_AGREGADAS if c in df.columns]
+    hashes = pd.util.hash_pandas_object(df[colunas], index=False)
+    return hashes.groupby(df['RA'].to_numpy()).sum().to_dict()
+
+
+class AgregadoIncremental:
+    """Additive aggregate over students; subclasses implement _zerar, _somar and _estado"""
+
+    def __init__(self, pd):
+        self.pd = pd
+        self.versao = None
+        self.assinaturas = {}   # RA -> signature of the rows already counted
+        self._consultas = {}
+        self._zerar()
+
+    @property
+    def ras(self):
+        return self.assinaturas.keys()
+
+    def _zerar(self):
+        raise NotImplementedError
+
+    def _somar(self, novos):
+        raise NotImplementedError
+
+    def _estado(self):
+        raise NotImplementedError
+
+    def __getstate__(self):
+        return {'versao': self.versao, 'assinaturas': self.assinaturas, **self._estado()}
+
+    def __setstate__(self, estado):
+        import pandas as pd
+        self.__init__(pd)
+        # Stored before per-student signatures existed: start empty and rebuild
+        if 'assinaturas' in estado:
+            self.__dict__.update(estado)
+
+    def atualizar(self, df, versao=None, assinaturas=None):
+        """Brings the aggregate to df: students folded in, or None when versao is already stored
+
+        Only appended students are counted when the rest is unchanged; edited or
+        removed students trigger a full rebuild. assinaturas (assinaturas_alunos(df))
+        can be passed when several aggregates are refreshed from the same df.
+        """
+        if versao is not None and versao == self.versao:
+            return None
+        if assinaturas is None:
+            assinaturas = assinaturas_alunos(df, self.pd)
+        if any(assinaturas.get(ra) != assinatura for ra, assinatura in self.assinaturas.items()):
+            self._zerar()
+            self.assinaturas = {}
+        novos = df[~df['RA'].isin(list(self.assinaturas))]
+        if not novos.empty:
+            self._somar(novos)
+        self.assinaturas = assinaturas
+        self.versao = versao
+        self._consultas = {}
+        return novos['RA'].nunique()
@@ -0,0 +1,173 @@
+# =============================================================================
+# TEACHER ANALYTICS CUBE (PRE-AGGREGATED ANSWERS PER QUESTION, CONTENT, CLASS)
+# =============================================================================
+#
+# The base cuboid keeps answers and hits per (Disciplina, questao_numero,
+# Conteúdo, Descritor, Série). Its size depends on questions × classes, not on
+# students, so any slice/roll-up is a groupby over a few thousand cells. New
+# students are folded in (cells and score histograms) without recounting the
+# ones already in the cube; edited or removed students rebuild it (see
+# analytics.agregado). Content error rates of the student view are slices of
+# this cube too. The app refreshes the cube and the item view together, off the
+# rerun (atualizar_em_segundo_plano), and reads only the stored files.
+#
+# Usage:
+#   python -m analytics.cubo --por Conteúdo Série --disciplina MAT
+
+import argparse
+import os
+import time
+
+from analytics.agregado import AgregadoIncremental, assinaturas_alunos
+from analytics.distribuicao import DistribuicaoNotas, adicionar_resultados
+from analytics.itens import CAMINHO_VIEW_ITENS, carregar_view, salvar_view
+from helpers.loader import CAMINHO_DADOS, PASTA_DADOS
+from helpers.persistencia import carregar_pickle, salvar_pickle
+from helpers.segundo_plano import iniciar_tarefa
+
+CAMINHO_CUBO = os.path.join(PASTA_DADOS, 'cubo_turmas.pkl')
+
+DIMENSOES = ('Disciplina', 'questao_numero', 'Conteúdo', 'Descritor', 'Série')
+SEM_VALOR = '-'
+MAX_CONSULTAS_CACHE = 256
+
+
+class CuboTurmas(AgregadoIncremental):
+    """Pre-aggregated answer cube with incremental refresh by new students"""
+
+    def _zerar(self):
+        self.celulas = None
+        self.distribuicao = DistribuicaoNotas()
+
+    def _estado(self):
+        return {'celulas': self.celulas, 'distribuicao': self.distribuicao}
+
+    def _somar(self, novos):
+        linhas = novos.assign(n=1, acertos=novos['acerto'].astype(int))
+        for dimensao in DIMENSOES:
+            linhas[dimensao] = linhas[dimensao].fillna(SEM_VALOR) if dimensao in linhas.columns else SEM_VALOR
+        linhas['Série'] = linhas['Série'].astype(str)
+        celulas = linhas.groupby(list(DIMENSOES), as_index=False)[['n', 'acertos']].sum()
+        if self.celulas is None:
+            self.celulas = celulas
+        else:
+            self.celulas = self.pd.concat([self.celulas, celulas]).groupby(
+                list(DIMENSOES), as_index=False)[['n', 'acertos']].sum()
+        adicionar_resultados(self.distribuicao, novos)
+
+    @staticmethod
+    def _normalizar_filtros(filtros):
+        normalizados = []
+        for dimensao, valor in (filtros or {}).items():
+            valores = tuple(sorted(valor, key=str)) if isinstance(valor, (list, tuple, set)) else (valor,)
+            if valores:
+                normalizados.append((dimensao, valores))
+        return tuple(sorted(normalizados))
+
+    def _filtrar(self, filtros):
+        base = self.celulas
+        for dimensao, valores in filtros:
+            base = base[base[dimensao].isin(valores)]
+        return base
+
+    def valores(self, dimensao, filtros=None):
+        """Distinct values of a dimension (inside the filtered slice)"""
+        if self.celulas is None:
+            return []
+        return sorted(self._filtrar(self._normalizar_filtros(filtros))[dimensao].unique().tolist(), key=str)
+
+    def fatiar(self, por, filtros=None):
+        """Roll-up to the `por` dimensions over the cells matching filtros ({dimensao: valor or [valores]})"""
+        por = [dimensao for dimensao in DIMENSOES if dimensao in por]
+        if self.celulas is None or not por:
+            return self.pd.DataFrame(columns=por + ['n', 'acertos', 'taxa_erro'])
+        chave = (tuple(por), self._normalizar_filtros(filtros))
+        if chave not in self._consultas:
+            if len(self._consultas) >= MAX_CONSULTAS_CACHE:
+                self._consultas = {}
+            s = self._filtrar(chave[1]).groupby(por, as_index=False)[['n', 'acertos']].sum()
+            s['taxa_erro'] = (1 - s['acertos'] / s['n']).round(3)
+            self._consultas[chave] = s.sort_values('taxa_erro', ascending=False, kind='stable')
+        return self._consultas[chave]
+
+
+def carregar_cubo(pd, caminho=CAMINHO_CUBO):
+    """Loads stored cube (empty cube if missing or unreadable)"""
+    cubo = carregar_pickle(caminho, "teacher cube")
+    return cubo if cubo is not None else CuboTurmas(pd)
+
+
+def salvar_cubo(cubo, caminho=CAMINHO_CUBO):
+    """Writes cube atomically"""
+    salvar_pickle(cubo, caminho)
+
+
+def atualizar_agregados(df, versao, caminho_view=CAMINHO_VIEW_ITENS, caminho_cubo=CAMINHO_CUBO):
+    """Refreshes the stored item view and teacher cube to df (one signature pass); returns (view, cubo)"""
+    import pandas as pd
+
+    view = carregar_view(pd, caminho_view)
+    cubo = carregar_cubo(pd, caminho_cubo)
+    if view.versao == versao and cubo.versao == versao:
+        return view, cubo
+    assinaturas = assinaturas_alunos(df, pd)
+    if view.atualizar(df, versao, assinaturas) is not None:
+        salvar_view(view, caminho_view)
+    if cubo.atualizar(df, versao, assinaturas) is not None:
+        salvar_cubo(cubo, caminho_cubo)
+    return view, cubo
+
+
+def _atualizar_arquivos(caminho_dados, caminho_view, caminho_cubo):
+    import pandas as pd
+    from helpers.sessao import versao_dados
+
+    try:
+        versao = versao_dados(caminho_dados)
+        inicio = time.perf_counter()
+        atualizar_agregados(pd.read_csv(caminho_dados), versao, caminho_view, caminho_cubo)
+        print(f"✅ Item view and teacher cube refreshed in the background in {time.perf_counter() - inicio:.1f} s")
+    except Exception as e:
+        print(f"❌ Error refreshing item view and teacher cube: {e}")
+
+
+TAREFA_AGREGADOS = 'agregados-atualizacao'
+
+
+def atualizar_em_segundo_plano(caminho_dados=CAMINHO_DADOS, caminho_view=CAMINHO_VIEW_ITENS, caminho_cubo=CAMINHO_CUBO):
+    """Starts one background refresh of the item view and teacher cube; False if one is running"""
+    return iniciar_tarefa(TAREFA_AGREGADOS, _atualizar_arquivos, caminho_dados, caminho_view, caminho_cubo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the teacher cube and run one slice")
+    parser.add_argument('--dados', default=CAMINHO_DADOS)
+    parser.add_argument('--saida', default=CAMINHO_CUBO)
+    parser.add_argument('--por', nargs='+', default=['Conteúdo', 'Descritor', 'Série'], choices=DIMENSOES)
+    parser.add_argument('--disciplina', default=None)
+    parser.add_argument('--turma', nargs='*', default=None)
+    args = parser.parse_args()
+
+    import pandas as pd
+    from helpers.sessao import versao_dados
+
+    cubo = carregar_cubo(pd, args.saida)
+    inicio = time.perf_counter()
+    novos = cubo.atualizar(pd.read_csv(args.dados), versao_dados(args.dados))
+    salvar_cubo(cubo, args.saida)
+    print(f"✅ Cube: {novos or 0} students folded in ({(time.perf_counter() - inicio) * 1000:.0f} ms), "
+          f"{len(cubo.ras)} students, {0 if cubo.celulas is None else len(cubo.celulas)} cells\n")
+
+    filtros = {}
+    if args.disciplina:
+        filtros['Disciplina'] = args.disciplina
+    if args.turma:
+        filtros['Série'] = args.turma
+    inicio = time.perf_counter()
+    fatia = cubo.fatiar(args.por, filtros)
+    print(fatia.to_string(index=False))
+    print(f"\n({(time.perf_counter() - inicio) * 1000:.1f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+# =============================================================================
+# CLASS / SCHOOL SCORE DISTRIBUTIONS (PERCENTILE, MEAN AND DEVIATION LOOKUP)
+# =============================================================================
+#
+# Scores are integer hit counts, so each (subject, scope) keeps a histogram with
+# cumulative counts: percentile rank, mean and deviation are O(1) lookups, and a
+# new student result is an O(bins) incremental update.
+
+import math
+
+ESCOPO_ESCOLA = 'escola'
+DISCIPLINAS = ('PORT', 'MAT')
+
+
+class Histograma:
+    """Histogram of integer scores with running sum / sum of squares"""
+
+    def __init__(self, max_nota=18):
+        self.contagens = [0] * (max_nota + 1)
+        self.acumulado = [0] * (max_nota + 1)   # students with score <= i
+        self.n = 0
+        self.soma = 0
+        self.soma_quadrados = 0
+
+    def _garantir(self, nota):
+        if nota >= len(self.contagens):
+            extra = nota + 1 - len(self.contagens)
+            self.contagens.extend([0] * extra)
+            self.acumulado.extend([self.n] * extra)
+
+    def adicionar(self, nota, quantidade=1):
+        nota = int(nota)
+        self._garantir(nota)
+        self.contagens[nota] += quantidade
+        for i in range(nota, len(self.acumulado)):
+            self.acumulado[i] += quantidade
+        self.n += quantidade
+        self.soma += nota * quantidade
+        self.soma_quadrados += nota * nota * quantidade
+
+    @property
+    def media(self):
+        return self.soma / self.n if self.n else 0.0
+
+    @property
+    def desvio(self):
+        if self.n < 2:
+            return 0.0
+        return math.sqrt(max(0.0, (self.soma_quadrados - self.soma * self.soma / self.n) / (self.n - 1)))
+
+    def percentil(self, nota):
+        """Percentile rank (0-100): share below plus half of the ties"""
+        if not self.n:
+            return None
+        nota = int(nota)
+        if nota >= len(self.acumulado):
+            return 100.0
+        abaixo = self.acumulado[nota - 1] if nota > 0 else 0
+        return round(100 * (abaixo + 0.5 * self.contagens[nota]) / self.n, 1)
+
+
+class DistribuicaoNotas:
+    """Score histograms per subject for the school and each class (Série)"""
+
+    def __init__(self, max_nota=18):
+        self.max_nota = max_nota
+        self.histogramas = {}   # (disciplina, escopo) -> Histograma
+
+    def _histograma(self, disciplina, escopo):
+        chave = (disciplina, escopo)
+        if chave not in self.histogramas:
+            self.histogramas[chave] = Histograma(self.max_nota)
+        return self.histogramas[chave]
+
+    def adicionar(self, disciplina, nota, turma=None, quantidade=1):
+        """Adds student result(s) to school and class distributions"""
+        self._histograma(disciplina, ESCOPO_ESCOLA).adicionar(nota, quantidade)
+        if turma is not None:
+            self._histograma(disciplina, turma).adicionar(nota, quantidade)
+
+    def resumo(self, disciplina, escopo=ESCOPO_ESCOLA):
+        hist = self.histogramas.get((disciplina, escopo))
+        if hist is None:
+            return {'n': 0, 'media': 0.0, 'desvio': 0.0}
+        return {'n': hist.n, 'media': round(hist.media, 2), 'desvio': round(hist.desvio, 2)}
+
+    def contagens(self, disciplina, escopo=ESCOPO_ESCOLA):
+        """Students per score (index = hits)"""
+        hist = self.histogramas.get((disciplina, escopo))
+        return list(hist.contagens) if hist else []
+
+    def comparar(self, disciplina, nota, turma=None):
+        """Student score vs class (falls back to school): difference to mean and percentile ranks
+
+        Read-only: unknown subjects compare against an empty histogram (percentiles None).
+        """
+        escopo = turma if (disciplina, turma) in self.histogramas else ESCOPO_ESCOLA
+        vazio = Histograma(self.max_nota)
+        hist = self.histogramas.get((disciplina, escopo), vazio)
+        escola = self.histogramas.get((disciplina, ESCOPO_ESCOLA), vazio)
+        return {
+            'escopo': escopo,
+            'media': round(hist.media, 2),
+            'desvio': round(hist.desvio, 2),
+            'diferenca': round(nota - hist.media, 1),
+            'percentil': hist.percentil(nota),
+            'percentil_escola': escola.percentil(nota),
+        }
+
+
+def adicionar_resultados(distribuicao, df):
+    """Folds the students of df into the distributions in one groupby pass"""
+    chaves = ['RA', 'Série', 'Disciplina'] if 'Série' in df.columns else ['RA', 'Disciplina']
+    notas = df.groupby(chaves)['acerto'].sum().reset_index()
+    colunas_grupo = ['Disciplina', 'Série', 'acerto'] if 'Série' in df.columns else ['Disciplina', 'acerto']
+    # One histogram update per distinct (subject, class, score), not per student
+    for linha in notas.groupby(colunas_grupo).size().reset_index(name='quantidade').itertuples(index=False):
+        turma = str(linha.Série) if 'Série' in df.columns else None
+        distribuicao.adicionar(linha.Disciplina, linha.acerto, turma, linha.quantidade)
+    return distribuicao
+
+
+def construir_distribuicao(df, max_nota=18):
+    """Builds all distributions from the answer table"""
+    return adicionar_resultados(DistribuicaoNotas(max_nota), df)
@@ -0,0 +1,317 @@
+# =============================================================================
+# IRT CALIBRATION (RASCH / 2PL, MARGINAL MAXIMUM LIKELIHOOD VIA EM)
+# =============================================================================
+#
+# One calibration per subject over the students × questions answer matrix.
+# E-step: posterior of each student over a fixed quadrature grid, processed in
+# blocks of TAMANHO_BLOCO students (optionally in worker processes), so memory
+# stays O(bloco × nós). M-step: vectorized Newton on every item at once, in
+# slope-intercept form. Abilities are MAP estimates (N(0, 1) prior) warm-started
+# from the previous calibration, so recalibrating after new students arrive
+# only takes a few iterations. The app never calibrates inside a rerun: it
+# reads the stored calibration and, when that is stale, starts one background
+# recalibration (or run the CLI below after updating the dataset).
+#
+# Usage:
+#   python -m analytics.irt                       # calibrate both subjects (2PL)
+#   python -m analytics.irt --modelo rasch --processos 4
+
+import argparse
+import os
+import time
+
+from helpers.loader import CAMINHO_DADOS, PASTA_DADOS
+from helpers.persistencia import carregar_pickle, salvar_pickle
+from helpers.segundo_plano import iniciar_tarefa
+
+CAMINHO_IRT = os.path.join(PASTA_DADOS, 'irt_parametros.pkl')
+
+MODELOS = ('rasch', '2pl')
+DISCIPLINAS = ('PORT', 'MAT')
+N_NOS = 41
+TAMANHO_BLOCO = 50000
+MAX_ITERACOES = 200
+TOLERANCIA = 1e-4
+PASSOS_NEWTON = 5
+
+# Weak priors keep parameters finite for questions everybody (or nobody) got right
+VARIANCIA_INTERCEPTO = 25.0
+LIMITES_DISCRIMINACAO = (0.2, 4.0)
+LIMITE_HABILIDADE = 6.0
+
+
+def matriz_respostas(df, disciplina):
+    """(ras, questoes, X) of one subject: students × questions, NaN where unanswered"""
+    linhas = df[df['Disciplina'] == disciplina]
+    tabela = linhas.pivot_table(index='RA', columns='questao_numero', values='acerto', aggfunc='max')
+    return tabela.index.to_numpy(), tabela.columns.to_numpy(), tabela.to_numpy(dtype=float)
+
+
+def quadratura(np, n_nos=N_NOS):
+    """Nodes and log-weights of a standard normal on a regular grid"""
+    nos = np.linspace(-LIMITE_HABILIDADE + 2, LIMITE_HABILIDADE - 2, n_nos)
+    log_pesos = -0.5 * nos ** 2
+    log_pesos -= np.log(np.exp(log_pesos).sum())
+    return nos, log_pesos
+
+
+def probabilidades(np, a, c, theta):
+    """P(correct) for every (theta, item): sigmoid(a * theta + c), shape len(theta) × len(a)"""
+    z = np.outer(theta, a) + c
+    return np.clip(1.0 / (1.0 + np.exp(-z)), 1e-9, 1 - 1e-9)
+
+
+def _passo_e(np, X, a, c, nos, log_pesos):
+    """Expected correct / answered counts per (item, node) and log-likelihood of one block"""
+    respondidas = (~np.isnan(X)).astype(float)
+    acertos = np.nan_to_num(X)
+    erros = respondidas - acertos
+    P = probabilidades(np, a, c, nos)                      # nós × itens
+    log_vero = acertos @ np.log(P).T + erros @ np.log1p(-P).T + log_pesos
+    maximo = log_vero.max(axis=1, keepdims=True)
+    posterior = np.exp(log_vero - maximo)
+    soma = posterior.sum(axis=1, keepdims=True)
+    posterior /= soma
+    return acertos.T @ posterior, respondidas.T @ posterior, float((np.log(soma) + maximo).sum())
+
+
+_matriz_worker = None
+
+
+def _iniciar_worker(X):
+    global _matriz_worker
+    _matriz_worker = X
+
+
+def _passo_e_worker(args):
+    import numpy as np
+    inicio, fim, a, c, nos, log_pesos = args
+    return _passo_e(np, _matriz_worker[inicio:fim], a, c, nos, log_pesos)
+
+
+def _passo_m(np, a, c, r, n, nos, modelo):
+    """Newton steps on every item at once (2×2 closed-form inverse for 2PL)"""
+    for _ in range(PASSOS_NEWTON):
+        P = probabilidades(np, a, c, nos).T               # itens × nós
+        residuo = r - n * P
+        info = n * P * (1 - P)
+        g_c = residuo.sum(axis=1) - c / VARIANCIA_INTERCEPTO
+        h_cc = info.sum(axis=1) + 1 / VARIANCIA_INTERCEPTO
+        if modelo == 'rasch':
+            c = c + g_c / h_cc
+            continue
+        g_a = residuo @ nos
+        h_aa = info @ nos ** 2
+        h_ac = info @ nos
+        det = h_aa * h_cc - h_ac ** 2
+        det = np.where(det > 1e-12, det, 1e-12)
+        a = np.clip(a + (h_cc * g_a - h_ac * g_c) / det, *LIMITES_DISCRIMINACAO)
+        c = c + (h_aa * g_c - h_ac * g_a) / det
+    return a, c
+
+
+def estimar_habilidades(np, X, a, c, theta0=None, iteracoes=25, tolerancia=1e-6, tamanho_bloco=TAMANHO_BLOCO):
+    """MAP abilities (N(0, 1) prior) by vectorized Newton, warm-started from theta0"""
+    respondidas = ~np.isnan(X)
+    if theta0 is None:
+        # Logit of the (smoothed) proportion correct is already close to the optimum
+        proporcao = (np.nansum(X, axis=1) + 0.5) / (respondidas.sum(axis=1) + 1.0)
+        theta0 = np.log(proporcao / (1 - proporcao))
+    theta = np.clip(np.asarray(theta0, dtype=float).copy(), -LIMITE_HABILIDADE, LIMITE_HABILIDADE)
+    for inicio in range(0, len(X), tamanho_bloco):
+        bloco = slice(inicio, inicio + tamanho_bloco)
+        acertos = np.where(respondidas[bloco], X[bloco], 0.0)
+        mascara = respondidas[bloco]
+        t = theta[bloco]
+        for _ in range(iteracoes):
+            P = probabilidades(np, a, c, t)
+            gradiente = ((acertos - P) * mascara) @ a - t
+            hessiana = -((P * (1 - P)) * mascara) @ (a * a) - 1
+            passo = gradiente / hessiana
+            t = np.clip(t - passo, -LIMITE_HABILIDADE, LIMITE_HABILIDADE)
+            if np.abs(passo).max(initial=0.0) < tolerancia:
+                break
+        theta[bloco] = t
+    return theta
+
+
+class CalibracaoIRT:
+    """Item parameters of one subject and ability of every calibrated student"""
+
+    def __init__(self, disciplina, modelo, questoes, a, c, habilidades, log_verossimilhanca=None, iteracoes=0):
+        self.disciplina = disciplina
+        self.modelo = modelo
+        self.questoes = questoes
+        self.a = a
+        self.c = c
+        self.habilidades = habilidades      # ra -> theta
+        self.log_verossimilhanca = log_verossimilhanca
+        self.iteracoes = iteracoes
+
+    @property
+    def dificuldade(self):
+        """b of the usual a(theta - b) parameterization"""
+        return -self.c / self.a
+
+    def habilidade(self, ra):
+        return self.habilidades.get(int(ra))
+
+    def estimar_aluno(self, np, respostas):
+        """Ability of a student not in the calibration: {questao_numero: acerto}"""
+        indice = {int(q): i for i, q in enumerate(self.questoes)}
+        linha = np.full((1, len(self.questoes)), np.nan)
+        for questao, acerto in respostas.items():
+            if int(questao) in indice:
+                linha[0, indice[int(questao)]] = acerto
+        return float(estimar_habilidades(np, linha, self.a, self.c)[0])
+
+    def tabela_itens(self, pd):
+        return pd.DataFrame({'questao_numero': self.questoes, 'discriminacao': self.a.round(3),
+                             'dificuldade': self.dificuldade.round(3)})
+
+
+def calibrar(np, X, modelo='2pl', inicial=None, tamanho_bloco=TAMANHO_BLOCO, processos=1,
+             max_iteracoes=MAX_ITERACOES, tolerancia=TOLERANCIA):
+    """EM calibration of one answer matrix; returns (a, c, log_verossimilhanca, iteracoes)
+
+    inicial: (a, c) of a previous calibration with the same questions (warm start).
+    """
+    if modelo not in MODELOS:
+        raise ValueError(f"Unknown IRT model: {modelo}")
+    nos, log_pesos = quadratura(np)
+    n_itens = X.shape[1]
+    if inicial is not None:
+        a, c = (np.asarray(v, dtype=float).copy() for v in inicial)
+        if modelo == 'rasch':
+            a = np.ones(n_itens)
+    else:
+        p = np.clip(np.nanmean(X, axis=0), 0.02, 0.98)
+        a, c = np.ones(n_itens), np.log(p / (1 - p))
+
+    blocos = [(inicio, min(inicio + tamanho_bloco, len(X))) for inicio in range(0, len(X), tamanho_bloco)]
+    pool = None
+    if processos > 1 and len(blocos) > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(processos, initializer=_iniciar_worker, initargs=(X,))
+
+    log_vero, iteracao = None, 0
+    try:
+        for iteracao in range(1, max_iteracoes + 1):
+            if pool is not None:
+                parciais = pool.map(_passo_e_worker, [(i, f, a, c, nos, log_pesos) for i, f in blocos])
+            else:
+                parciais = [_passo_e(np, X[i:f], a, c, nos, log_pesos) for i, f in blocos]
+            r = sum(p[0] for p in parciais)
+            n = sum(p[1] for p in parciais)
+            log_vero = sum(p[2] for p in parciais)
+
+            a_novo, c_novo = _passo_m(np, a, c, r, n, nos, modelo)
+            variacao = max(np.abs(a_novo - a).max(), np.abs(c_novo - c).max())
+            a, c = a_novo, c_novo
+            if variacao < tolerancia:
+                break
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return a, c, log_vero, iteracao
+
+
+def calibrar_dataset(df, np, anteriores=None, modelo='2pl', processos=1, tamanho_bloco=TAMANHO_BLOCO):
+    """{disciplina: CalibracaoIRT}, warm-started from previous calibrations when questions match"""
+    anteriores = anteriores or {}
+    calibracoes = {}
+    for disciplina in DISCIPLINAS:
+        ras, questoes, X = matriz_respostas(df, disciplina)
+        if len(ras) == 0:
+            continue
+        anterior = anteriores.get(disciplina)
+        reaproveitar = (anterior is not None and anterior.modelo == modelo
+                        and list(anterior.questoes) == list(questoes))
+        a, c, log_vero, iteracoes = calibrar(
+            np, X, modelo, (anterior.a, anterior.c) if reaproveitar else None, tamanho_bloco, processos)
+
+        theta0 = None
+        if reaproveitar:
+            # Known students start from their last ability, new ones from the raw-score logit
+            proporcao = (np.nansum(X, axis=1) + 0.5) / ((~np.isnan(X)).sum(axis=1) + 1.0)
+            theta0 = np.log(proporcao / (1 - proporcao))
+            for i, ra in enumerate(ras):
+                if int(ra) in anterior.habilidades:
+                    theta0[i] = anterior.habilidades[int(ra)]
+        theta = estimar_habilidades(np, X, a, c, theta0, tamanho_bloco=tamanho_bloco)
+        calibracoes[disciplina] = CalibracaoIRT(
+            disciplina, modelo, questoes, a, c, dict(zip((int(ra) for ra in ras), theta.tolist())),
+            log_vero, iteracoes)
+    return calibracoes
+
+
+def carregar_calibracoes(caminho=CAMINHO_IRT):
+    """(calibracoes, versao) of the stored calibration, or ({}, None)"""
+    dados = carregar_pickle(caminho, "IRT calibration")
+    if dados is None:
+        return {}, None
+    return dados['calibracoes'], dados['versao']
+
+
+def salvar_calibracoes(calibracoes, versao=None, caminho=CAMINHO_IRT):
+    """Writes calibrations atomically"""
+    salvar_pickle({'calibracoes': calibracoes, 'versao': versao}, caminho)
+
+
+def _recalibrar_arquivo(caminho_dados, caminho, modelo):
+    import numpy as np
+    import pandas as pd
+    from helpers.sessao import versao_dados
+
+    try:
+        versao = versao_dados(caminho_dados)
+        anteriores, versao_salva = carregar_calibracoes(caminho)
+        if versao_salva == versao:
+            return
+        inicio = time.perf_counter()
+        calibracoes = calibrar_dataset(pd.read_csv(caminho_dados), np, anteriores, modelo)
+        salvar_calibracoes(calibracoes, versao, caminho)
+        print(f"✅ IRT recalibrated in the background in {time.perf_counter() - inicio:.1f} s")
+    except Exception as e:
+        print(f"❌ Error recalibrating IRT: {e}")
+
+
+TAREFA_RECALIBRACAO = 'irt-recalibracao'
+
+
+def recalibrar_em_segundo_plano(caminho_dados=CAMINHO_DADOS, caminho=CAMINHO_IRT, modelo='2pl'):
+    """Starts one background recalibration (warm start) of the dataset file; False if one is running"""
+    return iniciar_tarefa(TAREFA_RECALIBRACAO, _recalibrar_arquivo, caminho_dados, caminho, modelo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate IRT item parameters and student abilities")
+    parser.add_argument('--dados', default=CAMINHO_DADOS)
+    parser.add_argument('--saida', default=CAMINHO_IRT)
+    parser.add_argument('--modelo', choices=MODELOS, default='2pl')
+    parser.add_argument('--processos', type=int, default=1, help="worker processes for the E-step")
+    parser.add_argument('--bloco', type=int, default=TAMANHO_BLOCO, help="students per E-step block")
+    parser.add_argument('--frio', action='store_true', help="ignore the stored calibration (no warm start)")
+    args = parser.parse_args()
+
+    import numpy as np
+    import pandas as pd
+
+    df = pd.read_csv(args.dados)
+    anteriores = {} if args.frio else carregar_calibracoes(args.saida)[0]
+    inicio = time.perf_counter()
+    calibracoes = calibrar_dataset(df, np, anteriores, args.modelo, args.processos, args.bloco)
+    duracao = time.perf_counter() - inicio
+
+    from helpers.sessao import versao_dados
+    salvar_calibracoes(calibracoes, versao_dados(args.dados), args.saida)
+    for disciplina, calibracao in calibracoes.items():
+        print(f"\n{disciplina}: {len(calibracao.habilidades)} students, {calibracao.iteracoes} EM iterations, "
+              f"log-likelihood {calibracao.log_verossimilhanca:.1f}")
+        print(calibracao.tabela_itens(pd).to_string(index=False))
+    print(f"\n✅ {args.modelo} calibration in {duracao:.2f} s -> {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
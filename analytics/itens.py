@@ -0,0 +1,117 @@
+# =============================================================================
+# ITEM ANALYSIS MATERIALIZED VIEW (DIFFICULTY AND DISCRIMINATION)
+# =============================================================================
+#
+# The view stores additive sufficient statistics per (Série, Disciplina,
+# questao_numero): n, Σx, ΣR, ΣR², ΣxR, where x is the item score and R the
+# student's rest score (subject total minus the item). Hit rate and corrected
+# point-biserial of any scope are derived by summing rows, and new students are
+# folded in without touching the ones already counted (edited or removed
+# students rebuild the view, see analytics.agregado). Content error rates are
+# slices of the teacher cube (analytics.cubo).
+#
+# Usage:
+#   python -m analytics.itens            # refresh view and print item table
+
+import argparse
+import os
+import time
+
+from analytics.agregado import AgregadoIncremental
+from helpers.loader import CAMINHO_DADOS, PASTA_DADOS
+from helpers.persistencia import carregar_pickle, salvar_pickle
+
+CAMINHO_VIEW_ITENS = os.path.join(PASTA_DADOS, 'view_itens.pkl')
+
+CHAVES_ITEM = ['Série', 'Disciplina', 'questao_numero']
+ESTATISTICAS = ['n', 'sx', 'sr', 'srr', 'sxr']
+SEM_TURMA = '-'
+
+
+def estatisticas_suficientes(df):
+    """Sufficient statistics of the rows of df (complete results of each student), vectorized"""
+    linhas = df[['RA', 'Disciplina', 'questao_numero', 'acerto']].copy()
+    linhas['Série'] = df['Série'].astype(str) if 'Série' in df.columns else SEM_TURMA
+    total = linhas.groupby(['RA', 'Disciplina'])['acerto'].transform('sum')
+    x = linhas['acerto'].astype(float)
+    resto = total - x
+    linhas = linhas.assign(n=1, sx=x, sr=resto, srr=resto * resto, sxr=x * resto)
+    return linhas.groupby(CHAVES_ITEM, as_index=False)[ESTATISTICAS].sum()
+
+
+class ViewItens(AgregadoIncremental):
+    """Materialized item statistics with incremental refresh by new students"""
+
+    def _zerar(self):
+        self.itens = None
+
+    def _estado(self):
+        return {'itens': self.itens}
+
+    def _somar(self, novos):
+        itens = estatisticas_suficientes(novos)
+        if self.itens is not None:
+            itens = self.pd.concat([self.itens, itens]).groupby(CHAVES_ITEM, as_index=False)[ESTATISTICAS].sum()
+        self.itens = itens
+
+    # ----- derived views -----
+
+    def analise_itens(self, turma=None):
+        """Per question: hit rate, corrected point-biserial, n (school, or one class)"""
+        chave = ('itens', turma)
+        if chave not in self._consultas:
+            base = self.itens if turma is None else self.itens[self.itens['Série'] == str(turma)]
+            s = base.groupby(['Disciplina', 'questao_numero'], as_index=False)[ESTATISTICAS].sum()
+            n = s['n'].astype(float)
+            p = s['sx'] / n
+            media_resto = s['sr'] / n
+            desvio_resto = ((s['srr'] / n) - media_resto ** 2).clip(lower=0) ** 0.5
+            # r_pb = cov(x, R) / (sd_x * sd_R), with sd_x = sqrt(p(1-p))
+            covariancia = s['sxr'] / n - p * media_resto
+            desvio_x = (p * (1 - p)) ** 0.5
+            s['taxa_acerto'] = p.round(3)
+            s['discriminacao'] = (covariancia / (desvio_x * desvio_resto)).where((desvio_x > 0) & (desvio_resto > 0)).round(3)
+            self._consultas[chave] = s[['Disciplina', 'questao_numero', 'n', 'taxa_acerto', 'discriminacao']]
+        return self._consultas[chave]
+
+    def taxa_acerto(self, disciplina, numero_questao, turma=None):
+        """Hit rate of one question (None if unknown)"""
+        if self.itens is None:
+            return None
+        tabela = self.analise_itens(turma)
+        linha = tabela[(tabela['Disciplina'] == disciplina) & (tabela['questao_numero'] == numero_questao)]
+        return float(linha['taxa_acerto'].iloc[0]) if not linha.empty else None
+
+
+def carregar_view(pd, caminho=CAMINHO_VIEW_ITENS):
+    """Loads stored view (empty view if missing or unreadable)"""
+    view = carregar_pickle(caminho, "item view")
+    return view if view is not None else ViewItens(pd)
+
+
+def salvar_view(view, caminho=CAMINHO_VIEW_ITENS):
+    """Writes view atomically"""
+    salvar_pickle(view, caminho)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the materialized item-analysis view")
+    parser.add_argument('--dados', default=CAMINHO_DADOS)
+    parser.add_argument('--saida', default=CAMINHO_VIEW_ITENS)
+    parser.add_argument('--turma', default=None)
+    args = parser.parse_args()
+
+    import pandas as pd
+    from helpers.sessao import versao_dados
+
+    view = carregar_view(pd, args.saida)
+    inicio = time.perf_counter()
+    novos = view.atualizar(pd.read_csv(args.dados), versao_dados(args.dados))
+    salvar_view(view, args.saida)
+    print(f"✅ Item view: {novos or 0} students folded in ({(time.perf_counter() - inicio) * 1000:.0f} ms), "
+          f"{len(view.ras)} students total\n")
+    print(view.analise_itens(args.turma).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+# =============================================================================
+# PERFORMANCE PREDICTION (BATCH-SCORED OFFLINE, STORED PER DATASET VERSION)
+# =============================================================================
+#
+# A logistic model over one row per (student, question) predicts the chance of
+# a correct answer from the question's school-wide easiness and the student's
+# other answers (rest of the subject, other subject, same content). Features
+# are built per block of students, so the full answer-level matrix is never
+# materialized as one frame. Each batch also fits the model on 80% of the
+# students and reports log-loss on the held-out 20%. The population is scored
+# offline: expected hits now (a current-score estimate, since the student's own
+# answers are model inputs) and expected hits once the student masters their
+# weakest contents, both mapped to the study-plan score scale. The app only
+# loads the stored batch (stale -> one background rescoring).
+#
+# Usage:
+#   python -m analytics.predicao            # train, validate, score everybody, store
+
+import argparse
+import os
+import time
+
+from helpers.loader import CAMINHO_DADOS, PASTA_DADOS
+from helpers.persistencia import carregar_pickle, salvar_pickle
+from helpers.segundo_plano import iniciar_tarefa
+
+CAMINHO_PREDICOES = os.path.join(PASTA_DADOS, 'predicoes.pkl')
+
+FEATURES_MODELO = ('intercepto', 'facilidade_questao', 'resto_disciplina', 'outra_disciplina', 'mesmo_conteudo')
+COLUNA_CONTEUDO = FEATURES_MODELO.index('mesmo_conteudo')
+
+# Study-plan "Score goal" scale (mean 500, sd 100, like the national exam)
+ESCALA_MEDIA, ESCALA_DESVIO = 500, 100
+ESCALA_MINIMO, ESCALA_MAXIMO, ESCALA_PASSO = 450, 1000, 10
+
+N_CONTEUDOS_REVISAR = 3
+TAMANHO_BLOCO_ALUNOS = 20000
+RIDGE = 1e-3
+# Students with RA % DIVISOR_VALIDACAO == 0 (~20%) are held out to validate the model
+DIVISOR_VALIDACAO = 5
+TAREFA_PONTUACAO = 'predicao-pontuacao'
+
+
+def _sigmoide(np, z):
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def facilidade_itens(df, np):
+    """Logit of the school-wide hit rate of each (Disciplina, questao_numero)"""
+    p_item = df.groupby(['Disciplina', 'questao_numero'])['acerto'].mean().clip(0.02, 0.98)
+    return np.log(p_item / (1 - p_item)).rename('facilidade').reset_index()
+
+
+def blocos_alunos(df, pd, tamanho=TAMANHO_BLOCO_ALUNOS):
+    """Answer rows of df in blocks of whole students (one groupby, no per-block scan)"""
+    codigos = pd.factorize(df['RA'])[0] // tamanho
+    for _, bloco in df.groupby(codigos, sort=False):
+        yield bloco
+
+
+def linhas_modelo(df, np, facilidade):
+    """(linhas, X, y) of a block of students: one row per answer with the model features"""
+    linhas = df[['RA', 'Disciplina', 'questao_numero', 'Conteúdo', 'acerto']].copy()
+    acerto = linhas['acerto'].astype(float)
+
+    disciplina = linhas.groupby(['RA', 'Disciplina'])['acerto']
+    total_disc, n_disc = disciplina.transform('sum'), disciplina.transform('count')
+    resto = (total_disc - acerto) / (n_disc - 1).clip(lower=1)
+
+    aluno = linhas.groupby('RA')['acerto']
+    n_outra = aluno.transform('count') - n_disc
+    outra = ((aluno.transform('sum') - total_disc) / n_outra.clip(lower=1)).where(n_outra > 0, resto)
+
+    conteudo = linhas.groupby(['RA', 'Disciplina', 'Conteúdo'])['acerto']
+    n_cont = conteudo.transform('count')
+    mesmo = ((conteudo.transform('sum') - acerto) / (n_cont - 1).clip(lower=1)).where(n_cont > 1, resto)
+
+    # Left merge keeps the row order of linhas
+    f = linhas[['Disciplina', 'questao_numero']].merge(facilidade, how='left')['facilidade'].to_numpy()
+
+    X = np.column_stack([np.ones(len(linhas)), f, resto, outra, mesmo]).astype(float)
+    return linhas, X, acerto.to_numpy()
+
+
+def treinar(np, blocos, iteracoes=25, tolerancia=1e-6):
+    """Ridge-regularized logistic regression by Newton (gradient/Hessian accumulated over (X, y) blocks)"""
+    k = blocos[0][0].shape[1]
+    pesos = np.zeros(k)
+    for _ in range(iteracoes):
+        gradiente = -RIDGE * pesos
+        hessiana = RIDGE * np.eye(k)
+        for Xb, yb in blocos:
+            p = _sigmoide(np, Xb @ pesos)
+            gradiente += Xb.T @ (yb - p)
+            hessiana += (Xb * (p * (1 - p))[:, None]).T @ Xb
+        passo = np.linalg.solve(hessiana, gradiente)
+        pesos += passo
+        if np.abs(passo).max() < tolerancia:
+            break
+    return pesos
+
+
+def _log_loss(np, y, p):
+    p = np.clip(p, 1e-9, 1 - 1e-9)
+    return float(-(y * np.log(p) + (1 - y) * np.log(1 - p)).mean())
+
+
+def validar(np, blocos):
+    """Fits on the training students and measures the held-out ones (item easiness alone as baseline)"""
+    treino, teste, alunos_validacao = [], [], 0
+    for linhas, X, y in blocos:
+        retido = linhas['RA'].to_numpy() % DIVISOR_VALIDACAO == 0
+        if (~retido).any():
+            treino.append((X[~retido], y[~retido]))
+        if retido.any():
+            teste.append((X[retido], y[retido]))
+            alunos_validacao += linhas['RA'][retido].nunique()
+    if not treino or not teste:
+        return None
+    pesos = treinar(np, treino)
+    X = np.concatenate([X for X, _ in teste])
+    y = np.concatenate([y for _, y in teste])
+    p = _sigmoide(np, X @ pesos)
+    return {'alunos_validacao': alunos_validacao,
+            'log_loss': round(_log_loss(np, y, p), 4),
+            'log_loss_base': round(_log_loss(np, y, _sigmoide(np, X[:, 1])), 4),
+            'acuracia': round(float(((p >= 0.5) == (y == 1)).mean()), 4)}
+
+
+def para_escala(np, acertos, media, desvio):
+    """Hits -> study-plan score scale, clipped and rounded like the slider"""
+    z = (acertos - media) / desvio if desvio > 0 else acertos * 0.0
+    nota = np.clip(ESCALA_MEDIA + ESCALA_DESVIO * z, ESCALA_MINIMO, ESCALA_MAXIMO)
+    return (np.round(nota / ESCALA_PASSO) * ESCALA_PASSO).astype(int)
+
+
+def _pontuar_bloco(np, pd, linhas, X, pesos, n_revisar):
+    """Per student of the block: hits, expected hits now and after reviewing the weakest contents"""
+    linhas = linhas.assign(previsto=_sigmoide(np, X @ pesos))
+
+    # Weakest contents of each student: most errors first
+    erros = (linhas['acerto'] == 0).groupby([linhas['RA'], linhas['Disciplina'], linhas['Conteúdo']]).sum()
+    fracos = erros[erros > 0].sort_values(ascending=False, kind='stable').groupby(level=0).head(n_revisar)
+    revisado = pd.MultiIndex.from_frame(linhas[['RA', 'Disciplina', 'Conteúdo']]).isin(fracos.index)
+    X_revisado = X[revisado].copy()
+    X_revisado[:, COLUNA_CONTEUDO] = 1.0
+    linhas['potencial'] = linhas['previsto']
+    linhas.loc[revisado, 'potencial'] = _sigmoide(np, X_revisado @ pesos)
+
+    return linhas.groupby('RA').agg(acertos=('acerto', 'sum'), acertos_previstos=('previsto', 'sum'),
+                                    acertos_potenciais=('potencial', 'sum'))
+
+
+def pontuar_populacao(df, np, pd, n_revisar=N_CONTEUDOS_REVISAR, tamanho_bloco=TAMANHO_BLOCO_ALUNOS):
+    """Validates, trains on every student and scores them block by block; (predicoes by RA, pesos, validacao)"""
+    facilidade = facilidade_itens(df, np)
+    blocos = [linhas_modelo(bloco, np, facilidade) for bloco in blocos_alunos(df, pd, tamanho_bloco)]
+    validacao = validar(np, blocos)
+    pesos = treinar(np, [(X, y) for _, X, y in blocos])
+
+    por_aluno = pd.concat([_pontuar_bloco(np, pd, linhas, X, pesos, n_revisar) for linhas, X, _ in blocos])
+    media, desvio = por_aluno['acertos'].mean(), por_aluno['acertos'].std(ddof=0)
+    por_aluno['nota_estimada'] = para_escala(np, por_aluno['acertos_previstos'].to_numpy(), media, desvio)
+    por_aluno['nota_potencial'] = para_escala(np, por_aluno['acertos_potenciais'].to_numpy(), media, desvio)
+    por_aluno.index = por_aluno.index.astype(int)
+    return por_aluno.round({'acertos_previstos': 2, 'acertos_potenciais': 2}), pesos, validacao
+
+
+def previsao_aluno(predicoes, ra):
+    """Stored prediction of one student as dict (None if unknown)"""
+    if predicoes is None or int(ra) not in predicoes.index:
+        return None
+    return predicoes.loc[int(ra)].to_dict()
+
+
+def carregar_predicoes(caminho=CAMINHO_PREDICOES):
+    """(predicoes, versao) of the stored batch, or (None, None)"""
+    dados = carregar_pickle(caminho, "predictions")
+    if dados is None:
+        return None, None
+    return dados['predicoes'], dados['versao']
+
+
+def salvar_predicoes(predicoes, pesos, versao=None, caminho=CAMINHO_PREDICOES, validacao=None):
+    """Writes the scored batch atomically"""
+    salvar_pickle({'predicoes': predicoes, 'pesos': pesos, 'versao': versao, 'validacao': validacao}, caminho)
+
+
+def _pontuar_arquivo(caminho_dados, caminho):
+    import numpy as np
+    import pandas as pd
+    from helpers.sessao import versao_dados
+
+    try:
+        versao = versao_dados(caminho_dados)
+        if carregar_predicoes(caminho)[1] == versao:
+            return
+        inicio = time.perf_counter()
+        predicoes, pesos, validacao = pontuar_populacao(pd.read_csv(caminho_dados), np, pd)
+        salvar_predicoes(predicoes, pesos, versao, caminho, validacao)
+        print(f"✅ Predictions rescored in the background in {time.perf_counter() - inicio:.1f} s")
+    except Exception as e:
+        print(f"❌ Error scoring predictions: {e}")
+
+
+def pontuar_em_segundo_plano(caminho_dados=CAMINHO_DADOS, caminho=CAMINHO_PREDICOES):
+    """Starts one background scoring of the dataset file; False if one is running"""
+    return iniciar_tarefa(TAREFA_PONTUACAO, _pontuar_arquivo, caminho_dados, caminho)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train, validate and score the performance model for every student")
+    parser.add_argument('--dados', default=CAMINHO_DADOS)
+    parser.add_argument('--saida', default=CAMINHO_PREDICOES)
+    args = parser.parse_args()
+
+    import numpy as np
+    import pandas as pd
+    from helpers.sessao import versao_dados
+
+    df = pd.read_csv(args.dados)
+    inicio = time.perf_counter()
+    predicoes, pesos, validacao = pontuar_populacao(df, np, pd)
+    duracao = time.perf_counter() - inicio
+    salvar_predicoes(predicoes, pesos, versao_dados(args.dados), args.saida, validacao)
+
+    for nome, peso in zip(FEATURES_MODELO, pesos):
+        print(f"{nome:>20}: {peso:+.3f}")
+    if validacao:
+        print(f"Held-out students ({validacao['alunos_validacao']}): log-loss {validacao['log_loss']} "
+              f"(item easiness alone {validacao['log_loss_base']}), accuracy {validacao['acuracia']:.1%}")
+    print(predicoes.head(10).to_string())
+    print(f"✅ {len(predicoes)} students scored in {duracao:.2f} s -> {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
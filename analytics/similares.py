@@ -0,0 +1,228 @@
+# =============================================================================
+# "STUDENTS LIKE YOU" (PACKED WRONG-ANSWER BITSETS, NEAREST NEIGHBOURS, GROUPS)
+# =============================================================================
+#
+# Each student is one row of bits, one per (Disciplina, questao_numero), set
+# where the answer was wrong, packed 8 per byte (36 questions -> 5 bytes), plus
+# a second row of the questions actually answered. Comparisons only count the
+# questions both students answered, so a subject one of them skipped does not
+# look all-correct. Hamming / Jaccard against the whole school is
+# XOR/AND/OR over the packed matrices plus a 256-entry popcount table, so a
+# query is a few vectorized passes over n × 10 bytes. Batch mode groups the
+# school with k-modes on the same bits.
+#
+# Usage:
+#   python -m analytics.similares --ra 123456789     # nearest students of one RA
+#   python -m analytics.similares --grupos 8         # remediation groups -> CSV
+
+import argparse
+import os
+import time
+
+from helpers.loader import CAMINHO_DADOS, PASTA_DADOS
+
+CAMINHO_GRUPOS = os.path.join(PASTA_DADOS, 'grupos_remediacao.csv')
+
+METRICAS = ('jaccard', 'hamming')
+K_VIZINHOS = 10
+# Share of the similar students who must also have missed a content to call it shared
+MINIMO_COMPARTILHADO = 0.5
+N_GRUPOS = 8
+MAX_ITERACOES_GRUPOS = 50
+
+
+def tabela_popcount(np):
+    """Set bits of every byte value"""
+    return np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint16)
+
+
+class IndiceSimilares:
+    """Packed wrong-answer bitsets of every student with neighbour and grouping queries"""
+
+    def __init__(self, np, ras, colunas, conteudos, bits, respondidas):
+        self.np = np
+        self.ras = ras
+        self.colunas = colunas          # [(disciplina, questao_numero)] in bit order
+        self.conteudos = conteudos      # Conteúdo of each column
+        self.bits = bits                # n × ceil(len(colunas) / 8) uint8, set = wrong
+        self.respondidas = respondidas  # same shape, set = answered
+        self.posicoes = {int(ra): i for i, ra in enumerate(ras)}
+        self.popcount = tabela_popcount(np)
+        self.n_erros = self._contar(bits)
+
+    def __len__(self):
+        return len(self.ras)
+
+    def _contar(self, bits):
+        return self.popcount[bits].sum(axis=1)
+
+    def _desempacotar(self, linhas):
+        return self.np.unpackbits(linhas, axis=1, count=len(self.colunas)).astype(bool)
+
+    def similaridades(self, ra, metrica='jaccard'):
+        """Similarity of a student to every student over the questions both answered (higher = closer)"""
+        np = self.np
+        posicao = self.posicoes[int(ra)]
+        alvo = self.bits[posicao]
+        comuns = self.respondidas & self.respondidas[posicao]
+        n_comuns = self._contar(comuns)
+        if metrica == 'hamming':
+            # Share of common questions with the same outcome
+            diferentes = self._contar((self.bits ^ alvo) & comuns)
+            return np.where(n_comuns > 0, 1 - diferentes / np.maximum(n_comuns, 1), 0.0)
+        if metrica != 'jaccard':
+            raise ValueError(f"Unknown similarity metric: {metrica}")
+        intersecao = self._contar(self.bits & alvo & comuns)
+        uniao = self._contar((self.bits | alvo) & comuns)
+        # Without errors on the common questions two students are identical; without common questions, unrelated
+        return np.where(uniao > 0, intersecao / np.maximum(uniao, 1), np.where(n_comuns > 0, 1.0, 0.0))
+
+    def vizinhos(self, ra, k=K_VIZINHOS, metrica='jaccard'):
+        """Row positions and similarity of the k most similar students (self excluded)"""
+        np = self.np
+        if int(ra) not in self.posicoes or len(self) < 2:
+            return np.array([], dtype=int), np.array([])
+        similaridade = self.similaridades(ra, metrica)
+        similaridade[self.posicoes[int(ra)]] = -np.inf
+        k = min(k, len(self) - 1)
+        candidatos = np.argpartition(-similaridade, k - 1)[:k]
+        ordem = candidatos[np.argsort(-similaridade[candidatos], kind='stable')]
+        return ordem, similaridade[ordem]
+
+    def _taxa_erro(self, linhas):
+        """Per question: wrong / answered over the given rows (NaN where nobody answered)"""
+        np = self.np
+        erradas = self._desempacotar(self.bits[linhas]).sum(axis=0)
+        respondidas = self._desempacotar(self.respondidas[linhas]).sum(axis=0)
+        return np.where(respondidas > 0, erradas / np.maximum(respondidas, 1), np.nan)
+
+    def comparar_com_vizinhos(self, ra, k=K_VIZINHOS, metrica='jaccard'):
+        """Per question the student missed: share of similar students who also missed / got it right
+
+        Shares count only the neighbours who answered the question. Returns
+        [{'disciplina', 'questao_numero', 'conteudo', 'tambem_erraram', 'acertaram'}],
+        shared weaknesses first.
+        """
+        np = self.np
+        posicoes, _ = self.vizinhos(ra, k, metrica)
+        if len(posicoes) == 0:
+            return []
+        proprio = self._desempacotar(self.bits[[self.posicoes[int(ra)]]])[0]
+        erraram = self._taxa_erro(posicoes)
+        resultado = [
+            {'disciplina': self.colunas[j][0], 'questao_numero': self.colunas[j][1], 'conteudo': self.conteudos[j],
+             'tambem_erraram': round(float(erraram[j]), 2), 'acertaram': round(float(1 - erraram[j]), 2)}
+            for j in np.flatnonzero(proprio) if not np.isnan(erraram[j])
+        ]
+        return sorted(resultado, key=lambda item: -item['tambem_erraram'])
+
+    # ----- batch grouping -----
+
+    def agrupar(self, n_grupos=N_GRUPOS, max_iteracoes=MAX_ITERACOES_GRUPOS, semente=0):
+        """k-modes over the bitsets: group label of every student (Hamming to the group's majority pattern)"""
+        np = self.np
+        n_grupos = min(n_grupos, len(self))
+        if n_grupos == 0:
+            return np.array([], dtype=int)
+        aleatorio = np.random.default_rng(semente)
+        centros = self.bits[aleatorio.choice(len(self), n_grupos, replace=False)].copy()
+        rotulos = np.full(len(self), -1)
+        for _ in range(max_iteracoes):
+            # Only the questions each student answered count
+            distancias = np.stack([self._contar((self.bits ^ centro) & self.respondidas) for centro in centros], axis=1)
+            novos = distancias.argmin(axis=1)
+            if np.array_equal(novos, rotulos):
+                break
+            rotulos = novos
+            for g in range(n_grupos):
+                membros = np.flatnonzero(rotulos == g)
+                if len(membros):
+                    centros[g] = np.packbits(np.nan_to_num(self._taxa_erro(membros)) >= 0.5)
+        return rotulos
+
+    def resumo_grupos(self, rotulos, top=3):
+        """Size, mean errors and most missed contents of each group"""
+        np = self.np
+        resumo = []
+        for g in np.unique(rotulos):
+            mascara = rotulos == g
+            taxa = np.nan_to_num(self._taxa_erro(mascara))
+            por_conteudo = {}
+            for j in np.argsort(-taxa):
+                chave = f"{self.colunas[j][0]} · {self.conteudos[j]}"
+                por_conteudo.setdefault(chave, round(float(taxa[j]), 2))
+            principais = sorted(por_conteudo.items(), key=lambda item: -item[1])[:top]
+            resumo.append({'grupo': int(g), 'alunos': int(mascara.sum()),
+                           'media_erros': round(float(self.n_erros[mascara].mean()), 1),
+                           'conteudos': [f"{c} ({v:.0%})" for c, v in principais]})
+        return resumo
+
+
+def construir_indice(df, np):
+    """Bitset index of every student of the dataset (one pivot + packbits)"""
+    # No fill: a question the student did not answer stays NaN (masked), not "correct"
+    erros = df.pivot_table(index='RA', columns=['Disciplina', 'questao_numero'], values='erro', aggfunc='max')
+    conteudos = df.groupby(['Disciplina', 'questao_numero'])['Conteúdo'].first()
+    colunas = [tuple(coluna) for coluna in erros.columns]
+    matriz = erros.to_numpy(dtype=float)
+    bits = np.packbits(np.nan_to_num(matriz) > 0, axis=1)
+    respondidas = np.packbits(~np.isnan(matriz), axis=1)
+    return IndiceSimilares(np, erros.index.to_numpy(), colunas, [conteudos.get(c, '') for c in colunas], bits,
+                           respondidas)
+
+
+def conteudos_compartilhados(comparacao, minimo=MINIMO_COMPARTILHADO):
+    """Contents of a comparar_com_vizinhos result that at least `minimo` of the similar students also missed"""
+    vistos = {}
+    for item in comparacao:
+        if item['tambem_erraram'] >= minimo:
+            chave = (item['disciplina'], item['conteudo'])
+            vistos[chave] = max(vistos.get(chave, 0), item['tambem_erraram'])
+    return sorted(({'disciplina': d, 'conteudo': c, 'tambem_erraram': v} for (d, c), v in vistos.items()),
+                  key=lambda item: -item['tambem_erraram'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Similar students and remediation groups over wrong answers")
+    parser.add_argument('--dados', default=CAMINHO_DADOS)
+    parser.add_argument('--ra', type=int, default=None, help="show the most similar students of one RA")
+    parser.add_argument('--k', type=int, default=K_VIZINHOS)
+    parser.add_argument('--metrica', choices=METRICAS, default='jaccard')
+    parser.add_argument('--grupos', type=int, default=None, help="group the school into N remediation groups")
+    parser.add_argument('--saida', default=CAMINHO_GRUPOS)
+    args = parser.parse_args()
+
+    import numpy as np
+    import pandas as pd
+
+    df = pd.read_csv(args.dados)
+    inicio = time.perf_counter()
+    indice = construir_indice(df, np)
+    print(f"✅ Index of {len(indice)} students in {(time.perf_counter() - inicio) * 1000:.0f} ms "
+          f"({indice.bits.nbytes + indice.respondidas.nbytes} bytes of bitsets)")
+
+    if args.ra is not None:
+        inicio = time.perf_counter()
+        posicoes, similaridade = indice.vizinhos(args.ra, args.k, args.metrica)
+        print(f"\n{len(posicoes)} nearest students in {(time.perf_counter() - inicio) * 1000:.2f} ms:")
+        for posicao, valor in zip(posicoes, similaridade):
+            print(f"  RA {indice.ras[posicao]}: similarity {valor:.2f}, {indice.n_erros[posicao]} errors")
+        comparacao = indice.comparar_com_vizinhos(args.ra, args.k, args.metrica)
+        for item in comparacao:
+            print(f"  {item['disciplina']} Q{item['questao_numero']} ({item['conteudo']}): "
+                  f"{item['tambem_erraram']:.0%} also missed, {item['acertaram']:.0%} got it right")
+        for item in conteudos_compartilhados(comparacao):
+            print(f"  Shared weakness: {item['disciplina']} · {item['conteudo']} ({item['tambem_erraram']:.0%})")
+
+    if args.grupos:
+        inicio = time.perf_counter()
+        rotulos = indice.agrupar(args.grupos)
+        pd.DataFrame({'RA': indice.ras, 'grupo': rotulos}).to_csv(args.saida, index=False)
+        print(f"\n✅ {args.grupos} groups in {(time.perf_counter() - inicio) * 1000:.0f} ms -> {args.saida}")
+        for grupo in indice.resumo_grupos(rotulos):
+            print(f"  Group {grupo['grupo']}: {grupo['alunos']} students, {grupo['media_erros']} errors on average; "
+                  f"{', '.join(grupo['conteudos'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,22 +1,37 @@
+from helpers.perfil import ativar_perfil_imports, marcar_primeira_renderizacao, relatorio_inicio
+ativar_perfil_imports()
+
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import requests
-import PyPDF2
-import pdfplumber
-import io
-import urllib.parse
 import os
-import random
-from datetime import datetime, timedelta
-import base64
-import tempfile
+from datetime import datetime
 import re
-from openai import OpenAI
+import uuid
 from helpers.loader import load_data
-from graphs.graphs import criar_grafico_velocimetro, criar_grafico_conteudos_prioritarios
-from gamefic.game import inicializar_sistema_gamificacao, verificar_conquistas, atualizar_pontuacao, exibir_widget_gamificacao  
+from helpers.assets import pre_renderizar_css, exibir_css, exibir_imagem, relatorio_assets
+from helpers.memoria_sessao import perfil_sessao, registrar_sessao, relatorio_memoria_sessoes, historico_sessao, aplicar_orcamento, relatorio_orcamento
+from helpers.acesso import acesso_autorizado, SEGREDO_ADMIN, SEGREDO_PROFESSOR
+from helpers.sessao import obter_aluno_sessao, versao_dados, estatisticas_bootstrap, DadosIndisponiveis
+from graphs.graphs import grafico_velocimetro_cache, grafico_conteudos_prioritarios_cache, relatorio_cache_figuras
+from gamefic.game import inicializar_sistema_gamificacao, verificar_conquistas, atualizar_pontuacao, exibir_widget_gamificacao, registrar_acesso_diario
+from gamefic.armazem import obter_armazem
+from gamefic.placar import obter_placar, exibir_placar
+from gamefic.eventos import obter_registro_eventos
+from analytics.distribuicao import ESCOPO_ESCOLA
+from analytics.itens import carregar_view, CAMINHO_VIEW_ITENS
+from analytics.irt import carregar_calibracoes, recalibrar_em_segundo_plano, CAMINHO_IRT
+from analytics.similares import construir_indice, conteudos_compartilhados
+from analytics.predicao import carregar_predicoes, pontuar_em_segundo_plano, previsao_aluno, CAMINHO_PREDICOES, N_CONTEUDOS_REVISAR, ESCALA_MINIMO, ESCALA_MAXIMO
+from analytics.cubo import carregar_cubo, atualizar_em_segundo_plano, CAMINHO_CUBO, DIMENSOES
+from tutor.prompts import criar_mensagens_professor_ia, prompt_sistema_lu, tokens_da_resposta, MODELO_PADRAO
+from tutor.scheduler import obter_agendador
+from tutor.memoria import MemoriaConversa, criar_resumidor_openai, resumidor_local
+from tutor.resiliencia import chamar_modelo_com_prazo, metricas_resiliencia, cache_respostas, CacheRespostas
+from tutor.telemetry import Medicao, obter_telemetria, ler_registros, resumir, RECURSO_FABI, RECURSO_LU
+from questions_analysis.materiais import ler_pdf_gdrive_direto
+from questions_analysis.precompute import carregar_explicacoes, obter_explicacao, catalogo_questoes, CAMINHO_EXPLICACOES
+from questions_analysis.indice import carregar_indice, salvar_indice, indexar_catalogo, contexto_material
 
 
 # =============================================================================
@@ -50,6 +65,14 @@ def setup_openai():
 
 OPENAI_AVAILABLE, OPENAI_STATUS = setup_openai()
 
+# Fragments rerun independently of the rest of the script
+# (st.fragment >= 1.37, st.experimental_fragment in 1.33-1.36)
+_decorador_fragmento = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+
+def fragmento(funcao):
+    """Turns function into an independently rerunning fragment when supported"""
+    return _decorador_fragmento(funcao) if _decorador_fragmento else funcao
+
 # =============================================================================
 # THEMES AND COLORS
 # =============================================================================
@@ -74,7 +97,9 @@ COLORS = {
 # OPTIMIZED CUSTOM CSS
 # =============================================================================
 
-CSS_STYLES = f'''
+def montar_css():
+    """Builds the app stylesheet from COLORS"""
+    return f'''
 <style>
     /* ===== VARIABLES AND RESET ===== */
     :root {{
@@ -294,101 +319,17 @@ CSS_STYLES = f'''
 </style>
 '''
 
-st.markdown(CSS_STYLES, unsafe_allow_html=True)
-@st.cache_data
+@st.cache_resource
+def css_pre_renderizado():
+    """Formats and minifies the stylesheet once per process"""
+    return pre_renderizar_css(montar_css())
+
+exibir_css(st, css_pre_renderizado(), components.html)
 
 # =============================================================================
 # NEW SYSTEM: AI PROFESSOR WITH SPECIFIC COMMENTED ANSWERS
 # =============================================================================
 
-def extrair_file_id_gdrive(url):
-    """Robustly extracts file ID from Google Drive URL"""
-    
-    patterns = [
-        r"/d/([a-zA-Z0-9_-]{33,44})",
-        r"id=([a-zA-Z0-9_-]{33,44})",
-        r"open\?id=([a-zA-Z0-9_-]{33,44})",
-        r"file/d/([a-zA-Z0-9_-]+)",
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
-    
-    return None
-
-def ler_pdf_gdrive_direto(url):
-    """Reads PDF directly from Google Drive with improved method"""
-    try:
-        file_id = extrair_file_id_gdrive(url)
-        if not file_id:
-            print("❌ Could not extract file ID")
-            return None
-        
-        # URL for direct download
-        download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
-        
-        # Headers to avoid blocking
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'application/pdf, text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-        }
-        
-        # Download with longer timeout
-        response = requests.get(download_url, headers=headers, timeout=45)
-        response.raise_for_status()
-        
-        # Check if it's PDF
-        content_type = response.headers.get('content-type', '').lower()
-        is_pdf = 'pdf' in content_type or response.content[:4] == b'%PDF'
-        
-        if not is_pdf:
-            # Might be an HTML page (Google Drive asking for confirmation)
-            if 'text/html' in content_type and 'google' in response.text.lower():
-                # Try to extract real download link
-                match = re.search(r'confirm=([^&]+)', response.text)
-                if match:
-                    confirm_code = match.group(1)
-                    download_url = f"https://drive.google.com/uc?export=download&id={file_id}&confirm={confirm_code}"
-                    response = requests.get(download_url, headers=headers, timeout=45)
-                    response.raise_for_status()
-        
-        # Process in memory
-        pdf_file = io.BytesIO(response.content)
-        
-        # First try with pdfplumber (more robust)
-        try:
-            with pdfplumber.open(pdf_file) as pdf:
-                texto = ""
-                for i, page in enumerate(pdf.pages):
-                    page_text = page.extract_text()
-                    if page_text:
-                        texto += f"--- Page {i+1} ---\n{page_text}\n\n"
-                
-                if texto.strip():
-                    return texto
-        except:
-            pass
-        
-        # Fallback to PyPDF2
-        try:
-            pdf_file.seek(0)
-            reader = PyPDF2.PdfReader(pdf_file)
-            texto = ""
-            for i, page in enumerate(reader.pages):
-                page_text = page.extract_text()
-                if page_text:
-                    texto += f"--- Page {i+1} ---\n{page_text}\n\n"
-            
-            return texto if texto.strip() else None
-        except:
-            return None
-            
-    except Exception as e:
-        print(f"❌ Error reading PDF from Google Drive: {e}")
-        return None
-
 def extrair_conteudo_pedagogico_avancado(texto_pdf):
     """Extracts pedagogical sections from PDF in advanced way"""
     
@@ -467,57 +408,29 @@ def extrair_conteudo_pedagogico_avancado(texto_pdf):
     
     return conteudo_estruturado
 
-def criar_prompt_professor_ia(conteudo_estruturado, pergunta_aluno, disciplina, numero_questao):
-    """Creates specialized prompt for AI Professor"""
-    
-    prompt = f"""YOU ARE: FABI, a high school {disciplina.upper()} specialist teacher
-
-⚠️ CRITICAL CONTEXT - READ CAREFULLY:
-You are helping with QUESTION {numero_questao} of {disciplina.upper()}
-IGNORE any content from other subjects or questions in the attached material
-FOCUS SOLELY on this specific question: Question {numero_questao} of {disciplina.upper()}
-
-KNOWLEDGE BASE - QUESTION {numero_questao} ({disciplina.upper()}):
-• Skill assessed: {conteudo_estruturado.get('habilidade', 'Not specified')}
-• Main content: {conteudo_estruturado.get('conteudo', 'Not specified')}
-• Commented solution: {conteudo_estruturado.get('resposta_comentada', '')[:1000]}
-• Pedagogical explanation: {conteudo_estruturado.get('explicacao', '')[:800]}
-
-MANDATORY INSTRUCTIONS - FOLLOW STRICTLY:
-1. ✅ ANSWER ABOUT QUESTION {numero_questao} OF {disciplina.upper()} ONLY
-2. ✅ DO NOT answer about other subjects or unrelated formulas
-3. ✅ If the question mentions concepts from another subject, redirect to {disciplina.upper()}
-4. ✅ USE THE OFFICIAL material of the question as main source
-5. ✅ ANSWER DIRECTLY - without preliminaries or introductions
-6. ✅ BE COMPLETE but CONCISE - all necessary information at once
-7. ✅ EXPLAIN AS A TEACHER - clear, step by step, with examples
-8. ✅ GIVE PRACTICAL TIPS - avoid common mistakes
-9. ✅ SHOW THE COMPLETE reasoning
-10. ✅ MANDATORY: Use UNICODE SYMBOLS in ALL mathematical formulas
-
-FORMATTING FOR ANSWERS - MANDATORY:
-📐 Mathematics: ALWAYS use UNICODE SYMBOLS - NEVER use LaTeX or $:
-   • Multiplication: use × (example: 3 × 4 = 12)
-   • Division: use ÷ (example: 12 ÷ 3 = 4)
-   • Power: use ² ³ ⁴ (example: 5² = 25, 2³ = 8)
-   • Square root: use √ (example: √16 = 4)
-   • Pi: use π (example: 2πr for circumference)
-   • Degrees: use ° (example: 90°)
-   • Approximately: use ≈ (example: π ≈ 3.14)
-   • Plus/Minus: use ± (example: x = 5 ± 2)
-   • Inequalities: use ≤ ≥ (example: x ≤ 10)
-📝 Portuguese: Use clear structure with numbered topics
-🔢 Examples: With real numbers/words
-💡 Tips: For memorization or avoiding mistakes
-
-SUBJECT OF THIS ANSWER: {disciplina.upper()}
-QUESTION: {numero_questao}
-STUDENT'S QUESTION: {pergunta_aluno}
-
-Answer as a {disciplina.upper()} teacher - WITHOUT LEAVING THE SCOPE OF QUESTION {numero_questao}:
-"""
-    
-    return prompt
+def obter_sessao_id():
+    """Returns stable id of this browser session (telemetry tag)"""
+    if 'sessao_id' not in st.session_state:
+        st.session_state.sessao_id = uuid.uuid4().hex[:12]
+    return st.session_state.sessao_id
+
+def chamar_openai_com_prazo(recurso, client, medicao=None, **parametros):
+    """Scheduled call under the feature deadline, with a hedged second request when slow"""
+    # Hedge runs in a worker thread: resolve session-dependent values here
+    aluno_id = st.session_state.get('ra_input') or 'anonimo'
+    return chamar_modelo_com_prazo(recurso, client, aluno_id, medicao=medicao, **parametros)
+
+def resposta_rapida_professor(pergunta, disciplina, numero_questao):
+    """Fast fallback for FABI: cached answer, then precomputed explanation"""
+    resposta = cache_respostas.obter(CacheRespostas.chave(disciplina, numero_questao, pergunta))
+    if resposta:
+        return resposta
+    
+    codigo = 'PORT' if disciplina.lower() in ('portuguese', 'português') else 'MAT'
+    explicacao = obter_explicacao(carregar_explicacoes_questoes(), codigo, numero_questao)
+    if explicacao:
+        return f"⏳ Professor FABI is very busy right now. Here is the prepared analysis of question {numero_questao}:\n\n{explicacao}"
+    return None
 
 def perguntar_ao_professor_ia(pergunta, url_pdf_questao, disciplina, numero_questao):
     """Asks a specific question to AI Professor about a question"""
@@ -525,6 +438,8 @@ def perguntar_ao_professor_ia(pergunta, url_pdf_questao, disciplina, numero_ques
     if not OPENAI_AVAILABLE:
         return "⚠️ AI Professor is temporarily unavailable. Configure OpenAI to use this functionality."
     
+    medicao = Medicao(RECURSO_FABI, disciplina, obter_sessao_id(), MODELO_PADRAO)
+    
     try:
         from openai import OpenAI
         
@@ -538,6 +453,7 @@ def perguntar_ao_professor_ia(pergunta, url_pdf_questao, disciplina, numero_ques
             api_key = os.getenv('OPENAI_API_KEY')
         
         if not api_key:
+            medicao.usar_fallback("API key not configured")
             return "❌ OpenAI API key not configured."
         
         client = OpenAI(api_key=api_key)
@@ -547,6 +463,7 @@ def perguntar_ao_professor_ia(pergunta, url_pdf_questao, disciplina, numero_ques
             texto_pdf = ler_pdf_gdrive_direto(url_pdf_questao)
             
             if not texto_pdf:
+                medicao.usar_fallback("question PDF unavailable")
                 return f"❌ Could not access material for question {numero_questao}. The PDF may be unavailable."
         
         # 2. Extract pedagogical content
@@ -561,23 +478,18 @@ def perguntar_ao_professor_ia(pergunta, url_pdf_questao, disciplina, numero_ques
                     "resposta_comentada": texto_pdf[:1500]
                 }
         
-        # 3. Create specialized prompt
-        prompt = criar_prompt_professor_ia(conteudo_estruturado, pergunta, disciplina, numero_questao)
+        # 3. Create specialized prompt (static instructions + material fitted to token budget)
+        mensagens, tokens_estimados = criar_mensagens_professor_ia(conteudo_estruturado, pergunta, disciplina, numero_questao)
         
         # 4. Call OpenAI
         with st.spinner("👩‍🏫 Professor FABI is thinking..."):
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": f"You are a high school {disciplina} specialist teacher. Be direct, complete and pedagogical. ALWAYS answer about {disciplina} questions. Use official material as main reference. If the question is about another subject, redirect to {disciplina}."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
+            response = chamar_openai_com_prazo(RECURSO_FABI, client, medicao,
+                model=MODELO_PADRAO,
+                messages=mensagens,
                 temperature=0.7,
                 max_tokens=800
             )
+            medicao.registrar_resposta(response)
             
             resposta = response.choices[0].message.content.strip()
             
@@ -596,37 +508,48 @@ def perguntar_ao_professor_ia(pergunta, url_pdf_questao, disciplina, numero_ques
                 if palavras_mat_na_resp >= 3 and palavras_port_na_resp < 2:
                     st.warning("⚠️ Detected answer might be focusing on another subject. Trying again...")
                     # Try a second time with even more focused prompt
-                    response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[
-                            {
-                                "role": "system", 
-                                "content": f"CRITICAL: You must answer ONLY about PORTUGUESE. Completely ignore any mathematical formula. Focus on: {', '.join(palavras_chave_port[:5])}"
-                            },
-                            {"role": "user", "content": f"Answering about QUESTION {numero_questao} of PORTUGUESE:\n{prompt}"}
-                        ],
+                    medicao.nova_tentativa("answer off-subject")
+                    mensagens, tokens_estimados = criar_mensagens_professor_ia(
+                        conteudo_estruturado, pergunta, disciplina, numero_questao,
+                        lembrete=f"CRITICAL: You must answer ONLY about PORTUGUESE. Completely ignore any mathematical formula. Focus on: {', '.join(palavras_chave_port[:5])}"
+                    )
+                    response = chamar_openai_com_prazo(RECURSO_FABI, client, medicao,
+                        model=MODELO_PADRAO,
+                        messages=mensagens,
                         temperature=0.5,
                         max_tokens=800
                     )
+                    medicao.registrar_resposta(response)
                     resposta = response.choices[0].message.content.strip()
             
-            # Add to AI Professor conversation history
-            if 'professor_history' not in st.session_state:
-                st.session_state.professor_history = []
+            # Prompt tokens for this call (API usage, local count as fallback)
+            uso_tokens = tokens_da_resposta(response)
+            if not uso_tokens['prompt']:
+                uso_tokens['prompt'] = tokens_estimados
             
-            st.session_state.professor_history.append({
+            # Add to AI Professor conversation history (reloaded if spilled to disk)
+            historico_sessao(st, 'professor_history', obter_sessao_id()).append({
                 "questao": numero_questao,
                 "disciplina": disciplina,
                 "pergunta": pergunta,
                 "resposta": resposta,
+                "tokens_prompt": uso_tokens['prompt'],
+                "tokens_cache": uso_tokens['cache'],
                 "timestamp": datetime.now().strftime("%H:%M:%S")
             })
             
+            cache_respostas.guardar(CacheRespostas.chave(disciplina, numero_questao, pergunta), resposta)
+            
             return resposta
             
     except Exception as e:
-        print(f"❌ Error in AI Professor: {e}")
+        medicao.usar_fallback(e)
+        resposta_rapida = resposta_rapida_professor(pergunta, disciplina, numero_questao)
+        if resposta_rapida:
+            return resposta_rapida
         return f"⚠️ There was an error processing your question. Details: {str(e)[:200]}"
+    finally:
+        obter_telemetria().registrar(medicao.como_registro())
 
 def exibir_interface_professor_ia(numero_questao, disciplina, url_pdf, conteudo, unique_id=""):
     """Interface to ask questions to AI Professor about a specific question"""
@@ -640,13 +563,12 @@ def exibir_interface_professor_ia(numero_questao, disciplina, url_pdf, conteudo,
     
     # Initialize history for this question
     questao_key = f"professor_q{numero_questao}_{unique_id}"
-    if questao_key not in st.session_state:
-        st.session_state[questao_key] = []
+    historico = historico_sessao(st, questao_key, obter_sessao_id())
     
     # Show previous questions/answers for this question
-    if st.session_state[questao_key]:
+    if historico:
         st.markdown("#### 📝 Previous Conversation")
-        for i, msg in enumerate(st.session_state[questao_key][-3:]):  # Show last 3
+        for i, msg in enumerate(historico[-3:]):  # Show last 3
             if msg["role"] == "user":
                 st.markdown(f'''
                 <div class="user-message">
@@ -682,7 +604,7 @@ def exibir_interface_professor_ia(numero_questao, disciplina, url_pdf, conteudo,
         if st.button("🎯 Ask", key=f"btn_q{numero_questao}_{unique_id}", use_container_width=True):
             if pergunta.strip():
                 # Add question to history
-                st.session_state[questao_key].append({
+                historico.append({
                     "role": "user",
                     "content": pergunta,
                     "time": datetime.now().strftime("%H:%M")
@@ -692,7 +614,7 @@ def exibir_interface_professor_ia(numero_questao, disciplina, url_pdf, conteudo,
                 resposta = perguntar_ao_professor_ia(pergunta, url_pdf, disciplina, numero_questao)
                 
                 # Add answer to history
-                st.session_state[questao_key].append({
+                historico.append({
                     "role": "assistant",
                     "content": resposta,
                     "time": datetime.now().strftime("%H:%M")
@@ -738,7 +660,7 @@ def inicializar_sistema_plano_estudos():
             'etapa_questionario': 1
         }
 
-def coletar_respostas_questionario(aluno_nome):
+def coletar_respostas_questionario(aluno_nome, previsao=None):
     """Interface to collect answers from study plan questionnaire"""
     
     st.markdown(f'''
@@ -778,7 +700,14 @@ def coletar_respostas_questionario(aluno_nome):
             tempo = st.selectbox("Preparation time:", ["1 month", "3 months", "6 months", "1 year"])
             disciplinas = st.multiselect("Priority subjects:", ["Portuguese", "Mathematics", "Writing"], ["Portuguese", "Mathematics"])
         with col2:
-            nota = st.slider("Score goal:", 450, 1000, 650, 10)
+            # Suggested goal: predicted score after mastering the weakest contents (precomputed lookup)
+            sugestao = 650
+            if previsao is not None:
+                sugestao = min(max(int(previsao['nota_potencial']), ESCALA_MINIMO), ESCALA_MAXIMO)
+            nota = st.slider("Score goal:", 450, 1000, sugestao, 10)
+            if previsao is not None:
+                st.caption(f"📈 Current-score estimate: {previsao['nota_estimada']} · "
+                           f"after reviewing your {N_CONTEUDOS_REVISAR} weakest contents: {previsao['nota_potencial']}")
             objetivo = st.text_input("Specific objective:", placeholder="Ex: Pass in Medicine...")
         
         respostas = {'tempo': tempo, 'disciplinas': disciplinas, 'nota': nota, 'objetivo': objetivo}
@@ -1059,12 +988,432 @@ def exibir_aba_plano_estudos(aluno_data):
             st.metric("🎯 Contents", conteudos_totais)
     
     elif status == 'criando':
-        coletar_respostas_questionario(aluno_data['nome'])
+        previsao = previsao_aluno(carregar_predicoes_versao(versao_dados(), versao_dados(CAMINHO_PREDICOES)), aluno_data['ra'])
+        coletar_respostas_questionario(aluno_data['nome'], previsao)
     
     elif status == 'criado':
         exibir_plano_estudos_gerado(aluno_data)
 
 
+# =============================================================================
+# QUESTION PANELS
+# =============================================================================
+
+@fragmento
+def exibir_painel_questao(disciplina_codigo, disciplina, numero_questao, conteudo, url_pdf, unique_id):
+    """Professor FABI panel of one question, built only when opened (fragment)"""
+    if not st.toggle("👩‍🏫 Open Professor FABI", key=f"painel_aberto_{unique_id}"):
+        return
+    
+    taxa_turma = carregar_view_itens(versao_dados()).taxa_acerto(
+        disciplina_codigo, numero_questao, st.session_state.aluno_data['turma'])
+    if taxa_turma is not None:
+        st.caption(f"📊 {taxa_turma:.0%} of your class got this question right")
+    
+    exibir_explicacao_pronta(disciplina_codigo, numero_questao)
+    
+    # AI Professor section for this question
+    exibir_interface_professor_ia(
+        numero_questao=numero_questao,
+        disciplina=disciplina,
+        url_pdf=url_pdf,
+        conteudo=conteudo,
+        unique_id=unique_id
+    )
+
+# =============================================================================
+# LU CHAT
+# =============================================================================
+
+@fragmento
+def exibir_chat_lu(aluno_data):
+    """LU chat (fragment: sending a message reruns only the chat)"""
+    
+    # Initialize chat history
+    if "lu_messages" not in st.session_state:
+        st.session_state.lu_messages = [
+            {
+                "role": "assistant", 
+                "content": f"Hello {aluno_data['nome'].split()[0]}! 👋 I'm LU, your intelligent tutor. \n\nI see you're working hard - you got {aluno_data['acertos_port']} Portuguese questions and {aluno_data['acertos_mat']} Mathematics questions correct.\n\n💡 **Tip:** Use **Professor FABI** (Questions tab) for specific doubts about questions. I can help you with:\n• Study strategies\n• Motivation and organization\n• General conceptual doubts\n• Study planning\n\nWhat would you like to chat about today? 💫"
+            }
+        ]
+    
+    # Conversation memory: rolling summary + bounded window of raw messages
+    if "lu_memoria" not in st.session_state:
+        st.session_state.lu_memoria = MemoriaConversa(st.session_state.lu_messages)
+        st.session_state.lu_messages = st.session_state.lu_memoria.mensagens
+    memoria_lu = st.session_state.lu_memoria
+    memoria_lu.aplicar_resumo_pronto()
+    
+    # Chat container
+    chat_container = st.container()
+    with chat_container:
+        if memoria_lu.mensagens_resumidas:
+            with st.expander(f"🗂️ {memoria_lu.mensagens_resumidas} earlier messages summarized"):
+                st.markdown(memoria_lu.resumo or "_Summary being prepared..._")
+        
+        # Show chat history
+        for idx, message in enumerate(memoria_lu.mensagens):
+            if message["role"] == "user":
+                st.markdown(f'<div class="user-message">{message["content"]}</div>', unsafe_allow_html=True)
+            else:
+                st.markdown('''
+                <div class="lu-message">
+                    <div class="lu-avatar">
+                        <div class="lu-avatar-img">LU</div>
+                        <span class="lu-name">LU - Intelligent Tutor</span>
+                    </div>
+                ''', unsafe_allow_html=True)
+                st.markdown(message["content"])
+                st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Chat input
+    if prompt := st.chat_input("Type your message to LU...", key="lu_chat_input"):
+        # Add user message
+        memoria_lu.adicionar("user", prompt)
+        
+        # Show thinking image while thinking
+        st.markdown('''
+        <div style="text-align: center; padding: 20px;">
+            <p style="color: #666; font-size: 0.9em;">LU is thinking about your question...</p>
+        </div>
+        ''', unsafe_allow_html=True)
+        exibir_imagem(st, 'lu_duvida.png', width=200)
+        
+        # Simple response (could be expanded with AI)
+        resumidor_lu = resumidor_local
+        if OPENAI_AVAILABLE:
+            medicao = Medicao(RECURSO_LU, '', obter_sessao_id(), "gpt-4o-mini")
+            try:
+                from openai import OpenAI
+                
+                # Get API key
+                api_key = None
+                if 'openai_api_key' in st.session_state and st.session_state.openai_api_key:
+                    api_key = st.session_state.openai_api_key
+                elif 'OPENAI_API_KEY' in st.secrets:
+                    api_key = st.secrets['OPENAI_API_KEY']
+                else:
+                    api_key = os.getenv('OPENAI_API_KEY')
+                
+                if not api_key:
+                    raise Exception("API key not available")
+                
+                client = OpenAI(api_key=api_key)
+                resumidor_lu = criar_resumidor_openai(client, st.session_state.get('ra_input') or 'anonimo', obter_sessao_id())
+                
+                response = chamar_openai_com_prazo(RECURSO_LU, client, medicao,
+                    model="gpt-4o-mini",
+                    messages=memoria_lu.mensagens_para_prompt(
+                        prompt_sistema_lu(aluno_data['nome'], aluno_data['acertos_port'], aluno_data['acertos_mat']),
+                        contexto=buscar_material_lu(prompt)
+                    ),
+                    temperature=0.8,
+                    max_tokens=400
+                )
+                medicao.registrar_resposta(response)
+                
+                resposta = response.choices[0].message.content.strip()
+            except Exception as e:
+                medicao.usar_fallback(e)
+                resposta = f"Hello {aluno_data['nome'].split()[0]}! I understand your question about '{prompt[:30]}...'. As tutor LU, I recommend focusing on contents where you have more difficulty and using AI Professor for specific questions. Can I help you with something else?"
+            finally:
+                obter_telemetria().registrar(medicao.como_registro())
+        else:
+            resposta = f"Hello {aluno_data['nome'].split()[0]}! I'm currently in basic mode. For more intelligent conversations, configure OpenAI. Meanwhile, remember to review the questions you got wrong and use the available study resources!"
+        
+        # Add answer to history
+        memoria_lu.adicionar("assistant", resposta, resumidor_lu)
+        
+        # 🎮 Update gamification score for LU interaction
+        atualizar_pontuacao('interacao_lu', st=st)
+        
+        # Show idea image after getting answer
+        st.markdown('''
+        <div style="text-align: center; padding: 20px;">
+            <p style="color: #666; font-size: 0.9em;">LU had an idea! ✨</p>
+        </div>
+        ''', unsafe_allow_html=True)
+        exibir_imagem(st, 'lu_ideia.png', width=200)
+        
+        # Show answer IMMEDIATELY (without depending on rerun)
+        st.markdown("---")
+        st.markdown("### 💬 LU's Answer")
+        st.markdown(resposta)
+        
+        # Script to scroll to end of chat
+        st.markdown('''
+        <script>
+        setTimeout(() => {
+            window.scrollTo(0, document.body.scrollHeight);
+        }, 100);
+        </script>
+        ''', unsafe_allow_html=True)
+
+# =============================================================================
+# LOCAL RETRIEVAL INDEX FOR LU
+# =============================================================================
+
+@st.cache_resource(max_entries=1)
+def carregar_indice_materiais(versao):
+    """Loads BM25 index over question materials and refreshes the catalog part (once per dataset version)"""
+    indice = carregar_indice()
+    df = carregar_dados_versao(versao)
+    if df is not False and not df.empty:
+        if indexar_catalogo(indice, catalogo_questoes(df)):
+            salvar_indice(indice)
+    return indice
+
+def buscar_material_lu(pergunta, k=3):
+    """Returns grounding context with the most relevant official material passages"""
+    try:
+        return contexto_material(carregar_indice_materiais(versao_dados()), pergunta, k=k)
+    except Exception as e:
+        print(f"❌ Error searching materials index: {e}")
+        return None
+
+# =============================================================================
+# TUTOR TELEMETRY (ADMIN)
+# =============================================================================
+
+def exibir_painel_telemetria():
+    """Admin panel summarizing tutor call telemetry (open the app with ?admin=1, password APP_SENHA_ADMIN)"""
+    with st.expander("📈 Tutor Telemetry (admin)"):
+        registros = ler_registros()
+        if not registros:
+            st.info("No tutor calls recorded yet.")
+            return
+        
+        resumo_recursos = resumir(registros)
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("📨 Requests", len(registros))
+        with col2:
+            st.metric("⏱️ Worst p95", f"{max(r['p95_ms'] for r in resumo_recursos):.0f} ms")
+        with col3:
+            st.metric("💲 Estimated cost", f"${sum(r['custo_usd'] for r in resumo_recursos):.4f}")
+        with col4:
+            st.metric("🛟 Fallbacks", sum(r['fallbacks'] for r in resumo_recursos))
+        
+        st.markdown("#### By feature")
+        st.dataframe(pd.DataFrame(resumo_recursos), use_container_width=True, hide_index=True)
+        
+        st.markdown("#### By subject")
+        st.dataframe(pd.DataFrame(resumir(registros, 'disciplina')), use_container_width=True, hide_index=True)
+        
+        st.markdown("#### Deadlines, hedging and circuit breakers (this process)")
+        st.dataframe(pd.DataFrame(metricas_resiliencia()), use_container_width=True, hide_index=True)
+        
+        st.markdown("#### Session bootstrap (full rebuild vs reused rerun)")
+        st.dataframe(pd.DataFrame(estatisticas_bootstrap()), use_container_width=True, hide_index=True)
+        
+        st.markdown("#### Figure cache (this process)")
+        st.dataframe(pd.DataFrame(relatorio_cache_figuras()), use_container_width=True, hide_index=True)
+        
+        st.markdown("#### Static assets (CSS bytes sent per rerun, image delivery)")
+        st.json(relatorio_assets())
+        
+        st.markdown("#### Cold start (run with APP_PERFIL_INICIO=1 for per-module import times)")
+        st.json(relatorio_inicio())
+        
+        st.markdown("#### Session memory (bytes per session)")
+        registrar_sessao(obter_sessao_id(), st.session_state, forcar=True)
+        st.json(relatorio_memoria_sessoes())
+        st.json(relatorio_orcamento(st))
+        st.dataframe(pd.DataFrame(perfil_sessao(st.session_state)), use_container_width=True, hide_index=True)
+        
+        st.markdown("#### Gamification store (write-behind)")
+        st.json(obter_armazem().metricas())
+        st.json(obter_registro_eventos().metricas())
+        
+        st.markdown("#### Sessions with highest cost")
+        sessoes = pd.DataFrame(resumir(registros, 'sessao'))
+        st.dataframe(sessoes.nlargest(10, 'custo_usd'), use_container_width=True, hide_index=True)
+
+# =============================================================================
+# PRECOMPUTED QUESTION EXPLANATIONS
+# =============================================================================
+
+@st.cache_data(max_entries=2)
+def carregar_explicacoes_versao(versao):
+    """Loads batch-generated question explanations once per file version (see questions_analysis.precompute)"""
+    try:
+        return carregar_explicacoes()
+    except Exception as e:
+        print(f"❌ Error loading precomputed explanations: {e}")
+        return {}
+
+def carregar_explicacoes_questoes():
+    """Precomputed explanations; re-running precompute is picked up on the next rerun (mtime + size)"""
+    return carregar_explicacoes_versao(versao_dados(CAMINHO_EXPLICACOES))
+
+def exibir_explicacao_pronta(disciplina, numero_questao):
+    """Shows the precomputed initial analysis of a question, if available"""
+    explicacao = obter_explicacao(carregar_explicacoes_questoes(), disciplina, numero_questao)
+    if explicacao:
+        st.markdown("#### 🔍 Initial Analysis")
+        st.markdown(explicacao)
+
+
+# =============================================================================
+# SESSION BOOTSTRAP
+# =============================================================================
+
+@st.cache_resource(max_entries=1)
+def carregar_dados_versao(versao):
+    """Loads dataset once per version, shared by all sessions (no per-session copy)
+
+    Every per-version cache keeps only the current version (max_entries=1), so a
+    rewritten CSV replaces the old DataFrame and its derived structures instead of
+    piling up for the life of the process.
+    """
+    return load_data(pd, st)
+
+@st.cache_resource(max_entries=1)
+def preparar_placar(versao):
+    """Leaderboard with every student of the dataset version (classes and names)"""
+    placar = obter_placar()
+    df = carregar_dados_versao(versao)
+    if df is not False and not df.empty:
+        placar.sincronizar_alunos(df, obter_armazem().todos())
+    return placar
+
+@st.cache_resource(max_entries=1)
+def carregar_view_itens_versao(versao, versao_view):
+    """Stored item-analysis view; a stale one starts a background refresh and is shown until it lands"""
+    view = carregar_view(pd)
+    if view.versao != versao:
+        atualizar_em_segundo_plano()
+    return view
+
+def carregar_view_itens(versao):
+    """Item-analysis view of the dataset version (the refreshed file is picked up by the next rerun)"""
+    return carregar_view_itens_versao(versao, versao_dados(CAMINHO_VIEW_ITENS))
+
+@st.cache_resource(max_entries=1)
+def carregar_irt(versao, versao_calibracao):
+    """Stored IRT calibration of the dataset version ({} while it is missing or stale)
+
+    Never calibrates in the rerun: a stale file starts one background recalibration,
+    and the new file (new versao_calibracao) is picked up by the next rerun.
+    """
+    calibracoes, versao_salva = carregar_calibracoes()
+    if versao_salva == versao:
+        return calibracoes
+    recalibrar_em_segundo_plano()
+    return {}
+
+@st.cache_resource(max_entries=1)
+def carregar_indice_similares(versao):
+    """Wrong-answer bitsets of every student, built once per dataset version"""
+    df = carregar_dados_versao(versao)
+    if df is False or df.empty:
+        return None
+    import numpy as np
+    return construir_indice(df, np)
+
+@st.cache_resource(max_entries=1)
+def carregar_predicoes_versao(versao, versao_predicoes):
+    """Stored batch predictions of the dataset version (None while missing or stale)
+
+    Never scores in the rerun: a stale file starts one background scoring, picked
+    up by the next rerun through versao_predicoes.
+    """
+    predicoes, versao_salva = carregar_predicoes()
+    if versao_salva == versao:
+        return predicoes
+    pontuar_em_segundo_plano()
+    return None
+
+@st.cache_resource(max_entries=1)
+def carregar_cubo_turmas_versao(versao, versao_cubo):
+    """Stored teacher cube; a stale one starts a background refresh and is shown until it lands"""
+    cubo = carregar_cubo(pd)
+    if cubo.versao != versao:
+        atualizar_em_segundo_plano()
+    return cubo
+
+def carregar_cubo_turmas(versao):
+    """Teacher cube of the dataset version (the refreshed file is picked up by the next rerun)"""
+    return carregar_cubo_turmas_versao(versao, versao_dados(CAMINHO_CUBO))
+
+def iniciar_gamificacao_aluno(aluno_data):
+    """Runs once per session bootstrap: gamification, achievements and daily bonus"""
+    inicializar_sistema_gamificacao(st, aluno_data['ra'])
+    verificar_conquistas(aluno_data, st)
+    
+    # 🎮 Daily access bonus (and streak)
+    registrar_acesso_diario(st)
+
+
+# =============================================================================
+# TEACHER MODE
+# =============================================================================
+
+def exibir_modo_professor():
+    """Class and school analytics for teachers (open the app with ?professor=1)"""
+    import plotly.express as px
+    
+    st.markdown('''
+    <div class="main-card">
+        <h2>👩‍🏫 Teacher Mode</h2>
+        <p>Error rates and score distributions of the whole school or selected classes</p>
+    </div>
+    ''', unsafe_allow_html=True)
+    
+    versao = versao_dados()
+    cubo = carregar_cubo_turmas(versao)
+    if cubo.celulas is None:
+        if cubo.versao != versao:
+            st.info("⏳ The class results are being aggregated in the background. Reload in a moment.")
+        else:
+            st.warning("⚠️ No results available")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        disciplina = st.selectbox("Subject:", ["All"] + cubo.valores('Disciplina'), key="prof_disciplina")
+    with col2:
+        turmas = st.multiselect("Classes:", cubo.valores('Série'), key="prof_turmas")
+    with col3:
+        por = st.multiselect("Group by:", list(DIMENSOES), default=['Conteúdo', 'Descritor', 'Série'], key="prof_por")
+    
+    filtros = {}
+    if disciplina != "All":
+        filtros['Disciplina'] = disciplina
+    if turmas:
+        filtros['Série'] = turmas
+    conteudos = st.multiselect("Contents:", cubo.valores('Conteúdo', filtros), key="prof_conteudos")
+    if conteudos:
+        filtros['Conteúdo'] = conteudos
+    
+    # Error rates (roll-up of the pre-aggregated cells)
+    st.markdown("### 📊 Error Rates")
+    if por:
+        tabela = cubo.fatiar(por, filtros)
+        st.dataframe(
+            tabela.rename(columns={'n': 'Answers', 'acertos': 'Correct', 'taxa_erro': 'Error rate'}),
+            hide_index=True, use_container_width=True
+        )
+    else:
+        st.info("Choose at least one dimension to group by")
+    
+    # Score distributions (one class selected -> that class, otherwise the school)
+    escopo = turmas[0] if len(turmas) == 1 else ESCOPO_ESCOLA
+    st.markdown(f"### 📈 Score Distribution - {'Class ' + escopo if escopo != ESCOPO_ESCOLA else 'School'}")
+    disciplinas = [disciplina] if disciplina != "All" else ['PORT', 'MAT']
+    colunas = st.columns(len(disciplinas))
+    for coluna, codigo in zip(colunas, disciplinas):
+        with coluna:
+            contagens = cubo.distribuicao.contagens(codigo, escopo)
+            resumo = cubo.distribuicao.resumo(codigo, escopo)
+            st.markdown(f"**{codigo}** - {resumo['n']} students, mean {resumo['media']} ± {resumo['desvio']}")
+            if contagens:
+                fig = px.bar(x=list(range(len(contagens))), y=contagens,
+                             labels={'x': 'Correct answers', 'y': 'Students'})
+                st.plotly_chart(fig, use_container_width=True)
+
+
 # =============================================================================
 # MAIN INTERFACE
 # =============================================================================
@@ -1105,6 +1454,14 @@ with st.expander("⚙️ OpenAI Configuration (Required for AI Professor)"):
     
     if 'openai_api_key' in st.session_state:
         st.success(f"✅ Key configured: {st.session_state.openai_api_key[:10]}...")
+    
+    # Shared tutor scheduler status
+    metricas_agendador = obter_agendador().metricas()
+    st.caption(
+        f"🚦 Tutor queue: {metricas_agendador['profundidade_fila']} waiting | "
+        f"{metricas_agendador['em_execucao']} running | "
+        f"wait p50 {metricas_agendador['espera_p50_ms']} ms, p95 {metricas_agendador['espera_p95_ms']} ms"
+    )
 
 # OpenAI Status
 if OPENAI_AVAILABLE:
@@ -1112,6 +1469,15 @@ if OPENAI_AVAILABLE:
 else:
     st.warning(f"🔒 OpenAI: {OPENAI_STATUS} - Configure to activate AI Professor")
 
+if st.query_params.get('admin') == '1' and acesso_autorizado(st, SEGREDO_ADMIN, "Admin panel"):
+    exibir_painel_telemetria()
+
+if st.query_params.get('professor') == '1':
+    # Class-wide data: only after the teacher password (never falls through to the student view)
+    if acesso_autorizado(st, SEGREDO_PROFESSOR, "Teacher mode"):
+        exibir_modo_professor()
+    st.stop()
+
 # Student ID input
 st.markdown('''
 <div class="ra-input-container">
@@ -1121,86 +1487,38 @@ st.markdown('''
 ''', unsafe_allow_html=True)
 
 ra_input = st.text_input("**Student ID:**", placeholder="Ex: 123456789", key="ra_input", label_visibility="collapsed")
+marcar_primeira_renderizacao()
 
 # Process ID
 if ra_input:
     try:
-        df = load_data(pd, st)
-        if df.empty:
-            st.error("❌ Data file not found or empty")
-        else:
-            ra_input = int(ra_input)
-            aluno_data = df[df['RA'] == ra_input]
+        ra_input = int(ra_input)
+        versao = versao_dados()
+        aluno_data = obter_aluno_sessao(
+            st, ra_input, lambda: carregar_dados_versao(versao),
+            versao=versao, ao_construir=iniciar_gamificacao_aluno
+        )
+        
+        if aluno_data is not None:
+            # Personalized welcome message
+            st.markdown(f'''
+            <div class="main-card" style="background: linear-gradient(135deg, #667eea, #764ba2); color: white; text-align: center;">
+                <h2 style="color: white;">👋 Hello, {aluno_data['nome']}!</h2>
+                <p style="color: white; font-size: 1.1em;">Good to see you here!</p>
+                <hr style="border-color: rgba(255,255,255,0.3);">
+                <p style="color: white;">📊 <strong>Your current performance:</strong></p>
+                <p style="color: white; font-size: 1.2em;">📚 Portuguese: {aluno_data['acertos_port']}/18 | 🧮 Mathematics: {aluno_data['acertos_mat']}/18</p>
+                <p style="color: white; margin-top: 15px;">✨ Explore the tabs below to learn with AI Professor and chat with Tutor LU!</p>
+            </div>
+            ''', unsafe_allow_html=True)
             
-            if not aluno_data.empty:
-                aluno_nome = aluno_data['Nome'].iloc[0]
-                
-                # Student data
-                port_data = aluno_data[aluno_data['Disciplina'] == 'PORT']
-                mat_data = aluno_data[aluno_data['Disciplina'] == 'MAT']
-                
-                # Calculate metrics
-                acertos_port = port_data['acerto'].sum() if not port_data.empty else 0
-                acertos_mat = mat_data['acerto'].sum() if not mat_data.empty else 0
-                erros_port = port_data['erro'].sum() if not port_data.empty else 0
-                erros_mat = mat_data['erro'].sum() if not mat_data.empty else 0
-                
-                # Error DataFrames
-                erros_port_df = port_data[port_data['erro'] == 1] if not port_data.empty else pd.DataFrame()
-                erros_mat_df = mat_data[mat_data['erro'] == 1] if not mat_data.empty else pd.DataFrame()
-                
-                # Student context for LU
-                contexto_aluno = {
-                    'port_erros': erros_port_df['questao_numero'].tolist() if not erros_port_df.empty else [],
-                    'mat_erros': erros_mat_df['questao_numero'].tolist() if not erros_mat_df.empty else [],
-                    'conteudos_port': erros_port_df['Conteúdo'].unique().tolist() if not erros_port_df.empty else [],
-                    'conteudos_mat': erros_mat_df['Conteúdo'].unique().tolist() if not erros_mat_df.empty else [],
-                    'acertos_port': acertos_port,
-                    'acertos_mat': acertos_mat,
-                    'erros_port': erros_port,
-                    'erros_mat': erros_mat,
-                    'nome': aluno_nome
-                }
-                
-                # Store data in session
-                st.session_state.aluno_data = {
-                    'nome': aluno_nome,
-                    'acertos_port': acertos_port,
-                    'acertos_mat': acertos_mat,
-                    'erros_port': erros_port,
-                    'erros_mat': erros_mat,
-                    'erros_port_df': erros_port_df,
-                    'erros_mat_df': erros_mat_df,
-                    'contexto_aluno': contexto_aluno
-                }
-                
-                # Initialize gamification
-                inicializar_sistema_gamificacao(st)
-                verificar_conquistas(st.session_state.aluno_data, st)
-                
-                # 🎮 Daily access bonus
-                hoje = datetime.now().strftime("%Y-%m-%d")
-                if st.session_state.gamificacao.get('ultimo_acesso') != hoje:
-                    atualizar_pontuacao('acesso_diario', st=st)
-                    st.session_state.gamificacao['ultimo_acesso'] = hoje
-                
-                # Personalized welcome message
-                st.markdown(f'''
-                <div class="main-card" style="background: linear-gradient(135deg, #667eea, #764ba2); color: white; text-align: center;">
-                    <h2 style="color: white;">👋 Hello, {aluno_nome}!</h2>
-                    <p style="color: white; font-size: 1.1em;">Good to see you here!</p>
-                    <hr style="border-color: rgba(255,255,255,0.3);">
-                    <p style="color: white;">📊 <strong>Your current performance:</strong></p>
-                    <p style="color: white; font-size: 1.2em;">📚 Portuguese: {acertos_port}/18 | 🧮 Mathematics: {acertos_mat}/18</p>
-                    <p style="color: white; margin-top: 15px;">✨ Explore the tabs below to learn with AI Professor and chat with Tutor LU!</p>
-                </div>
-                ''', unsafe_allow_html=True)
-                
-            else:
-                st.error("❌ Student ID not found. Check the number and try again.")
-                if 'aluno_data' in st.session_state:
-                    del st.session_state.aluno_data
+        else:
+            st.error("❌ Student ID not found. Check the number and try again.")
+            if 'aluno_data' in st.session_state:
+                del st.session_state.aluno_data
                 
+    except DadosIndisponiveis:
+        st.error("❌ Data file not found or empty")
     except ValueError:
         st.error("❌ Please enter a valid student ID (numbers only).")
         if 'aluno_data' in st.session_state:
@@ -1234,6 +1552,10 @@ if 'aluno_data' in st.session_state:
     tabs_list = [tab1, tab2, tab3, tab4]
     
     with tab1:
+        # Plotly is only needed once a student is on the dashboard
+        import plotly.express as px
+        import plotly.graph_objects as go
+        
         st.markdown('''
         <div class="main-card">
             <h2>📊 Performance Dashboard</h2>
@@ -1245,9 +1567,19 @@ if 'aluno_data' in st.session_state:
         st.markdown("### 🎮 Your Progression")
         exibir_widget_gamificacao(st)
         
+        # 🏅 Class and school ranking
+        exibir_placar(st, preparar_placar(versao_dados()), st.session_state.get('gamificacao_ra'))
+        
         st.divider()
         
-        # Main metrics
+        # Main metrics (compared with the student's class; histograms kept in the teacher cube)
+        distribuicao = carregar_cubo_turmas(versao_dados()).distribuicao
+        comp_port = distribuicao.comparar('PORT', aluno_data['acertos_port'], aluno_data['turma'])
+        comp_mat = distribuicao.comparar('MAT', aluno_data['acertos_mat'], aluno_data['turma'])
+        # No distribution yet (empty dataset): no percentile to show
+        rotulo_port = f" · P{comp_port['percentil']:.0f}" if comp_port['percentil'] is not None else ""
+        rotulo_mat = f" · P{comp_mat['percentil']:.0f}" if comp_mat['percentil'] is not None else ""
+        
         st.markdown("### 📈 Academic Performance")
         col_met1, col_met2, col_met3, col_met4 = st.columns(4)
         
@@ -1256,7 +1588,7 @@ if 'aluno_data' in st.session_state:
             <div class="metric-card">
                 <h4>📚 Portuguese</h4>
                 <h2>{aluno_data['acertos_port']}/18</h2>
-                <p>{aluno_data['acertos_port'] - 9} vs average</p>
+                <p>{comp_port['diferenca']:+} vs class average{rotulo_port}</p>
             </div>
             ''', unsafe_allow_html=True)
         
@@ -1265,7 +1597,7 @@ if 'aluno_data' in st.session_state:
             <div class="metric-card">
                 <h4>🧮 Mathematics</h4>
                 <h2>{aluno_data['acertos_mat']}/18</h2>
-                <p>{aluno_data['acertos_mat'] - 11} vs average</p>
+                <p>{comp_mat['diferenca']:+} vs class average{rotulo_mat}</p>
             </div>
             ''', unsafe_allow_html=True)
         
@@ -1287,6 +1619,16 @@ if 'aluno_data' in st.session_state:
             </div>
             ''', unsafe_allow_html=True)
         
+        # IRT ability: harder questions weigh more than in the raw hit count
+        calibracoes = carregar_irt(versao_dados(), versao_dados(CAMINHO_IRT))
+        habilidades = [
+            f"{nome} θ = {calibracoes[codigo].habilidade(aluno_data['ra']):+.2f}"
+            for codigo, nome in (('PORT', "Portuguese"), ('MAT', "Mathematics"))
+            if codigo in calibracoes and calibracoes[codigo].habilidade(aluno_data['ra']) is not None
+        ]
+        if habilidades:
+            st.caption("📐 IRT ability (0 = school average): " + " · ".join(habilidades))
+        
         # GAUGE CHARTS
         st.markdown('''
         <div class="main-card">
@@ -1298,7 +1640,7 @@ if 'aluno_data' in st.session_state:
         col_vel1, col_vel2 = st.columns(2)
         
         with col_vel1:
-            fig_vel_port = criar_grafico_velocimetro(
+            fig_vel_port = grafico_velocimetro_cache(
                 aluno_data['acertos_port'], 
                 "Portuguese", 
                 "#10b981", 
@@ -1307,7 +1649,7 @@ if 'aluno_data' in st.session_state:
             st.plotly_chart(fig_vel_port, use_container_width=True)
         
         with col_vel2:
-            fig_vel_mat = criar_grafico_velocimetro(
+            fig_vel_mat = grafico_velocimetro_cache(
                 aluno_data['acertos_mat'], 
                 "Mathematics", 
                 "#3b82f6",
@@ -1316,11 +1658,12 @@ if 'aluno_data' in st.session_state:
             st.plotly_chart(fig_vel_mat, use_container_width=True)
         
         # Priority contents chart
-        fig_conteudos = criar_grafico_conteudos_prioritarios(
+        fig_conteudos = grafico_conteudos_prioritarios_cache(
             aluno_data['erros_port_df'], 
             aluno_data['erros_mat_df'],
             px,
-            pd
+            pd,
+            go
         )
         
         if fig_conteudos:
@@ -1330,6 +1673,47 @@ if 'aluno_data' in st.session_state:
             </div>
             ''', unsafe_allow_html=True)
             st.plotly_chart(fig_conteudos, use_container_width=True)
+            
+            # Class context of the student's weak contents (slice of the teacher cube, no groupby per rerun)
+            cubo = carregar_cubo_turmas(versao_dados())
+            if cubo.celulas is not None:
+                conteudos_aluno = pd.concat([
+                    aluno_data['erros_port_df'][['Disciplina', 'Conteúdo']],
+                    aluno_data['erros_mat_df'][['Disciplina', 'Conteúdo']]
+                ]).drop_duplicates()
+                filtros = {'Série': str(aluno_data['turma'])} if aluno_data['turma'] is not None else None
+                contexto_turma = cubo.fatiar(['Disciplina', 'Conteúdo'], filtros)[
+                    ['Disciplina', 'Conteúdo', 'n', 'taxa_erro']].merge(conteudos_aluno, on=['Disciplina', 'Conteúdo'])
+                if not contexto_turma.empty:
+                    st.caption("Class error rate in the contents you missed")
+                    st.dataframe(
+                        contexto_turma.sort_values('taxa_erro', ascending=False)
+                        .rename(columns={'n': 'Answers', 'taxa_erro': 'Class error rate'}),
+                        hide_index=True, use_container_width=True
+                    )
+        
+        # 👥 Students with the most similar wrong answers (bitset index, no per-rerun groupby)
+        indice_similares = carregar_indice_similares(versao_dados())
+        comparacao = indice_similares.comparar_com_vizinhos(aluno_data['ra']) if indice_similares is not None else []
+        if comparacao:
+            st.markdown('''
+            <div class="main-card">
+                <h3>👥 Students Like You</h3>
+                <p>The students whose wrong answers are most similar to yours</p>
+            </div>
+            ''', unsafe_allow_html=True)
+            st.dataframe(
+                pd.DataFrame(comparacao).rename(columns={
+                    'disciplina': 'Subject', 'questao_numero': 'Question', 'conteudo': 'Content',
+                    'tambem_erraram': 'Also missed it', 'acertaram': 'Got it right'
+                }),
+                hide_index=True, use_container_width=True
+            )
+            st.caption("Questions most of them got right are the ones they already overcame - start there.")
+            compartilhados = conteudos_compartilhados(comparacao)
+            if compartilhados:
+                st.info("🤝 Weak spots you share with them (good topics for a study group): " + ", ".join(
+                    f"{item['disciplina']} · {item['conteudo']} ({item['tambem_erraram']:.0%})" for item in compartilhados))
     
     with tab2:
         # JavaScript to keep tab selected after rerun
@@ -1403,14 +1787,8 @@ if 'aluno_data' in st.session_state:
                         </div>
                         ''', unsafe_allow_html=True)
                                                 
-                        # AI Professor section for this question
-                        exibir_interface_professor_ia(
-                            numero_questao=numero_questao,
-                            disciplina="Portuguese",
-                            url_pdf=url_pdf,
-                            conteudo=conteudo,
-                            unique_id=f"port_{idx}"
-                        )
+                        # Professor FABI panel: built lazily and reruns on its own
+                        exibir_painel_questao('PORT', "Portuguese", numero_questao, conteudo, url_pdf, f"port_{idx}")
             else:
                 st.success("🎉 Congratulations! You got all Portuguese questions correct!")
         
@@ -1437,14 +1815,8 @@ if 'aluno_data' in st.session_state:
                         </div>
                         ''', unsafe_allow_html=True)
                         
-                        # AI Professor section for this question
-                        exibir_interface_professor_ia(
-                            numero_questao=numero_questao,
-                            disciplina="Mathematics",
-                            url_pdf=url_pdf,
-                            conteudo=conteudo,
-                            unique_id=f"mat_{idx}"
-                        )
+                        # Professor FABI panel: built lazily and reruns on its own
+                        exibir_painel_questao('MAT', "Mathematics", numero_questao, conteudo, url_pdf, f"mat_{idx}")
             else:
                 st.success("🎉 Congratulations! You got all Mathematics questions correct!")
     
@@ -1470,129 +1842,7 @@ if 'aluno_data' in st.session_state:
         else:
             st.info("📚 LU is in basic mode. Configure OpenAI for more intelligent conversations!")
         
-        # Initialize chat history
-        if "lu_messages" not in st.session_state:
-            st.session_state.lu_messages = [
-                {
-                    "role": "assistant", 
-                    "content": f"Hello {aluno_data['nome'].split()[0]}! 👋 I'm LU, your intelligent tutor. \n\nI see you're working hard - you got {aluno_data['acertos_port']} Portuguese questions and {aluno_data['acertos_mat']} Mathematics questions correct.\n\n💡 **Tip:** Use **Professor FABI** (Questions tab) for specific doubts about questions. I can help you with:\n• Study strategies\n• Motivation and organization\n• General conceptual doubts\n• Study planning\n\nWhat would you like to chat about today? 💫"
-                }
-            ]
-        
-        # Chat container
-        chat_container = st.container()
-        with chat_container:
-            # Show chat history
-            for idx, message in enumerate(st.session_state.lu_messages):
-                if message["role"] == "user":
-                    st.markdown(f'<div class="user-message">{message["content"]}</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown('''
-                    <div class="lu-message">
-                        <div class="lu-avatar">
-                            <div class="lu-avatar-img">LU</div>
-                            <span class="lu-name">LU - Intelligent Tutor</span>
-                        </div>
-                    ''', unsafe_allow_html=True)
-                    st.markdown(message["content"])
-                    st.markdown('</div>', unsafe_allow_html=True)
-        
-        # Chat input
-        if prompt := st.chat_input("Type your message to LU...", key="lu_chat_input"):
-            # Add user message
-            st.session_state.lu_messages.append({"role": "user", "content": prompt})
-            
-            # Show thinking image while thinking
-            st.markdown('''
-            <div style="text-align: center; padding: 20px;">
-                <p style="color: #666; font-size: 0.9em;">LU is thinking about your question...</p>
-            </div>
-            ''', unsafe_allow_html=True)
-            st.image('/Users/mac/IronHacks/W9/Final Project 4/app/static/lu_duvida.png', width=200)
-            
-            # Simple response (could be expanded with AI)
-            if OPENAI_AVAILABLE:
-                try:
-                    from openai import OpenAI
-                    
-                    # Get API key
-                    api_key = None
-                    if 'openai_api_key' in st.session_state and st.session_state.openai_api_key:
-                        api_key = st.session_state.openai_api_key
-                    elif 'OPENAI_API_KEY' in st.secrets:
-                        api_key = st.secrets['OPENAI_API_KEY']
-                    else:
-                        api_key = os.getenv('OPENAI_API_KEY')
-                    
-                    if not api_key:
-                        raise Exception("API key not available")
-                    
-                    client = OpenAI(api_key=api_key)
-                    
-                    response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[
-                            {"role": "system", "content": f"""You are LU, an intelligent and empathetic tutor. The student {aluno_data['nome']} has {aluno_data['acertos_port']} correct in Portuguese and {aluno_data['acertos_mat']} in Mathematics. 
-
-CHARACTERISTICS:
-- Be helpful, encouraging and motivating
-- Respect the student's level
-- Use clear and accessible language
-- Line breaks for better readability
-
-MATHEMATICS ANSWER FORMATTING:
-If the question involves mathematics:
-- Use UNICODE SYMBOLS: × ÷ ² ³ √ π ° ≈ ± ≤ ≥ α β γ θ
-- Never use [ ... ] for formulas
-- Examples: "Area = πr²", "Volume = (4/3)πr³", "x = 5 ± 2"
-- Use **bold** to highlight main formulas
-- Structure with:
-  * **Formula:** (use Unicode symbols)
-  * **Meaning:** (what each letter means)
-  * **Example:** (with real numbers)
-  * **Tip:** (to memorize or avoid mistakes)
-
-Be brief but complete in your answers."""},
-                            *[{"role": msg["role"], "content": msg["content"]} for msg in st.session_state.lu_messages[-6:]],
-                            {"role": "user", "content": prompt}
-                        ],
-                        temperature=0.8,
-                        max_tokens=400
-                    )
-                    
-                    resposta = response.choices[0].message.content.strip()
-                except:
-                    resposta = f"Hello {aluno_data['nome'].split()[0]}! I understand your question about '{prompt[:30]}...'. As tutor LU, I recommend focusing on contents where you have more difficulty and using AI Professor for specific questions. Can I help you with something else?"
-            else:
-                resposta = f"Hello {aluno_data['nome'].split()[0]}! I'm currently in basic mode. For more intelligent conversations, configure OpenAI. Meanwhile, remember to review the questions you got wrong and use the available study resources!"
-            
-            # Add answer to history
-            st.session_state.lu_messages.append({"role": "assistant", "content": resposta})
-            
-            # 🎮 Update gamification score for LU interaction
-            atualizar_pontuacao('interacao_lu', st=st)
-            
-            # Show idea image after getting answer
-            st.markdown('''
-            <div style="text-align: center; padding: 20px;">
-                <p style="color: #666; font-size: 0.9em;">LU had an idea! ✨</p>
-            </div>
-            ''', unsafe_allow_html=True)
-            st.image('/Users/mac/IronHacks/W9/Final Project 4/app/static/lu_ideia.png', width=200)
-            
-            # Show answer IMMEDIATELY (without depending on rerun)
-            st.markdown("---")
-            st.markdown("### 💬 LU's Answer")
-            st.markdown(resposta)
-            
-            # Script to scroll to end of chat
-            st.markdown('''
-            <script>
-            setTimeout(() => {
-                window.scrollTo(0, document.body.scrollHeight);
-            }, 100);
-            </script>
-            ''', unsafe_allow_html=True)
+        exibir_chat_lu(aluno_data)
     
     with tab4:
         exibir_aba_plano_estudos(aluno_data)
@@ -1626,6 +1876,10 @@ else:
     </div>
     ''', unsafe_allow_html=True)
 
+# Chat-history budget, then session memory sample (throttled per session)
+aplicar_orcamento(st, obter_sessao_id())
+registrar_sessao(obter_sessao_id(), st.session_state)
+
 # Footer
 st.markdown("---")
 st.markdown('''
@@ -0,0 +1,335 @@
+# =============================================================================
+# PERSISTENT GAMIFICATION STORE (SQLITE WAL + BATCHED WRITE-BEHIND)
+# =============================================================================
+#
+# State is loaded once per session; every change only enqueues a snapshot
+# (last write per student wins) that a background thread flushes in batches.
+# Snapshots stay visible to readers until their commit lands. A bad row is
+# dropped alone (row-by-row retry), and transient errors are retried a
+# bounded number of times with exponential back-off.
+#
+# Usage:
+#   python -m gamefic.armazem --sessoes 200 --eventos 50    # write-path benchmark
+
+import argparse
+import atexit
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from helpers.estatistica import percentil
+from helpers.loader import PASTA_DADOS
+
+CAMINHO_GAMIFICACAO = os.getenv('APP_GAMIFICACAO_DB', os.path.join(PASTA_DADOS, 'gamificacao.db'))
+
+# Flush at most every INTERVALO_FLUSH_S, or earlier when MAX_LOTE students are pending
+INTERVALO_FLUSH_S = 1.0
+MAX_LOTE = 500
+
+# Transient errors (locked, disk full, read-only): attempts per snapshot and longest back-off
+MAX_TENTATIVAS = 5
+ESPERA_MAXIMA_S = 30.0
+
+CAMPOS = ('pontos', 'nivel', 'streak_dias', 'ultimo_acesso', 'questoes_revisadas',
+          'metas_concluidas', 'perguntas_professor', 'dias_estudando')
+
+ESQUEMA = '''
+CREATE TABLE IF NOT EXISTS estado_aluno (
+    ra INTEGER PRIMARY KEY,
+    pontos INTEGER NOT NULL DEFAULT 0,
+    nivel INTEGER NOT NULL DEFAULT 1,
+    streak_dias INTEGER NOT NULL DEFAULT 0,
+    ultimo_acesso TEXT,
+    questoes_revisadas INTEGER NOT NULL DEFAULT 0,
+    metas_concluidas INTEGER NOT NULL DEFAULT 0,
+    perguntas_professor INTEGER NOT NULL DEFAULT 0,
+    dias_estudando INTEGER NOT NULL DEFAULT 0,
+    conquistas TEXT NOT NULL DEFAULT '[]',
+    atualizado_em REAL NOT NULL
+)
+'''
+
+SQL_UPSERT = f'''
+INSERT INTO estado_aluno (ra, {', '.join(CAMPOS)}, conquistas, atualizado_em)
+VALUES (?, {', '.join('?' for _ in CAMPOS)}, ?, ?)
+ON CONFLICT(ra) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in CAMPOS)},
+    conquistas = excluded.conquistas, atualizado_em = excluded.atualizado_em
+'''
+
+
+class ArmazemGamificacao:
+    """SQLite (WAL) store of per-student gamification state with write-behind batching"""
+
+    def __init__(self, caminho=CAMINHO_GAMIFICACAO, intervalo_flush=INTERVALO_FLUSH_S, max_lote=MAX_LOTE):
+        self.caminho = caminho
+        self.intervalo_flush = intervalo_flush
+        self.max_lote = max_lote
+        self._pendentes = {}    # ra -> linha
+        self._em_voo = {}       # ra -> linha taken by a flush whose commit has not landed yet
+        self._tentativas = {}   # ra -> failed attempts of its pending snapshot
+        self._falhas_seguidas = 0
+        self._cond = threading.Condition()
+        # One flush at a time, so batches commit in the order they were taken
+        self._gravando = threading.Lock()
+        self._local = threading.local()
+        self._ativo = True
+        # Called with (ra, estado) on every save (e.g. leaderboard)
+        self.ouvintes = []
+        self.contadores = {'enfileirados': 0, 'lotes': 0, 'linhas_gravadas': 0, 'tempo_flush_s': 0.0, 'erros': 0,
+                           'descartados': 0}
+
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        conexao = self._conexao()
+        conexao.execute('PRAGMA journal_mode=WAL')
+        conexao.execute(ESQUEMA)
+        conexao.commit()
+
+        self._escritor = threading.Thread(target=self._loop_escrita, name="gamificacao-escritor", daemon=True)
+        self._escritor.start()
+
+    def _conexao(self):
+        """One connection per thread (readers never wait for the writer in WAL mode)"""
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=30)
+            conexao.execute('PRAGMA synchronous=NORMAL')
+            self._local.conexao = conexao
+        return conexao
+
+    # ----- reads -----
+
+    def carregar(self, ra):
+        """Returns stored state of a student (pending and in-flight writes included) or None"""
+        with self._cond:
+            pendente = self._pendentes.get(ra, self._em_voo.get(ra))
+        if pendente is not None:
+            return self._linha_para_estado(pendente)
+
+        linha = self._conexao().execute(
+            f"SELECT ra, {', '.join(CAMPOS)}, conquistas, atualizado_em FROM estado_aluno WHERE ra = ?", (ra,)
+        ).fetchone()
+        return self._linha_para_estado(linha) if linha else None
+
+    def todos(self):
+        """(ra, pontos) of every stored student, pending and in-flight writes included"""
+        pontos = dict(self._conexao().execute("SELECT ra, pontos FROM estado_aluno").fetchall())
+        with self._cond:
+            pontos.update({ra: linha[1] for ra, linha in self._em_voo.items()})
+            pontos.update({ra: linha[1] for ra, linha in self._pendentes.items()})
+        return pontos
+
+    @staticmethod
+    def _linha_para_estado(linha):
+        estado = dict(zip(CAMPOS, linha[1:1 + len(CAMPOS)]))
+        estado['conquistas'] = json.loads(linha[1 + len(CAMPOS)])
+        return estado
+
+    # ----- writes -----
+
+    def salvar(self, ra, estado):
+        """Enqueues state snapshot of a student (never blocks on disk)"""
+        linha = (ra, *(estado.get(c) for c in CAMPOS),
+                 json.dumps(estado.get('conquistas', []), ensure_ascii=False), time.time())
+        with self._cond:
+            self._pendentes[ra] = linha
+            # A new snapshot gets its own attempts
+            self._tentativas.pop(ra, None)
+            self.contadores['enfileirados'] += 1
+            if len(self._pendentes) >= self.max_lote:
+                self._cond.notify()
+        for ouvinte in self.ouvintes:
+            try:
+                ouvinte(ra, estado)
+            except Exception as e:
+                print(f"❌ Error notifying gamification listener: {e}")
+
+    def _espera(self):
+        """Flush interval, doubled per consecutive failed flush (capped)"""
+        return min(self.intervalo_flush * 2 ** self._falhas_seguidas, ESPERA_MAXIMA_S)
+
+    def _retirar_lote(self):
+        """Moves pending snapshots to in flight (caller holds self._cond)"""
+        lote = list(self._pendentes.values())
+        self._em_voo.update(self._pendentes)
+        self._pendentes.clear()
+        return lote
+
+    def _loop_escrita(self):
+        while True:
+            with self._cond:
+                if self._ativo and (self._falhas_seguidas or len(self._pendentes) < self.max_lote):
+                    self._cond.wait(self._espera())
+                ativo = self._ativo
+            self.flush()
+            if not ativo:
+                return
+
+    def _executar(self, linhas):
+        conexao = self._conexao()
+        with conexao:
+            conexao.executemany(SQL_UPSERT, linhas)
+
+    def _gravar_linha_a_linha(self, lote):
+        """(gravadas, transitorias, descartadas) writing each row in its own transaction"""
+        gravadas, transitorias, descartadas = [], [], []
+        for linha in lote:
+            try:
+                self._executar([linha])
+                gravadas.append(linha)
+            except sqlite3.OperationalError:
+                transitorias.append(linha)
+            except sqlite3.Error as e:
+                print(f"❌ Invalid gamification state of student {linha[0]} discarded: {e}")
+                descartadas.append(linha)
+        return gravadas, transitorias, descartadas
+
+    def _gravar(self, lote):
+        inicio = time.perf_counter()
+        try:
+            self._executar(lote)
+            gravadas, transitorias, descartadas = lote, [], []
+        except sqlite3.OperationalError as e:
+            print(f"❌ Error writing gamification batch ({len(lote)} students): {e}")
+            gravadas, transitorias, descartadas = [], lote, []
+        except sqlite3.Error as e:
+            print(f"❌ Invalid row in gamification batch ({len(lote)} students), retrying row by row: {e}")
+            gravadas, transitorias, descartadas = self._gravar_linha_a_linha(lote)
+
+        with self._cond:
+            self.contadores['tempo_flush_s'] += time.perf_counter() - inicio
+            if gravadas:
+                self.contadores['lotes'] += 1
+                self.contadores['linhas_gravadas'] += len(gravadas)
+            if transitorias or descartadas:
+                self.contadores['erros'] += 1
+            self.contadores['descartados'] += len(descartadas)
+            self._falhas_seguidas = self._falhas_seguidas + 1 if transitorias else 0
+            for linha in gravadas:
+                self._tentativas.pop(linha[0], None)
+            # Transient: retry the snapshot unless a newer one was queued meanwhile, up to MAX_TENTATIVAS
+            for linha in transitorias:
+                ra = linha[0]
+                if ra in self._pendentes:
+                    continue
+                tentativas = self._tentativas.get(ra, 0) + 1
+                if tentativas >= MAX_TENTATIVAS:
+                    print(f"❌ Gamification state of student {ra} dropped after {tentativas} failed writes")
+                    self._tentativas.pop(ra, None)
+                    self.contadores['descartados'] += 1
+                else:
+                    self._tentativas[ra] = tentativas
+                    self._pendentes[ra] = linha
+            # Readers fall back to the database only once the row is committed (or requeued above)
+            for linha in lote:
+                if self._em_voo.get(linha[0]) is linha:
+                    del self._em_voo[linha[0]]
+
+    def flush(self):
+        """Writes pending snapshots now (caller thread)"""
+        with self._gravando:
+            with self._cond:
+                lote = self._retirar_lote()
+            if lote:
+                self._gravar(lote)
+
+    def encerrar(self):
+        """Stops the writer after a final flush"""
+        with self._cond:
+            self._ativo = False
+            self._cond.notify()
+        self._escritor.join(timeout=10)
+
+    def metricas(self):
+        with self._cond:
+            contadores = dict(self.contadores)
+            pendentes = len(self._pendentes)
+            em_voo = len(self._em_voo)
+        lotes = contadores['lotes']
+        return {**contadores, 'pendentes': pendentes, 'em_voo': em_voo, 'tempo_flush_s': round(contadores['tempo_flush_s'], 4),
+                'linhas_por_lote': round(contadores['linhas_gravadas'] / lotes, 1) if lotes else 0.0}
+
+
+_armazem = None
+_armazem_lock = threading.Lock()
+
+
+def obter_armazem():
+    """Returns process-wide gamification store"""
+    global _armazem
+    with _armazem_lock:
+        if _armazem is None:
+            _armazem = ArmazemGamificacao()
+            atexit.register(_armazem.encerrar)
+        return _armazem
+
+
+def benchmark(n_sessoes=200, eventos_por_sessao=50, caminho=None):
+    """Concurrent sessions enqueueing updates; returns enqueue latency and write throughput"""
+    pasta = None
+    if caminho is None:
+        pasta = tempfile.mkdtemp(prefix="gamificacao-")
+        caminho = os.path.join(pasta, 'bench.db')
+    armazem = ArmazemGamificacao(caminho)
+    latencias = []
+    lock = threading.Lock()
+
+    def sessao(ra):
+        estado = {'pontos': 0, 'nivel': 1, 'conquistas': [], 'streak_dias': 1, 'ultimo_acesso': '2024-01-01',
+                  'questoes_revisadas': 0, 'metas_concluidas': 0, 'perguntas_professor': 0, 'dias_estudando': 1}
+        tempos = []
+        for _ in range(eventos_por_sessao):
+            estado['pontos'] += 5
+            estado['questoes_revisadas'] += 1
+            inicio = time.perf_counter()
+            armazem.salvar(ra, estado)
+            tempos.append(time.perf_counter() - inicio)
+        with lock:
+            latencias.extend(tempos)
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=sessao, args=(ra,)) for ra in range(n_sessoes)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    enfileiramento_s = time.perf_counter() - inicio
+    armazem.encerrar()
+    total_s = time.perf_counter() - inicio
+
+    eventos = n_sessoes * eventos_por_sessao
+    resultado = {
+        'eventos': eventos,
+        'eventos_por_s': round(eventos / enfileiramento_s),
+        'salvar_p50_us': round(percentil(latencias, 50) * 1e6, 1),
+        'salvar_p99_us': round(percentil(latencias, 99) * 1e6, 1),
+        'total_com_flush_s': round(total_s, 3),
+        **armazem.metricas()
+    }
+    verificacao = ArmazemGamificacao(caminho)
+    resultado['gravados_ok'] = verificacao.carregar(0)['pontos'] == eventos_por_sessao * 5
+    verificacao.encerrar()
+    if pasta:
+        for nome in os.listdir(pasta):
+            os.remove(os.path.join(pasta, nome))
+        os.rmdir(pasta)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the gamification write-behind store")
+    parser.add_argument('--sessoes', type=int, default=200)
+    parser.add_argument('--eventos', type=int, default=50, help="updates per session")
+    parser.add_argument('--caminho', default=None, help="database file (default: temporary)")
+    args = parser.parse_args()
+
+    for chave, valor in benchmark(args.sessoes, args.eventos, args.caminho).items():
+        print(f"{chave:>20}: {valor}")
+
+
+if __name__ == '__main__':
+    main()
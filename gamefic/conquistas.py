@@ -0,0 +1,138 @@
+# =============================================================================
+# ACHIEVEMENT RULES ENGINE (DECLARATIVE, PER STUDENT OR WHOLE DATASET)
+# =============================================================================
+#
+# Rules are grouped; inside a group only the first matching rule unlocks
+# (same semantics as the old if/elif chains).
+#
+# Usage:
+#   python -m gamefic.conquistas      # precompute achievements of every student
+
+import argparse
+import operator
+import os
+import time
+
+from helpers.loader import CAMINHO_DADOS, PASTA_DADOS
+
+CAMINHO_CONQUISTAS = os.path.join(PASTA_DADOS, 'conquistas_alunos.csv')
+
+# Compact student feature vector
+FEATURES = ('acertos_port', 'acertos_mat', 'questoes_revisar')
+
+OPERADORES = {'>=': operator.ge, '<=': operator.le, '==': operator.eq}
+
+PONTOS_PADRAO = 10
+
+# (id, grupo, nome, emoji, descricao, pontos, condicoes) in priority order inside each group.
+# The id is stored in the gamification event log: never reuse or renumber one.
+REGRAS = [
+    (0, 'portugues', "King of Portuguese", "👑", "18/18 correct in Portuguese", 50, [('acertos_port', '>=', 18)]),
+    (1, 'portugues', "Portuguese Master", "🎯", "15+ correct in Portuguese", 30, [('acertos_port', '>=', 15)]),
+    (2, 'portugues', "Portuguese Aspirant", "📚", "12+ correct in Portuguese", 15, [('acertos_port', '>=', 12)]),
+    (3, 'matematica', "King of Mathematics", "👑", "18/18 correct in Mathematics", 50, [('acertos_mat', '>=', 18)]),
+    (4, 'matematica', "Mathematics Master", "🧮", "15+ correct in Mathematics", 30, [('acertos_mat', '>=', 15)]),
+    (5, 'matematica', "Mathematics Aspirant", "📐", "12+ correct in Mathematics", 15, [('acertos_mat', '>=', 12)]),
+    (6, 'revisao', "Perfection!", "🌟", "No errors in any question", 100, [('questoes_revisar', '==', 0)]),
+    (7, 'revisao', "Focus on Weaknesses", "💪", "Reviewing errors with determination", 40, [('questoes_revisar', '<=', 3)]),
+    (8, 'revisao', "In Progress", "📖", "Reviewing questions to improve", 20, [('questoes_revisar', '<=', 8)]),
+    (9, 'equilibrio', "Perfect Balance", "⚖️", "Good performance in both subjects", 25,
+     [('acertos_port', '>=', 10), ('acertos_mat', '>=', 10)]),
+]
+
+
+class MotorConquistas:
+    """Rules indexed by group, name and id, evaluated over a feature vector"""
+
+    def __init__(self, regras=REGRAS):
+        self.grupos = {}
+        self.por_nome = {}
+        self.por_id = {}
+        for id_regra, grupo, nome, emoji, descricao, pontos, condicoes in regras:
+            if id_regra in self.por_id:
+                raise ValueError(f"Duplicated achievement id: {id_regra}")
+            regra = {'id': id_regra, 'nome': nome, 'emoji': emoji, 'descricao': descricao, 'pontos': pontos,
+                     'condicoes': [(FEATURES.index(f), OPERADORES[op], valor, f, op) for f, op, valor in condicoes]}
+            self.grupos.setdefault(grupo, []).append(regra)
+            self.por_nome[nome] = regra
+            self.por_id[id_regra] = regra
+
+    def pontos(self, nome):
+        regra = self.por_nome.get(nome)
+        return regra['pontos'] if regra else PONTOS_PADRAO
+
+    def avaliar(self, vetor):
+        """Rules unlocked by one feature vector (tuple ordered as FEATURES)"""
+        desbloqueadas = []
+        for regras in self.grupos.values():
+            for regra in regras:
+                if all(op(vetor[i], valor) for i, op, valor, _, _ in regra['condicoes']):
+                    desbloqueadas.append(regra)
+                    break
+        return desbloqueadas
+
+    def avaliar_lote(self, features, pd):
+        """Vectorized evaluation: one column per group with the unlocked achievement (or None) + points
+
+        features: DataFrame indexed by student with the FEATURES columns.
+        """
+        resultado = pd.DataFrame(index=features.index)
+        pontos = pd.Series(0, index=features.index)
+        for grupo, regras in self.grupos.items():
+            coluna = pd.Series(None, index=features.index, dtype=object)
+            pontos_grupo = pd.Series(0, index=features.index)
+            # Lowest priority first, so higher-priority matches overwrite
+            for regra in reversed(regras):
+                mascara = pd.Series(True, index=features.index)
+                for _, op, valor, feature, _ in regra['condicoes']:
+                    mascara &= op(features[feature], valor)
+                coluna = coluna.mask(mascara, regra['nome'])
+                pontos_grupo = pontos_grupo.mask(mascara, regra['pontos'])
+            resultado[grupo] = coluna
+            pontos += pontos_grupo
+        resultado['pontos_conquistas'] = pontos
+        return resultado
+
+
+motor_conquistas = MotorConquistas()
+
+
+def vetor_aluno(aluno_data):
+    """Feature vector of a student (ordered as FEATURES)"""
+    return (int(aluno_data['acertos_port']), int(aluno_data['acertos_mat']),
+            len(aluno_data['erros_port_df']) + len(aluno_data['erros_mat_df']))
+
+
+def features_dataset(df, pd):
+    """Feature vectors of every student in one groupby pass"""
+    agregado = df.pivot_table(index='RA', columns='Disciplina', values='acerto', aggfunc='sum', fill_value=0)
+    features = pd.DataFrame({
+        'acertos_port': agregado['PORT'] if 'PORT' in agregado else 0,
+        'acertos_mat': agregado['MAT'] if 'MAT' in agregado else 0,
+    })
+    features['questoes_revisar'] = df.groupby('RA')['erro'].sum().reindex(features.index, fill_value=0)
+    return features[list(FEATURES)].astype(int)
+
+
+def conquistas_dataset(df, pd, motor=motor_conquistas):
+    """Achievements of every student (one row per RA)"""
+    return motor.avaliar_lote(features_dataset(df, pd), pd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute achievements of every student")
+    parser.add_argument('--dados', default=CAMINHO_DADOS)
+    parser.add_argument('--saida', default=CAMINHO_CONQUISTAS)
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    df = pd.read_csv(args.dados)
+    inicio = time.perf_counter()
+    resultado = conquistas_dataset(df, pd)
+    resultado.to_csv(args.saida)
+    print(f"✅ Achievements of {len(resultado)} students in {(time.perf_counter() - inicio) * 1000:.0f} ms -> {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+# =============================================================================
+# APPEND-ONLY GAMIFICATION EVENT LOG (BINARY, BATCHED, REPLAYABLE)
+# =============================================================================
+#
+# Every scoring action is one fixed-size little-endian record:
+#   ra (u64) | timestamp (u32, unix s) | action code (u8) | points (i16) | detail (u16)
+# Records are buffered and appended in batches by a background thread. A
+# snapshot of every student's folded state (plus the log offset it covers) is
+# rewritten every SNAPSHOT_A_CADA events, so replay only reads the tail. The
+# writer keeps no per-student state between snapshots: each one is the previous
+# snapshot plus the tail. Appends and crash-tail truncation take an exclusive
+# flock, so several worker processes can share the file.
+#
+# Usage:
+#   python -m gamefic.eventos --ra 123456789     # replay one student
+#   python -m gamefic.eventos --resumo           # events per action
+
+import argparse
+import atexit
+import fcntl
+import os
+import struct
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from gamefic.conquistas import motor_conquistas
+from helpers.loader import PASTA_DADOS
+from helpers.persistencia import carregar_pickle, salvar_pickle
+
+CAMINHO_EVENTOS = os.getenv('APP_EVENTOS_GAMIFICACAO', os.path.join(PASTA_DADOS, 'eventos_gamificacao.bin'))
+
+REGISTRO = struct.Struct('<QIBhH')
+CABECALHO = b'GEV1'
+
+# Action codes are part of the file format: append only, never reorder
+ACOES = ('revisao_questao', 'conclusao_meta', 'acesso_diario', 'conquista', 'pergunta_professor',
+         'interacao_lu', 'completou_aba', 'conquista_desbloqueada')
+CODIGO_ACAO = {acao: codigo for codigo, acao in enumerate(ACOES)}
+
+CONTADORES_ACAO = {
+    'revisao_questao': 'questoes_revisadas',
+    'pergunta_professor': 'perguntas_professor',
+    'conclusao_meta': 'metas_concluidas',
+}
+
+INTERVALO_FLUSH_S = 0.5
+SNAPSHOT_A_CADA = 50000
+
+
+def estado_vazio():
+    return {'pontos': 0, 'nivel': 1, 'conquistas': [], 'streak_dias': 0, 'ultimo_acesso': None,
+            'questoes_revisadas': 0, 'metas_concluidas': 0, 'perguntas_professor': 0, 'dias_estudando': 0,
+            'eventos': 0}
+
+
+def aplicar_evento(estado, timestamp, codigo, pontos, detalhe):
+    """Folds one record into a student state (streak and study days derived from event days)"""
+    acao = ACOES[codigo] if codigo < len(ACOES) else None
+    estado['pontos'] += pontos
+    estado['nivel'] = estado['pontos'] // 50 + 1
+    estado['eventos'] += 1
+    if acao in CONTADORES_ACAO:
+        estado[CONTADORES_ACAO[acao]] += 1
+    elif acao == 'conquista_desbloqueada' and detalhe in motor_conquistas.por_id:
+        # detail is the stable rule id (REGRAS), not its position
+        estado['conquistas'].append(motor_conquistas.por_id[detalhe]['nome'])
+
+    dia = date.fromtimestamp(timestamp).isoformat()
+    if dia != estado['ultimo_acesso']:
+        ontem = (date.fromisoformat(dia) - timedelta(days=1)).isoformat()
+        estado['streak_dias'] = estado['streak_dias'] + 1 if estado['ultimo_acesso'] == ontem else 1
+        estado['dias_estudando'] += 1
+        estado['ultimo_acesso'] = dia
+
+
+def ler_registros(caminho=CAMINHO_EVENTOS, inicio=0):
+    """Yields (ra, timestamp, code, points, detail) from byte offset inicio; returns on partial tail"""
+    if not os.path.exists(caminho):
+        return
+    with open(caminho, 'rb') as f:
+        if f.read(len(CABECALHO)) != CABECALHO:
+            raise ValueError(f"{caminho} is not a gamification event log")
+        f.seek(max(inicio, len(CABECALHO)))
+        while True:
+            bloco = f.read(REGISTRO.size * 4096)
+            if not bloco:
+                return
+            completo = len(bloco) - len(bloco) % REGISTRO.size
+            yield from REGISTRO.iter_unpack(bloco[:completo])
+            if completo < len(bloco):
+                return
+
+
+def _caminho_snapshot(caminho):
+    return caminho + '.snap'
+
+
+def carregar_snapshot(caminho=CAMINHO_EVENTOS):
+    """(estados, offset) of the latest snapshot, or ({}, 0) (full replay)"""
+    dados = carregar_pickle(_caminho_snapshot(caminho), "event snapshot")
+    if dados is None:
+        return {}, 0
+    return dados['estados'], dados['offset']
+
+
+def _reproduzir(caminho, ra, usar_snapshot):
+    estados, offset = carregar_snapshot(caminho) if usar_snapshot else ({}, 0)
+    if ra is not None:
+        estados = {ra: estados[ra]} if ra in estados else {}
+    offset = max(offset, len(CABECALHO))
+    for ra_evento, timestamp, codigo, pontos, detalhe in ler_registros(caminho, offset):
+        offset += REGISTRO.size
+        if ra is not None and ra_evento != ra:
+            continue
+        aplicar_evento(estados.setdefault(ra_evento, estado_vazio()), timestamp, codigo, pontos, detalhe)
+    return estados, offset
+
+
+def reproduzir(caminho=CAMINHO_EVENTOS, ra=None, usar_snapshot=True):
+    """Rebuilds states from snapshot + log tail: {ra: estado} (only ra when given)"""
+    return _reproduzir(caminho, ra, usar_snapshot)[0]
+
+
+def resumo_por_acao(caminho=CAMINHO_EVENTOS, desde=None):
+    """Event count and points per action (optionally since a unix timestamp)"""
+    contagem, pontos = Counter(), Counter()
+    for _, timestamp, codigo, delta, _ in ler_registros(caminho):
+        if desde is not None and timestamp < desde:
+            continue
+        acao = ACOES[codigo] if codigo < len(ACOES) else f'codigo_{codigo}'
+        contagem[acao] += 1
+        pontos[acao] += delta
+    return [{'acao': acao, 'eventos': n, 'pontos': pontos[acao]} for acao, n in contagem.most_common()]
+
+
+class RegistroEventos:
+    """Buffered appender of the event log with periodic snapshots"""
+
+    def __init__(self, caminho=CAMINHO_EVENTOS, intervalo_flush=INTERVALO_FLUSH_S, snapshot_a_cada=SNAPSHOT_A_CADA):
+        self.caminho = caminho
+        self.intervalo_flush = intervalo_flush
+        self.snapshot_a_cada = snapshot_a_cada
+        self._buffer = []
+        self._cond = threading.Condition()
+        self._ativo = True
+        self.contadores = {'eventos': 0, 'lotes': 0, 'bytes': 0, 'snapshots': 0, 'erros': 0}
+
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        if not os.path.exists(caminho) or os.path.getsize(caminho) == 0:
+            with open(caminho, 'wb') as f:
+                f.write(CABECALHO)
+        self._truncar_registro_parcial()
+
+        _, offset_snapshot = carregar_snapshot(caminho)
+        self._desde_snapshot = (os.path.getsize(caminho) - max(offset_snapshot, len(CABECALHO))) // REGISTRO.size
+
+        self._escritor = threading.Thread(target=self._loop_escrita, name="eventos-gamificacao", daemon=True)
+        self._escritor.start()
+
+    def _truncar_registro_parcial(self):
+        """Drops a half-written record left by a crash (exclusive lock: never cuts a live append)"""
+        with open(self.caminho, 'r+b') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            tamanho = os.fstat(f.fileno()).st_size
+            excedente = (tamanho - len(CABECALHO)) % REGISTRO.size
+            if excedente:
+                f.truncate(tamanho - excedente)
+
+    def registrar(self, ra, acao, pontos=0, detalhe=0, timestamp=None):
+        """Buffers one event (never blocks on disk)"""
+        if acao not in CODIGO_ACAO:
+            return
+        registro = (int(ra), int(timestamp or time.time()), CODIGO_ACAO[acao], int(pontos), int(detalhe))
+        with self._cond:
+            self._buffer.append(registro)
+
+    def _loop_escrita(self):
+        while True:
+            with self._cond:
+                if self._ativo:
+                    self._cond.wait(self.intervalo_flush)
+                lote, self._buffer = self._buffer, []
+                ativo = self._ativo
+            if lote:
+                self._gravar(lote)
+            if not ativo:
+                return
+
+    def _gravar(self, lote):
+        dados = b''.join(REGISTRO.pack(*registro) for registro in lote)
+        try:
+            with open(self.caminho, 'ab') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.write(dados)
+                f.flush()
+        except OSError as e:
+            self.contadores['erros'] += 1
+            print(f"❌ Error appending {len(lote)} gamification events: {e}")
+            with self._cond:
+                self._buffer[:0] = lote
+            return
+
+        self._desde_snapshot += len(lote)
+        self.contadores['eventos'] += len(lote)
+        self.contadores['lotes'] += 1
+        self.contadores['bytes'] += len(dados)
+        if self._desde_snapshot >= self.snapshot_a_cada:
+            self.salvar_snapshot()
+
+    def salvar_snapshot(self):
+        """Folds the tail into the previous snapshot and writes it atomically (writer thread only)"""
+        try:
+            # Tail of every worker process; states are dropped again once written
+            estados, offset = _reproduzir(self.caminho, None, True)
+            salvar_pickle({'estados': estados, 'offset': offset}, _caminho_snapshot(self.caminho))
+            self._desde_snapshot = 0
+            self.contadores['snapshots'] += 1
+        except OSError as e:
+            self.contadores['erros'] += 1
+            print(f"❌ Error writing event snapshot: {e}")
+
+    def encerrar(self):
+        """Flushes buffered events and stops the writer"""
+        with self._cond:
+            self._ativo = False
+            self._cond.notify()
+        self._escritor.join(timeout=10)
+
+    def metricas(self):
+        with self._cond:
+            pendentes = len(self._buffer)
+        return {**self.contadores, 'pendentes': pendentes, 'eventos_desde_snapshot': self._desde_snapshot}
+
+
+_registro = None
+_registro_lock = threading.Lock()
+
+
+def obter_registro_eventos():
+    """Returns process-wide event log writer"""
+    global _registro
+    with _registro_lock:
+        if _registro is None:
+            _registro = RegistroEventos()
+            atexit.register(_registro.encerrar)
+        return _registro
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay / summarize the gamification event log")
+    parser.add_argument('--caminho', default=CAMINHO_EVENTOS)
+    parser.add_argument('--ra', type=int, default=None, help="replay one student")
+    parser.add_argument('--resumo', action='store_true', help="events and points per action")
+    parser.add_argument('--sem-snapshot', action='store_true', help="replay the full log")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    if args.resumo:
+        for linha in resumo_por_acao(args.caminho):
+            print(f"{linha['acao']:>24}: {linha['eventos']} events, {linha['pontos']} points")
+    else:
+        estados = reproduzir(args.caminho, args.ra, not args.sem_snapshot)
+        for ra, estado in estados.items() if args.ra is not None else list(estados.items())[:20]:
+            print(f"{ra}: {estado}")
+        print(f"({len(estados)} students)")
+    print(f"✅ {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,79 +2,94 @@
 # GAMIFICATION SYSTEM
 # =============================================================================
 
-from datetime import datetime
+from datetime import datetime, timedelta
 
-def inicializar_sistema_gamificacao(st):
-    """Initializes gamification system in session"""
-    if 'gamificacao' not in st.session_state:
-        st.session_state.gamificacao = {
-            'pontos': 0,
-            'nivel': 1,
-            'conquistas': [],
-            'streak_dias': 0,
-            'ultimo_acesso': datetime.now().strftime("%Y-%m-%d"),
-            'questoes_revisadas': 0,
-            'metas_concluidas': 0,
-            'perguntas_professor': 0,
-            'dias_estudando': 0
-        }
+from gamefic.armazem import obter_armazem
+from gamefic.conquistas import motor_conquistas, vetor_aluno
+from gamefic.eventos import obter_registro_eventos
+
+def estado_inicial_gamificacao():
+    """Gamification state of a student with no history"""
+    return {
+        'pontos': 0,
+        'nivel': 1,
+        'conquistas': [],
+        'streak_dias': 0,
+        'ultimo_acesso': None,
+        'questoes_revisadas': 0,
+        'metas_concluidas': 0,
+        'perguntas_professor': 0,
+        'dias_estudando': 0
+    }
+
+def inicializar_sistema_gamificacao(st, ra=None):
+    """Initializes gamification system in session (loaded from the store once per student)"""
+    if 'gamificacao' in st.session_state and st.session_state.get('gamificacao_ra') == ra:
+        return
+    
+    estado = None
+    if ra is not None:
+        try:
+            estado = obter_armazem().carregar(ra)
+        except Exception as e:
+            print(f"❌ Error loading gamification state: {e}")
+    st.session_state.gamificacao = {**estado_inicial_gamificacao(), **(estado or {})}
+    st.session_state.gamificacao_ra = ra
+
+def persistir_gamificacao(st):
+    """Enqueues current state for the background writer (never blocks the rerun)"""
+    ra = st.session_state.get('gamificacao_ra')
+    if ra is None:
+        return
+    try:
+        obter_armazem().salvar(ra, st.session_state.gamificacao)
+    except Exception as e:
+        print(f"❌ Error saving gamification state: {e}")
+
+def registrar_evento(st, acao, pontos, detalhe=0):
+    """Appends scoring action to the event log (buffered, never blocks the rerun)"""
+    ra = st.session_state.get('gamificacao_ra')
+    if ra is None:
+        return
+    try:
+        obter_registro_eventos().registrar(ra, acao, pontos, detalhe)
+    except Exception as e:
+        print(f"❌ Error logging gamification event: {e}")
+
+def registrar_acesso_diario(st, hoje=None):
+    """Daily bonus, streak and study days on the first access of each day"""
+    gami = st.session_state.gamificacao
+    hoje = hoje or datetime.now().strftime("%Y-%m-%d")
+    if gami.get('ultimo_acesso') == hoje:
+        return False
+    
+    ontem = (datetime.strptime(hoje, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+    gami['streak_dias'] = gami.get('streak_dias', 0) + 1 if gami.get('ultimo_acesso') == ontem else 1
+    gami['dias_estudando'] = gami.get('dias_estudando', 0) + 1
+    gami['ultimo_acesso'] = hoje
+    atualizar_pontuacao('acesso_diario', st=st)
+    return True
 
 def verificar_conquistas(aluno_data, st):
     """Checks and awards achievements based on performance"""
-    # Dictionary mapping achievements to their points
-    conquistas_pontos = {
-        "King of Portuguese": 50,
-        "Portuguese Master": 30,
-        "Portuguese Aspirant": 15,
-        "King of Mathematics": 50,
-        "Mathematics Master": 30,
-        "Mathematics Aspirant": 15,
-        "Perfection!": 100,
-        "Focus on Weaknesses": 40,
-        "In Progress": 20,
-        "Perfect Balance": 25
-    }
-    
-    conquistas = []
-    
-    # ===== ACHIEVEMENTS BY CORRECT ANSWERS =====
-    if aluno_data['acertos_port'] >= 18:
-        conquistas.append({"emoji": "👑", "nome": "King of Portuguese", "descricao": "18/18 correct in Portuguese"})
-    elif aluno_data['acertos_port'] >= 15:
-        conquistas.append({"emoji": "🎯", "nome": "Portuguese Master", "descricao": "15+ correct in Portuguese"})
-    elif aluno_data['acertos_port'] >= 12:
-        conquistas.append({"emoji": "📚", "nome": "Portuguese Aspirant", "descricao": "12+ correct in Portuguese"})
-    
-    if aluno_data['acertos_mat'] >= 18:
-        conquistas.append({"emoji": "👑", "nome": "King of Mathematics", "descricao": "18/18 correct in Mathematics"})
-    elif aluno_data['acertos_mat'] >= 15:
-        conquistas.append({"emoji": "🧮", "nome": "Mathematics Master", "descricao": "15+ correct in Mathematics"})
-    elif aluno_data['acertos_mat'] >= 12:
-        conquistas.append({"emoji": "📐", "nome": "Mathematics Aspirant", "descricao": "12+ correct in Mathematics"})
-    
-    # ===== ACHIEVEMENTS BY REVIEW =====
-    total_questoes_revisar = len(aluno_data['erros_port_df']) + len(aluno_data['erros_mat_df'])
-    if total_questoes_revisar == 0:
-        conquistas.append({"emoji": "🌟", "nome": "Perfection!", "descricao": "No errors in any question"})
-    elif total_questoes_revisar <= 3:
-        conquistas.append({"emoji": "💪", "nome": "Focus on Weaknesses", "descricao": "Reviewing errors with determination"})
-    elif total_questoes_revisar <= 8:
-        conquistas.append({"emoji": "📖", "nome": "In Progress", "descricao": "Reviewing questions to improve"})
-    
-    # ===== BALANCE ACHIEVEMENT =====
-    if aluno_data['acertos_port'] >= 10 and aluno_data['acertos_mat'] >= 10:
-        conquistas.append({"emoji": "⚖️", "nome": "Perfect Balance", "descricao": "Good performance in both subjects"})
+    conquistas = [
+        {"emoji": regra['emoji'], "nome": regra['nome'], "descricao": regra['descricao']}
+        for regra in motor_conquistas.avaliar(vetor_aluno(aluno_data))
+    ]
     
     # ===== ADD NEW ACHIEVEMENTS TO SESSION =====
-    for conquista in conquistas:
-        nome = conquista.get('nome')
-        nomes_existentes = [c.get('nome') for c in st.session_state.gamificacao['conquistas']]
-        
-        if nome not in nomes_existentes:
-            st.session_state.gamificacao['conquistas'].append(conquista)
-            pontos = conquistas_pontos.get(nome, 10)
-            st.session_state.gamificacao['pontos'] += pontos
-            print(f"✅ Achievement unlocked: {nome} (+{pontos} points)")
+    gami = st.session_state.gamificacao
+    nomes_existentes = {c.get('nome') for c in gami['conquistas']}
+    novas = [c for c in conquistas if c['nome'] not in nomes_existentes]
+    
+    if novas:
+        gami['conquistas'].extend(novas)
+        gami['pontos'] += sum(motor_conquistas.pontos(c['nome']) for c in novas)
+        gami['nivel'] = gami['pontos'] // 50 + 1
+        for c in novas:
+            registrar_evento(st, 'conquista_desbloqueada', motor_conquistas.pontos(c['nome']),
+                             motor_conquistas.por_nome[c['nome']]['id'])
+        persistir_gamificacao(st)
     
     return conquistas
 
@@ -104,6 +119,9 @@ def atualizar_pontuacao(acao, detalhes=None, st=None):
             st.session_state.gamificacao['perguntas_professor'] += 1
         elif acao == 'conclusao_meta':
             st.session_state.gamificacao['metas_concluidas'] += 1
+        
+        registrar_evento(st, acao, pontos)
+        persistir_gamificacao(st)
 
 def exibir_widget_gamificacao(st):
     """Displays gamification widget with points, level and progress"""
@@ -0,0 +1,220 @@
+# =============================================================================
+# LEADERBOARD (INCREMENTAL RANKING PER CLASS AND PER SCHOOL)
+# =============================================================================
+#
+# Each scope keeps an indexable skip list ordered by (-points, RA): a points
+# update is one removal + one insertion, rank lookup and top-K cost O(log n).
+
+import random
+import threading
+
+from gamefic.armazem import obter_armazem
+
+ESCOPO_ESCOLA = 'escola'
+NIVEL_MAXIMO = 24
+PROBABILIDADE_NIVEL = 0.5
+
+
+class _No:
+    __slots__ = ('chave', 'proximos', 'saltos')
+
+    def __init__(self, chave, niveis):
+        self.chave = chave
+        self.proximos = [None] * niveis
+        # Elements skipped by each forward link (for rank arithmetic)
+        self.saltos = [0] * niveis
+
+
+class ListaSaltos:
+    """Indexable skip list of unique, ordered keys"""
+
+    def __init__(self, semente=None):
+        self.cabeca = _No(None, NIVEL_MAXIMO)
+        self.niveis = 1
+        self.tamanho = 0
+        self._aleatorio = random.Random(semente)
+
+    def __len__(self):
+        return self.tamanho
+
+    def _nivel_aleatorio(self):
+        nivel = 1
+        while nivel < NIVEL_MAXIMO and self._aleatorio.random() < PROBABILIDADE_NIVEL:
+            nivel += 1
+        return nivel
+
+    def _caminho(self, chave):
+        """Last node before chave on each level and its position"""
+        anteriores = [self.cabeca] * NIVEL_MAXIMO
+        posicoes = [0] * NIVEL_MAXIMO
+        no, posicao = self.cabeca, 0
+        for nivel in range(self.niveis - 1, -1, -1):
+            while no.proximos[nivel] is not None and no.proximos[nivel].chave < chave:
+                posicao += no.saltos[nivel]
+                no = no.proximos[nivel]
+            anteriores[nivel] = no
+            posicoes[nivel] = posicao
+        return anteriores, posicoes
+
+    def inserir(self, chave):
+        anteriores, posicoes = self._caminho(chave)
+        nivel_novo = self._nivel_aleatorio()
+        if nivel_novo > self.niveis:
+            for nivel in range(self.niveis, nivel_novo):
+                anteriores[nivel] = self.cabeca
+                posicoes[nivel] = 0
+                self.cabeca.saltos[nivel] = self.tamanho
+            self.niveis = nivel_novo
+
+        novo = _No(chave, nivel_novo)
+        posicao = posicoes[0] + 1
+        for nivel in range(nivel_novo):
+            anterior = anteriores[nivel]
+            novo.proximos[nivel] = anterior.proximos[nivel]
+            anterior.proximos[nivel] = novo
+            novo.saltos[nivel] = anterior.saltos[nivel] - (posicao - posicoes[nivel]) + 1
+            anterior.saltos[nivel] = posicao - posicoes[nivel]
+        for nivel in range(nivel_novo, self.niveis):
+            anteriores[nivel].saltos[nivel] += 1
+        self.tamanho += 1
+
+    def remover(self, chave):
+        """Removes chave; returns False when absent"""
+        anteriores, _ = self._caminho(chave)
+        alvo = anteriores[0].proximos[0]
+        if alvo is None or alvo.chave != chave:
+            return False
+        for nivel in range(self.niveis):
+            anterior = anteriores[nivel]
+            if anterior.proximos[nivel] is alvo:
+                anterior.saltos[nivel] += alvo.saltos[nivel] - 1
+                anterior.proximos[nivel] = alvo.proximos[nivel]
+            else:
+                anterior.saltos[nivel] -= 1
+        while self.niveis > 1 and self.cabeca.proximos[self.niveis - 1] is None:
+            self.niveis -= 1
+        self.tamanho -= 1
+        return True
+
+    def posicao(self, chave):
+        """0-based rank of chave (None when absent)"""
+        anteriores, posicoes = self._caminho(chave)
+        alvo = anteriores[0].proximos[0]
+        if alvo is None or alvo.chave != chave:
+            return None
+        return posicoes[0]
+
+    def primeiros(self, k):
+        """First k keys in order"""
+        chaves = []
+        no = self.cabeca.proximos[0]
+        while no is not None and len(chaves) < k:
+            chaves.append(no.chave)
+            no = no.proximos[0]
+        return chaves
+
+
+class Placar:
+    """Points ranking per school and per class (Série), updated incrementally"""
+
+    def __init__(self):
+        self.alunos = {}        # ra -> {'pontos', 'turma', 'nome'}
+        self.escopos = {ESCOPO_ESCOLA: ListaSaltos()}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _chave(pontos, ra):
+        return (-pontos, ra)
+
+    def _listas(self, turma):
+        listas = [self.escopos[ESCOPO_ESCOLA]]
+        if turma is not None:
+            listas.append(self.escopos.setdefault(turma, ListaSaltos()))
+        return listas
+
+    def atualizar(self, ra, pontos, turma=None, nome=None):
+        """Sets points of a student (O(log n) per scope)"""
+        with self._lock:
+            atual = self.alunos.get(ra)
+            if atual is not None:
+                if turma is None:
+                    turma = atual['turma']
+                nome = nome or atual['nome']
+                if atual['pontos'] == pontos and atual['turma'] == turma:
+                    return
+                for lista in self._listas(atual['turma']):
+                    lista.remover(self._chave(atual['pontos'], ra))
+            self.alunos[ra] = {'pontos': pontos, 'turma': turma, 'nome': nome}
+            for lista in self._listas(turma):
+                lista.inserir(self._chave(pontos, ra))
+
+    def ao_salvar(self, ra, estado):
+        """Store listener: keeps the ranking in sync with every saved snapshot"""
+        self.atualizar(ra, estado.get('pontos', 0))
+
+    def sincronizar_alunos(self, df, pontos_salvos=None):
+        """Adds students of the dataset (class and name), with stored points when known"""
+        pontos_salvos = pontos_salvos or {}
+        alunos = df.drop_duplicates('RA')[['RA', 'Série', 'Nome']]
+        for ra, turma, nome in alunos.itertuples(index=False, name=None):
+            ra = int(ra)
+            atual = self.alunos.get(ra)
+            pontos = atual['pontos'] if atual else pontos_salvos.get(ra, 0)
+            self.atualizar(ra, pontos, str(turma), nome)
+
+    def turma(self, ra):
+        aluno = self.alunos.get(ra)
+        return aluno['turma'] if aluno else None
+
+    def ranking(self, ra, escopo=ESCOPO_ESCOLA):
+        """(1-based position, scope size) of a student"""
+        with self._lock:
+            aluno = self.alunos.get(ra)
+            lista = self.escopos.get(escopo)
+            if aluno is None or lista is None:
+                return None, 0
+            posicao = lista.posicao(self._chave(aluno['pontos'], ra))
+            return (posicao + 1 if posicao is not None else None), len(lista)
+
+    def top(self, k=5, escopo=ESCOPO_ESCOLA):
+        """Top-k [{'posicao', 'ra', 'nome', 'pontos'}] of a scope"""
+        with self._lock:
+            lista = self.escopos.get(escopo)
+            if lista is None:
+                return []
+            return [{'posicao': i + 1, 'ra': ra, 'nome': self.alunos[ra]['nome'], 'pontos': -pontos_negativos}
+                    for i, (pontos_negativos, ra) in enumerate(lista.primeiros(k))]
+
+
+_placar = None
+_placar_lock = threading.Lock()
+
+
+def obter_placar():
+    """Returns process-wide leaderboard, fed by the gamification store"""
+    global _placar
+    with _placar_lock:
+        if _placar is None:
+            _placar = Placar()
+            armazem = obter_armazem()
+            for ra, pontos in armazem.todos().items():
+                _placar.atualizar(ra, pontos)
+            armazem.ouvintes.append(_placar.ao_salvar)
+        return _placar
+
+
+def exibir_placar(st, placar, ra, k=5):
+    """Leaderboard widget: student position and top-k of class and school"""
+    turma = placar.turma(ra)
+    escopos = [(f"🏫 Class {turma}", turma)] if turma is not None else []
+    escopos.append(("🎓 School", ESCOPO_ESCOLA))
+
+    st.markdown("### 🏅 Leaderboard")
+    colunas = st.columns(len(escopos))
+    for coluna, (titulo, escopo) in zip(colunas, escopos):
+        with coluna:
+            posicao, total = placar.ranking(ra, escopo)
+            st.markdown(f"**{titulo}** - your position: **{posicao or '-'}** of {total}")
+            for item in placar.top(k, escopo):
+                destaque = "👉 " if item['ra'] == ra else ""
+                st.markdown(f"{destaque}{item['posicao']}. {item['nome']} - {item['pontos']} pts")
@@ -2,6 +2,14 @@
 # GRAPH AND VISUALIZATION FUNCTIONS
 # =============================================================================
 
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# Serialized figure specs kept per process (gauges: 19 values x 2 subjects)
+MAX_FIGURAS_CACHE = 2000
+
 def criar_grafico_velocimetro(acertos, disciplina, cor, go):
     """Creates gauge chart to show correct answers from 0-18"""
     fig = go.Figure(go.Indicator(
@@ -32,24 +40,26 @@ def criar_grafico_velocimetro(acertos, disciplina, cor, go):
     
     return fig
 
-def criar_grafico_conteudos_prioritarios(erros_port_df, erros_mat_df, px, pd):
-    """Creates bar chart of contents with most errors"""
-    conteudos_erros = []
-    
-    if not erros_port_df.empty:
-        port_erros = erros_port_df['Conteúdo'].value_counts()
-        for conteudo, erros in port_erros.items():
-            conteudos_erros.append({'Conteúdo': conteudo, 'Erros': erros, 'Disciplina': 'Portuguese'})
-    
-    if not erros_mat_df.empty:
-        mat_erros = erros_mat_df['Conteúdo'].value_counts()
-        for conteudo, erros in mat_erros.items():
-            conteudos_erros.append({'Conteúdo': conteudo, 'Erros': erros, 'Disciplina': 'Mathematics'})
-    
-    if not conteudos_erros:
+def contar_erros_por_conteudo(erros_port_df, erros_mat_df, pd):
+    """Errors per content and subject (Portuguese first, most errors first); None if no errors"""
+    partes = [
+        df[['Conteúdo']].assign(Disciplina=nome)
+        for df, nome in ((erros_port_df, 'Portuguese'), (erros_mat_df, 'Mathematics'))
+        if not df.empty
+    ]
+    if not partes:
         return None
     
-    df_erros = pd.DataFrame(conteudos_erros)
+    df_erros = pd.concat(partes, ignore_index=True).groupby(['Disciplina', 'Conteúdo'], sort=False).size().reset_index(name='Erros')
+    # 'Portuguese' > 'Mathematics', so descending keeps Portuguese bars first
+    return df_erros.sort_values(['Disciplina', 'Erros'], ascending=[False, False], kind='stable')[['Conteúdo', 'Erros', 'Disciplina']]
+
+def criar_grafico_conteudos_prioritarios(erros_port_df, erros_mat_df, px, pd, df_erros=None):
+    """Creates bar chart of contents with most errors"""
+    if df_erros is None:
+        df_erros = contar_erros_por_conteudo(erros_port_df, erros_mat_df, pd)
+    if df_erros is None:
+        return None
     
     fig = px.bar(
         df_erros, 
@@ -65,4 +75,100 @@ def criar_grafico_conteudos_prioritarios(erros_port_df, erros_mat_df, px, pd):
         height=400
     )
     
-    return fig
\ No newline at end of file
+    return fig
+
+
+# =============================================================================
+# FIGURE CACHE
+# =============================================================================
+
+class CacheFiguras:
+    """LRU of serialized figure specs keyed by chart inputs, with hit/timing stats
+
+    Specs are stored as JSON strings (immutable), so one cached chart can be
+    shared by every session without one rerun mutating another's figure. A hit
+    rebuilds a private Figure without re-validating the spec (it was validated
+    when first built); st.plotly_chart then skips validation too, which it would
+    not do for a plain dict.
+    """
+
+    def __init__(self, maximo=MAX_FIGURAS_CACHE):
+        self.maximo = maximo
+        self._specs = OrderedDict()
+        self._estatisticas = {}
+        self._lock = threading.Lock()
+
+    def _contar(self, tipo, campo, valor=1):
+        est = self._estatisticas.setdefault(tipo, {'acertos': 0, 'falhas': 0, 'construcao_s': 0.0, 'restauracao_s': 0.0})
+        est[campo] += valor
+
+    def obter(self, tipo, chave, construir, go):
+        """Returns figure for chave, building (and serializing) it only on a miss"""
+        inicio = time.perf_counter()
+        with self._lock:
+            spec = self._specs.get((tipo, chave))
+            if spec is not None:
+                self._specs.move_to_end((tipo, chave))
+        
+        if spec is None:
+            fig = construir()
+            spec = fig.to_json() if fig is not None else 'null'
+            with self._lock:
+                self._specs[(tipo, chave)] = spec
+                while len(self._specs) > self.maximo:
+                    self._specs.popitem(last=False)
+                self._contar(tipo, 'falhas')
+                self._contar(tipo, 'construcao_s', time.perf_counter() - inicio)
+            return fig
+        
+        dados = json.loads(spec)
+        fig = go.Figure(dados, _validate=False) if dados is not None else None
+        with self._lock:
+            self._contar(tipo, 'acertos')
+            self._contar(tipo, 'restauracao_s', time.perf_counter() - inicio)
+        return fig
+
+    def relatorio(self):
+        """Hit rate and mean build/restore time (ms) per chart type"""
+        with self._lock:
+            copia = {tipo: dict(est) for tipo, est in self._estatisticas.items()}
+            tamanho = len(self._specs)
+        linhas = []
+        for tipo, est in copia.items():
+            total = est['acertos'] + est['falhas']
+            linhas.append({
+                'grafico': tipo,
+                'acertos': est['acertos'],
+                'falhas': est['falhas'],
+                'taxa_acerto': round(est['acertos'] / total, 3) if total else 0.0,
+                'construcao_ms': round(est['construcao_s'] / est['falhas'] * 1000, 2) if est['falhas'] else 0.0,
+                'restauracao_ms': round(est['restauracao_s'] / est['acertos'] * 1000, 2) if est['acertos'] else 0.0,
+                'specs_em_cache': tamanho
+            })
+        return linhas
+
+
+cache_figuras = CacheFiguras()
+
+
+def grafico_velocimetro_cache(acertos, disciplina, cor, go):
+    """Cached criar_grafico_velocimetro (keyed by value, subject and color)"""
+    return cache_figuras.obter(
+        'velocimetro', (int(acertos), disciplina, cor),
+        lambda: criar_grafico_velocimetro(acertos, disciplina, cor, go), go
+    )
+
+def grafico_conteudos_prioritarios_cache(erros_port_df, erros_mat_df, px, pd, go):
+    """Cached criar_grafico_conteudos_prioritarios (keyed by the error counts)"""
+    df_erros = contar_erros_por_conteudo(erros_port_df, erros_mat_df, pd)
+    if df_erros is None:
+        return None
+    chave = tuple(df_erros.itertuples(index=False, name=None))
+    return cache_figuras.obter(
+        'conteudos_prioritarios', chave,
+        lambda: criar_grafico_conteudos_prioritarios(erros_port_df, erros_mat_df, px, pd, df_erros=df_erros), go
+    )
+
+def relatorio_cache_figuras():
+    """Per-chart hit rate and timing of the figure cache"""
+    return cache_figuras.relatorio()
@@ -0,0 +1,45 @@
+# =============================================================================
+# STAFF ACCESS (PASSWORD-GATED VIEWS)
+# =============================================================================
+#
+# The ?admin=1 / ?professor=1 flags only ask for a password. The password comes
+# from st.secrets (or the environment); when it is not configured the view is
+# disabled.
+
+import hmac
+import os
+
+SEGREDO_ADMIN = 'APP_SENHA_ADMIN'
+SEGREDO_PROFESSOR = 'APP_SENHA_PROFESSOR'
+
+
+def obter_segredo(st, nome):
+    """Secret from st.secrets, falling back to the environment (None when unset)"""
+    try:
+        if nome in st.secrets:
+            return str(st.secrets[nome])
+    except Exception:
+        # No secrets.toml at all
+        pass
+    return os.getenv(nome)
+
+
+def acesso_autorizado(st, nome_segredo, rotulo):
+    """Password gate: True once this session typed the configured secret"""
+    chave = f'acesso_{nome_segredo}'
+    if st.session_state.get(chave):
+        return True
+
+    esperado = obter_segredo(st, nome_segredo)
+    if not esperado:
+        st.warning(f"🔒 {rotulo} is disabled: configure {nome_segredo} in the app secrets")
+        return False
+
+    senha = st.text_input(f"🔒 {rotulo} password:", type="password", key=f"senha_{nome_segredo}")
+    if not senha:
+        return False
+    if hmac.compare_digest(senha.encode('utf-8'), esperado.encode('utf-8')):
+        st.session_state[chave] = True
+        return True
+    st.error("❌ Wrong password")
+    return False
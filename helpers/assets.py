@@ -0,0 +1,132 @@
+# =============================================================================
+# STATIC ASSETS (PRE-RENDERED CSS AND CACHED TUTOR IMAGES)
+# =============================================================================
+#
+# Images live in the static folder served by Streamlit (server.enableStaticServing,
+# see .streamlit/config.toml) and are referenced by content-hashed URLs, so the
+# browser downloads each version once. When static serving is off or the folder is
+# elsewhere, image bytes come from an in-memory cache instead of disk. A missing
+# image is skipped (logged once).
+#
+# The stylesheet is sent once per browser session: a zero-height component puts
+# it in the page <head>, where it survives reruns. (Streamlit serves .css files
+# from static/ as text/plain, so a cached <link> is not an option.)
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+# App root (folder of app.py); Streamlit serves <root>/static as app/static/
+RAIZ_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_STATIC = os.getenv('APP_STATIC', os.path.join(RAIZ_APP, 'static'))
+URL_STATIC = 'app/static'
+
+_bytes_imagens = {}     # nome -> (bytes, hash)
+_imagens_ausentes = set()
+_estatisticas = {'css_original': 0, 'css_minificado': 0, 'reruns': 0, 'css_enviado_ultimo_rerun': 0,
+                 'css_enviado_total': 0, 'imagens_url': 0, 'imagens_bytes': 0, 'imagens_ausentes': 0,
+                 'leituras_disco': 0}
+_lock = threading.Lock()
+
+
+def minificar_css(css):
+    """Removes comments and redundant whitespace from a <style> block"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = ' '.join(linha.strip() for linha in css.splitlines() if linha.strip())
+    return re.sub(r'\s*([{};])\s*', r'\1', css)
+
+
+def pre_renderizar_css(css):
+    """Minified CSS plus byte counts (call once per process)"""
+    minificado = minificar_css(css)
+    with _lock:
+        _estatisticas['css_original'] = len(css.encode('utf-8'))
+        _estatisticas['css_minificado'] = len(minificado.encode('utf-8'))
+    return minificado
+
+
+def script_css(css, assinatura):
+    """HTML of a component that adds the <style> block to the parent page head (idempotent)"""
+    corpo = re.sub(r'^\s*<style>|</style>\s*$', '', css)
+    # "</" would end the <script> element early
+    texto = json.dumps(corpo).replace('</', '<\\/')
+    return (
+        "<script>(function(){var d=window.parent.document;"
+        f"if(d.getElementById('estilo-{assinatura}'))return;"
+        f"var s=d.createElement('style');s.id='estilo-{assinatura}';s.textContent={texto};"
+        "d.head.appendChild(s);})();</script>"
+    )
+
+
+def exibir_css(st, css, html):
+    """Sends the stylesheet on the first run of a browser session only (html: streamlit.components.v1.html)"""
+    assinatura = hashlib.sha1(css.encode('utf-8')).hexdigest()[:12]
+    enviado = 0
+    if st.session_state.get('css_injetado') != assinatura:
+        bloco = script_css(css, assinatura)
+        html(bloco, height=0)
+        st.session_state.css_injetado = assinatura
+        enviado = len(bloco.encode('utf-8'))
+    with _lock:
+        _estatisticas['reruns'] += 1
+        _estatisticas['css_enviado_ultimo_rerun'] = enviado
+        _estatisticas['css_enviado_total'] += enviado
+
+
+def _carregar_imagem(nome):
+    with _lock:
+        if nome in _bytes_imagens:
+            return _bytes_imagens[nome]
+    with open(os.path.join(PASTA_STATIC, nome), 'rb') as f:
+        dados = f.read()
+    item = (dados, hashlib.sha1(dados).hexdigest()[:12])
+    with _lock:
+        _bytes_imagens[nome] = item
+        _estatisticas['leituras_disco'] += 1
+    return item
+
+
+def servindo_estaticos(st):
+    """True when Streamlit serves PASTA_STATIC at app/static/"""
+    try:
+        ativo = st.get_option('server.enableStaticServing')
+    except Exception:
+        ativo = False
+    return bool(ativo) and os.path.abspath(PASTA_STATIC) == os.path.join(RAIZ_APP, 'static')
+
+
+def url_imagem(nome):
+    """Content-hashed static URL of an image"""
+    _, assinatura = _carregar_imagem(nome)
+    return f"{URL_STATIC}/{nome}?v={assinatura}"
+
+
+def exibir_imagem(st, nome, width=None):
+    """Shows static image by hashed URL (browser-cached) or from in-memory bytes; skips missing images"""
+    if nome in _imagens_ausentes:
+        return
+    try:
+        if servindo_estaticos(st):
+            largura = f' width="{width}"' if width else ''
+            st.markdown(f'<img src="{url_imagem(nome)}"{largura} alt="{nome}">', unsafe_allow_html=True)
+            with _lock:
+                _estatisticas['imagens_url'] += 1
+        else:
+            st.image(_carregar_imagem(nome)[0], width=width)
+            with _lock:
+                _estatisticas['imagens_bytes'] += 1
+    except OSError as e:
+        print(f"❌ Static image {nome} not available (see static/README.md): {e}")
+        with _lock:
+            _imagens_ausentes.add(nome)
+            _estatisticas['imagens_ausentes'] += 1
+
+
+def relatorio_assets():
+    """CSS bytes actually sent (last rerun, total) and how images were served"""
+    with _lock:
+        estatisticas = dict(_estatisticas)
+        estatisticas['imagens_em_memoria'] = len(_bytes_imagens)
+    return estatisticas
@@ -0,0 +1,14 @@
+# =============================================================================
+# SMALL STATISTICS SHARED BY METRICS AND BENCHMARKS
+# =============================================================================
+
+import math
+
+
+def percentil(valores, p):
+    """Nearest-rank percentile p (0-100) of a sequence (0.0 when empty)"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = math.ceil(p / 100 * len(ordenados)) - 1
+    return ordenados[min(len(ordenados) - 1, max(0, indice))]
@@ -2,12 +2,17 @@
 # HELPER FUNCTIONS
 # =============================================================================
 
+import os
+
+CAMINHO_DADOS = '/Users/mac/IronHacks/W9/Final Project 4/data/desempenho_alunos_questoes.csv'
+PASTA_DADOS = os.path.dirname(CAMINHO_DADOS)
+
 
 def load_data(pd, st):
     """Loads student data"""
     try:
-        df = pd.read_csv('/Users/mac/IronHacks/W9/Final Project 4/data/desempenho_alunos_questoes.csv')
+        df = pd.read_csv(CAMINHO_DADOS)
         return df
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
-        return False
\ No newline at end of file
+        return False
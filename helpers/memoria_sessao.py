@@ -0,0 +1,219 @@
+# =============================================================================
+# SESSION MEMORY PROFILER AND CHAT-HISTORY BUDGET
+# =============================================================================
+
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+import types
+
+from helpers.loader import PASTA_DADOS
+from helpers.persistencia import arquivo_atomico
+
+# Sessions are sampled at most once per interval (deep size is not free)
+INTERVALO_AMOSTRA_S = 30.0
+# Sessions not sampled for this long are considered gone
+EXPIRACAO_SESSAO_S = 3600.0
+
+# Chat histories kept in memory per session; older ones are spilled to disk
+ORCAMENTO_HISTORICOS_BYTES = int(os.getenv('APP_ORCAMENTO_SESSAO_KB', '256')) * 1024
+PASTA_DERRAMAMENTO = os.getenv('APP_PASTA_SESSOES', os.path.join(PASTA_DADOS, 'sessoes'))
+PADRAO_HISTORICOS = re.compile(r'^(professor_q\d+_.*|professor_history)$')
+
+_tamanhos_sessoes = {}  # sessao_id -> (bytes, instante)
+_lock = threading.Lock()
+
+_TIPOS_IGNORADOS = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def tamanho_profundo(obj, vistos=None):
+    """Approximate bytes owned by obj (DataFrames by memory_usage, shared slots skipped)"""
+    vistos = set() if vistos is None else vistos
+    if id(obj) in vistos or isinstance(obj, _TIPOS_IGNORADOS):
+        return 0
+    vistos.add(id(obj))
+
+    # pandas objects
+    if hasattr(obj, 'memory_usage') and hasattr(obj, 'dtypes'):
+        uso = obj.memory_usage(deep=True)
+        return int(uso.sum()) if hasattr(uso, 'sum') else int(uso)
+
+    tamanho = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        return tamanho
+    if isinstance(obj, dict):
+        return tamanho + sum(tamanho_profundo(k, vistos) + tamanho_profundo(v, vistos) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return tamanho + sum(tamanho_profundo(item, vistos) for item in obj)
+
+    compartilhados = getattr(obj, 'COMPARTILHADOS', ())
+    for slot in getattr(type(obj), '__slots__', ()):
+        if slot not in compartilhados and hasattr(obj, slot):
+            tamanho += tamanho_profundo(getattr(obj, slot), vistos)
+    if hasattr(obj, '__dict__'):
+        tamanho += tamanho_profundo({k: v for k, v in vars(obj).items() if k not in compartilhados}, vistos)
+    return tamanho
+
+
+def perfil_sessao(session_state):
+    """Bytes per session_state key, largest first"""
+    vistos = set()
+    linhas = []
+    for chave in list(session_state.keys()):
+        try:
+            linhas.append({'chave': str(chave), 'bytes': tamanho_profundo(session_state[chave], vistos)})
+        except Exception as e:
+            print(f"❌ Error measuring session key {chave}: {e}")
+    return sorted(linhas, key=lambda linha: linha['bytes'], reverse=True)
+
+
+def registrar_sessao(sessao_id, session_state, forcar=False):
+    """Samples total bytes of one session (at most once per INTERVALO_AMOSTRA_S)"""
+    agora = time.time()
+    with _lock:
+        anterior = _tamanhos_sessoes.get(sessao_id)
+    if anterior and not forcar and agora - anterior[1] < INTERVALO_AMOSTRA_S:
+        return anterior[0]
+
+    total = sum(linha['bytes'] for linha in perfil_sessao(session_state))
+    with _lock:
+        _tamanhos_sessoes[sessao_id] = (total, agora)
+        for sid in [sid for sid, (_, instante) in _tamanhos_sessoes.items() if agora - instante > EXPIRACAO_SESSAO_S]:
+            del _tamanhos_sessoes[sid]
+    return total
+
+
+def relatorio_memoria_sessoes():
+    """Bytes per session across the sessions sampled by this process"""
+    with _lock:
+        tamanhos = [b for b, _ in _tamanhos_sessoes.values()]
+    return {
+        'sessoes': len(tamanhos),
+        'media_bytes': int(sum(tamanhos) / len(tamanhos)) if tamanhos else 0,
+        'max_bytes': max(tamanhos) if tamanhos else 0,
+        'total_bytes': sum(tamanhos)
+    }
+
+
+# ----- chat-history budget -----
+
+_ultima_limpeza = [0.0]
+
+
+def _arquivo_historico(sessao_id, chave):
+    return os.path.join(PASTA_DERRAMAMENTO, re.sub(r'[^\w-]', '_', str(sessao_id)), re.sub(r'[^\w-]', '_', chave) + '.json')
+
+
+def _tocar_pasta(sessao_id):
+    """Marks the spill folder of a session as in use (limpar_sessoes_expiradas goes by its mtime)"""
+    try:
+        os.utime(os.path.dirname(_arquivo_historico(sessao_id, '_')))
+    except OSError:
+        # Nothing spilled yet
+        pass
+
+
+def _estado_orcamento(st):
+    if '_orcamento_historicos' not in st.session_state:
+        st.session_state._orcamento_historicos = {'execucao': 0, 'uso': {}, 'em_disco': set(), 'derramados': 0, 'recarregados': 0}
+    return st.session_state._orcamento_historicos
+
+
+def historico_sessao(st, chave, sessao_id):
+    """Returns the history list of chave, reloading it from disk if it was spilled"""
+    estado = _estado_orcamento(st)
+    if chave not in st.session_state:
+        historico = []
+        if chave in estado['em_disco']:
+            try:
+                with open(_arquivo_historico(sessao_id, chave), encoding='utf-8') as f:
+                    historico = json.load(f)
+                estado['recarregados'] += 1
+                _tocar_pasta(sessao_id)
+            except (OSError, ValueError) as e:
+                print(f"❌ Error reloading history {chave}: {e}")
+            estado['em_disco'].discard(chave)
+        st.session_state[chave] = historico
+    # Most recent use (never evicted in the run that touched it)
+    estado['uso'][chave] = estado['execucao']
+    return st.session_state[chave]
+
+
+def _derramar(st, sessao_id, chave, estado):
+    with arquivo_atomico(_arquivo_historico(sessao_id, chave), 'w', encoding='utf-8') as f:
+        json.dump(st.session_state[chave], f, ensure_ascii=False, default=str)
+    del st.session_state[chave]
+    estado['em_disco'].add(chave)
+    estado['uso'].pop(chave, None)
+    estado['derramados'] += 1
+
+
+def aplicar_orcamento(st, sessao_id, orcamento=ORCAMENTO_HISTORICOS_BYTES):
+    """Spills least recently used chat histories to disk until the session fits the budget
+
+    Call once per full rerun. Returns bytes of histories still in memory.
+    """
+    estado = _estado_orcamento(st)
+    execucao = estado['execucao']
+    estado['execucao'] += 1
+
+    tamanhos = {chave: tamanho_profundo(st.session_state[chave])
+                for chave in list(st.session_state.keys()) if PADRAO_HISTORICOS.match(str(chave))}
+    total = sum(tamanhos.values())
+
+    # Untracked keys (created before the budget existed) count as oldest
+    candidatos = sorted((estado['uso'].get(chave, -1), chave) for chave in tamanhos)
+    for uso, chave in candidatos:
+        if total <= orcamento or uso >= execucao:
+            break
+        try:
+            _derramar(st, sessao_id, chave, estado)
+            total -= tamanhos[chave]
+        except OSError as e:
+            print(f"❌ Error spilling history {chave}: {e}")
+            break
+    if estado['em_disco']:
+        # The session is alive: keep its spilled histories out of the expiry sweep
+        _tocar_pasta(sessao_id)
+
+    if time.time() - _ultima_limpeza[0] > EXPIRACAO_SESSAO_S:
+        _ultima_limpeza[0] = time.time()
+        limpar_sessoes_expiradas()
+    return total
+
+
+def limpar_sessoes_expiradas(max_idade_s=EXPIRACAO_SESSAO_S):
+    """Removes spilled histories of sessions idle for longer than max_idade_s
+
+    Live sessions touch their folder on every budget pass and reload, so its
+    mtime is the last time the session was used.
+    """
+    if not os.path.isdir(PASTA_DERRAMAMENTO):
+        return 0
+    removidas = 0
+    limite = time.time() - max_idade_s
+    for nome in os.listdir(PASTA_DERRAMAMENTO):
+        pasta = os.path.join(PASTA_DERRAMAMENTO, nome)
+        try:
+            if os.path.isdir(pasta) and os.path.getmtime(pasta) < limite:
+                shutil.rmtree(pasta)
+                removidas += 1
+        except OSError as e:
+            print(f"❌ Error removing spilled session {nome}: {e}")
+    return removidas
+
+
+def relatorio_orcamento(st):
+    """Budget state of the current session"""
+    estado = _estado_orcamento(st)
+    return {
+        'orcamento_bytes': ORCAMENTO_HISTORICOS_BYTES,
+        'historicos_em_memoria': sum(1 for chave in st.session_state.keys() if PADRAO_HISTORICOS.match(str(chave))),
+        'historicos_em_disco': len(estado['em_disco']),
+        'derramados': estado['derramados'],
+        'recarregados': estado['recarregados']
+    }
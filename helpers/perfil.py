@@ -0,0 +1,108 @@
+# =============================================================================
+# COLD-START PROFILER (IMPORT TIME PER MODULE AND TIME TO FIRST RENDER)
+# =============================================================================
+#
+# Enabled with APP_PERFIL_INICIO=1. Must be imported before any heavy module.
+#
+# Usage:
+#   APP_PERFIL_INICIO=1 streamlit run app.py     # report printed at first render
+#   python -m helpers.perfil                     # headless run of app.py
+
+import builtins
+import os
+import sys
+import threading
+import time
+
+PERFIL_ATIVO = os.getenv('APP_PERFIL_INICIO') == '1'
+
+_inicio = time.perf_counter()
+_imports = {}           # modulo -> {'proprio_s', 'total_s', 'fase'}
+_eventos = {}           # evento -> seconds since start
+_pilha = threading.local()
+_import_original = builtins.__import__
+_lock = threading.Lock()
+
+
+def _import_medido(nome, globais=None, locais=None, lista=(), nivel=0):
+    if nivel or nome in sys.modules:
+        return _import_original(nome, globais, locais, lista, nivel)
+
+    pilha = getattr(_pilha, 'itens', None)
+    if pilha is None:
+        pilha = _pilha.itens = []
+    pilha.append(0.0)
+    inicio = time.perf_counter()
+    try:
+        return _import_original(nome, globais, locais, lista, nivel)
+    finally:
+        total = time.perf_counter() - inicio
+        filhos = pilha.pop()
+        if pilha:
+            pilha[-1] += total
+        with _lock:
+            _imports.setdefault(nome, {
+                'proprio_s': total - filhos,
+                'total_s': total,
+                'fase': 'tardio' if 'primeira_renderizacao' in _eventos else 'inicio'
+            })
+
+
+def ativar_perfil_imports():
+    """Times every first-time import (no-op unless APP_PERFIL_INICIO=1)"""
+    if PERFIL_ATIVO and builtins.__import__ is not _import_medido:
+        builtins.__import__ = _import_medido
+
+
+def marcar(evento):
+    """Records first occurrence of a startup event"""
+    with _lock:
+        if evento not in _eventos:
+            _eventos[evento] = time.perf_counter() - _inicio
+            return True
+    return False
+
+
+def relatorio_inicio(limite=15):
+    """Slowest imports (self/inclusive ms, loaded at startup or lazily) and startup events"""
+    with _lock:
+        imports = sorted(_imports.items(), key=lambda item: item[1]['proprio_s'], reverse=True)
+        eventos = dict(_eventos)
+    return {
+        'imports': [
+            {'modulo': nome, 'proprio_ms': round(v['proprio_s'] * 1000, 1),
+             'total_ms': round(v['total_s'] * 1000, 1), 'fase': v['fase']}
+            for nome, v in imports[:limite]
+        ],
+        'eventos_ms': {evento: round(segundos * 1000, 1) for evento, segundos in eventos.items()}
+    }
+
+
+def imprimir_relatorio(limite=15):
+    """Prints startup report to stdout"""
+    relatorio = relatorio_inicio(limite)
+    print("⏱️ Startup profile")
+    for evento, ms in relatorio['eventos_ms'].items():
+        print(f"   {evento}: {ms} ms")
+    for item in relatorio['imports']:
+        print(f"   {item['modulo']:<40} {item['proprio_ms']:>8} ms self {item['total_ms']:>8} ms total  ({item['fase']})")
+
+
+def marcar_primeira_renderizacao():
+    """Call once the login page is drawn; prints the report on the first call when profiling"""
+    if marcar('primeira_renderizacao') and PERFIL_ATIVO:
+        imprimir_relatorio()
+
+
+def main():
+    os.environ['APP_PERFIL_INICIO'] = '1'
+    from streamlit.testing.v1 import AppTest
+
+    inicio = time.perf_counter()
+    AppTest.from_file(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py'),
+                      default_timeout=120).run()
+    print(f"✅ Headless first run: {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# =============================================================================
+# ATOMIC FILE WRITES AND PICKLE STORAGE OF PRECOMPUTED RESULTS
+# =============================================================================
+#
+# Every write goes to its own temp file next to the target (mkstemp), is
+# fsynced and then renamed over the target. Readers in other sessions or
+# processes see either the old file or the new one, never a half-written one,
+# and concurrent writers of the same target cannot clobber each other's temp
+# file (the last rename wins).
+
+import os
+import pickle
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def arquivo_atomico(caminho, modo='wb', encoding=None):
+    """Opens a private temp file for writing; replaces caminho with it when the block succeeds"""
+    pasta = os.path.dirname(caminho) or '.'
+    os.makedirs(pasta, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=pasta, prefix=os.path.basename(caminho) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(descritor, modo, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def salvar_pickle(objeto, caminho):
+    """Pickles objeto to caminho atomically"""
+    with arquivo_atomico(caminho) as f:
+        pickle.dump(objeto, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def carregar_pickle(caminho, rotulo):
+    """Unpickled contents of caminho, or None when missing or unreadable"""
+    try:
+        with open(caminho, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"❌ Error loading {rotulo}: {e}")
+        return None
@@ -0,0 +1,33 @@
+# =============================================================================
+# ONE-AT-A-TIME BACKGROUND JOBS (OFFLINE RECOMPUTES STARTED BY THE APP)
+# =============================================================================
+#
+# The app never runs a calibration or a batch scoring inside a rerun. When a
+# stored result is stale it starts the recompute here (at most one per name and
+# process) and keeps showing nothing until the new file lands.
+
+import threading
+
+_tarefas = {}   # nome -> Thread
+_lock = threading.Lock()
+
+
+def iniciar_tarefa(nome, alvo, *args):
+    """Runs alvo(*args) in a daemon thread unless the job nome is still running; True if started"""
+    with _lock:
+        atual = _tarefas.get(nome)
+        if atual is not None and atual.is_alive():
+            return False
+        _tarefas[nome] = threading.Thread(target=alvo, args=args, name=nome, daemon=True)
+        _tarefas[nome].start()
+        return True
+
+
+def aguardar_tarefa(nome, timeout=None):
+    """Waits for the job nome; True when it is not running anymore"""
+    with _lock:
+        atual = _tarefas.get(nome)
+    if atual is not None:
+        atual.join(timeout)
+        return not atual.is_alive()
+    return True
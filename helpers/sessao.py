@@ -0,0 +1,170 @@
+# =============================================================================
+# MEMOIZED PER-STUDENT SESSION BOOTSTRAP
+# =============================================================================
+
+import os
+import threading
+import time
+
+from helpers.loader import CAMINHO_DADOS
+
+# Bootstrap timings of this process (seconds), for rerun latency comparison
+_tempos_bootstrap = {'completo': [], 'reaproveitado': []}
+_tempos_lock = threading.Lock()
+MAX_AMOSTRAS_TEMPO = 500
+
+
+class DadosIndisponiveis(Exception):
+    """Student data file missing or empty"""
+
+
+def versao_dados(caminho=CAMINHO_DADOS):
+    """Dataset version: changes whenever the CSV file is rewritten"""
+    try:
+        info = os.stat(caminho)
+        return f"{info.st_mtime_ns}-{info.st_size}"
+    except OSError:
+        return "indisponivel"
+
+
+class ContextoAluno:
+    """Compact per-session student state
+
+    Error rows are kept as index labels into the dataset shared by all sessions
+    (st.cache_resource), so no DataFrame is copied into session state. Supports
+    the dict-style access used across the app (aluno_data['nome']).
+    """
+
+    __slots__ = ('ra', 'nome', 'turma', 'acertos_port', 'acertos_mat', 'erros_port', 'erros_mat',
+                 'linhas_port', 'linhas_mat', 'df')
+
+    # Shared with every session: not counted in per-session memory
+    COMPARTILHADOS = ('df',)
+
+    def __init__(self, ra, nome, acertos_port, acertos_mat, erros_port, erros_mat, linhas_port, linhas_mat, df, turma=None):
+        self.ra = ra
+        self.nome = nome
+        self.turma = turma
+        self.acertos_port = acertos_port
+        self.acertos_mat = acertos_mat
+        self.erros_port = erros_port
+        self.erros_mat = erros_mat
+        self.linhas_port = linhas_port
+        self.linhas_mat = linhas_mat
+        self.df = df
+
+    @property
+    def erros_port_df(self):
+        return self.df.loc[list(self.linhas_port)]
+
+    @property
+    def erros_mat_df(self):
+        return self.df.loc[list(self.linhas_mat)]
+
+    @property
+    def contexto_aluno(self):
+        """Student context for LU (built on demand)"""
+        erros_port_df = self.erros_port_df
+        erros_mat_df = self.erros_mat_df
+        return {
+            'port_erros': erros_port_df['questao_numero'].tolist(),
+            'mat_erros': erros_mat_df['questao_numero'].tolist(),
+            'conteudos_port': erros_port_df['Conteúdo'].unique().tolist(),
+            'conteudos_mat': erros_mat_df['Conteúdo'].unique().tolist(),
+            'acertos_port': self.acertos_port,
+            'acertos_mat': self.acertos_mat,
+            'erros_port': self.erros_port,
+            'erros_mat': self.erros_mat,
+            'nome': self.nome
+        }
+
+    def __getitem__(self, chave):
+        if chave in self.COMPARTILHADOS or not hasattr(self, chave):
+            raise KeyError(chave)
+        return getattr(self, chave)
+
+    def __contains__(self, chave):
+        return chave not in self.COMPARTILHADOS and hasattr(self, chave)
+
+    def get(self, chave, padrao=None):
+        return self[chave] if chave in self else padrao
+
+
+def construir_dados_aluno(df, ra):
+    """Builds compact student state over the shared dataset; None if RA not found"""
+    aluno_data = df[df['RA'] == ra]
+    if aluno_data.empty:
+        return None
+
+    # Student data
+    port_data = aluno_data[aluno_data['Disciplina'] == 'PORT']
+    mat_data = aluno_data[aluno_data['Disciplina'] == 'MAT']
+
+    return ContextoAluno(
+        ra=ra,
+        nome=str(aluno_data['Nome'].iloc[0]),
+        turma=str(aluno_data['Série'].iloc[0]) if 'Série' in aluno_data.columns else None,
+        acertos_port=int(port_data['acerto'].sum()),
+        acertos_mat=int(mat_data['acerto'].sum()),
+        erros_port=int(port_data['erro'].sum()),
+        erros_mat=int(mat_data['erro'].sum()),
+        linhas_port=tuple(port_data.index[port_data['erro'] == 1].tolist()),
+        linhas_mat=tuple(mat_data.index[mat_data['erro'] == 1].tolist()),
+        df=df
+    )
+
+
+def _registrar_tempo(tipo, segundos):
+    with _tempos_lock:
+        amostras = _tempos_bootstrap[tipo]
+        amostras.append(segundos)
+        if len(amostras) > MAX_AMOSTRAS_TEMPO:
+            del amostras[:len(amostras) - MAX_AMOSTRAS_TEMPO]
+
+
+def obter_aluno_sessao(st, ra, carregar_df, versao=None, ao_construir=None):
+    """Returns student data, computed once per (RA, dataset version) per session
+
+    carregar_df() is only called when the bootstrap has to be rebuilt.
+    ao_construir(aluno_data) runs once per rebuild (gamification, daily bonus).
+    Returns None when the RA does not exist.
+    """
+    inicio = time.perf_counter()
+    versao = versao or versao_dados()
+    chave = (ra, versao)
+
+    if st.session_state.get('bootstrap_chave') == chave and 'aluno_data' in st.session_state:
+        _registrar_tempo('reaproveitado', time.perf_counter() - inicio)
+        return st.session_state.aluno_data
+
+    df = carregar_df()
+    if df is False or df is None or df.empty:
+        raise DadosIndisponiveis("Data file not found or empty")
+
+    aluno_data = construir_dados_aluno(df, ra)
+    if aluno_data is None:
+        st.session_state.pop('bootstrap_chave', None)
+        return None
+
+    st.session_state.aluno_data = aluno_data
+    st.session_state.bootstrap_chave = chave
+    if ao_construir is not None:
+        ao_construir(aluno_data)
+
+    _registrar_tempo('completo', time.perf_counter() - inicio)
+    return aluno_data
+
+
+def estatisticas_bootstrap():
+    """Mean/max bootstrap time (ms) for full rebuilds vs reused sessions"""
+    with _tempos_lock:
+        copia = {tipo: list(valores) for tipo, valores in _tempos_bootstrap.items()}
+    return [
+        {
+            'tipo': tipo,
+            'amostras': len(valores),
+            'media_ms': round(sum(valores) / len(valores) * 1000, 3) if valores else 0.0,
+            'max_ms': round(max(valores) * 1000, 3) if valores else 0.0
+        }
+        for tipo, valores in copia.items()
+    ]
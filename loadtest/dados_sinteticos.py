@@ -0,0 +1,46 @@
+# =============================================================================
+# SYNTHETIC STUDENT DATASET (SAME COLUMNS AS desempenho_alunos_questoes.csv)
+# =============================================================================
+
+import numpy as np
+import pandas as pd
+
+CONTEUDOS = {
+    'PORT': ['Text interpretation', 'Figures of speech', 'Punctuation', 'Verbal agreement',
+             'Textual genres', 'Cohesion and coherence'],
+    'MAT': ['Functions', 'Arithmetic progressions', 'Plane geometry', 'Statistics',
+            'Probability', 'Trigonometry']
+}
+QUESTOES_POR_DISCIPLINA = 18
+
+
+def gerar_dados_sinteticos(n_alunos=200, n_turmas=4, semente=42):
+    """Generates one row per (student, subject, question) with simulated answers"""
+    rng = np.random.default_rng(semente)
+    ras = np.arange(100000000, 100000000 + n_alunos)
+    turmas = np.array([f"3{chr(ord('A') + i)}" for i in range(n_turmas)])[rng.integers(0, n_turmas, n_alunos)]
+
+    blocos = []
+    for disciplina, conteudos in CONTEUDOS.items():
+        questoes = np.arange(1, QUESTOES_POR_DISCIPLINA + 1)
+        # Student ability and question difficulty on a logit scale
+        habilidade = rng.normal(0, 1, n_alunos)[:, None]
+        dificuldade = rng.normal(0, 1, QUESTOES_POR_DISCIPLINA)[None, :]
+        acerto = (rng.random((n_alunos, QUESTOES_POR_DISCIPLINA)) < 1 / (1 + np.exp(dificuldade - habilidade))).astype(int)
+
+        conteudo_questao = np.array(conteudos)[(questoes - 1) % len(conteudos)]
+        blocos.append(pd.DataFrame({
+            'RA': np.repeat(ras, QUESTOES_POR_DISCIPLINA),
+            'Nome': np.repeat([f"Student {ra}" for ra in ras], QUESTOES_POR_DISCIPLINA),
+            'Série': np.repeat(turmas, QUESTOES_POR_DISCIPLINA),
+            'Disciplina': disciplina,
+            'questao_numero': np.tile(questoes, n_alunos),
+            'acerto': acerto.ravel(),
+            'erro': 1 - acerto.ravel(),
+            'Conteúdo': np.tile(conteudo_questao, n_alunos),
+            'Descritor': np.tile([f"D{q:02d}" for q in questoes], n_alunos),
+            'Aula': np.tile([f"https://example.com/aula/{disciplina}/{q}" for q in questoes], n_alunos),
+            'Questão': np.tile([f"https://example.com/questao/{disciplina}/{q}" for q in questoes], n_alunos)
+        }))
+
+    return pd.concat(blocos, ignore_index=True)
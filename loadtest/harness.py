@@ -0,0 +1,255 @@
+# =============================================================================
+# CONCURRENT-STUDENT LOAD TEST HARNESS
+# =============================================================================
+#
+# Simulates N students going through the main app flow against the mock LLM:
+#   login -> dashboard -> open wrong questions -> ask FABI -> chat with LU
+# and reports p50/p95/p99 latency per step. Each step calls the same functions
+# the app uses (session bootstrap, deadline + hedge + scheduler, LU memory,
+# BM25 grounding); only Streamlit rendering is left out.
+#
+# Usage:
+#   python -m loadtest.harness --alunos 40 --media-ms 1200 --taxa-429 0.05
+#   python -m loadtest.harness --alunos 40 --base-url http://127.0.0.1:8765/v1
+
+import argparse
+import random
+import threading
+import time
+import types
+from collections import defaultdict
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from openai import OpenAI
+
+from graphs.graphs import grafico_velocimetro_cache, grafico_conteudos_prioritarios_cache, relatorio_cache_figuras
+from helpers.estatistica import percentil
+from helpers.sessao import obter_aluno_sessao, versao_dados
+from loadtest.dados_sinteticos import gerar_dados_sinteticos
+from loadtest.mock_server import ConfigMock, iniciar_servidor_mock
+from questions_analysis.indice import IndiceBM25, indexar_catalogo, contexto_material
+from questions_analysis.precompute import catalogo_questoes, obter_explicacao
+from tutor.memoria import MemoriaConversa, criar_resumidor_openai
+from tutor.prompts import criar_mensagens_professor_ia, prompt_sistema_lu, MODELO_PADRAO
+from tutor.resiliencia import chamar_modelo_com_prazo, metricas_resiliencia
+from tutor.scheduler import AgendadorTutor
+from tutor.telemetry import Telemetria, RECURSO_FABI, RECURSO_LU
+
+ETAPAS = ['login', 'dashboard', 'abrir_questoes', 'fabi', 'lu']
+
+
+class ResultadosCarga:
+    """Thread-safe collection of step latencies (seconds) and errors"""
+
+    def __init__(self):
+        self._tempos = defaultdict(list)
+        self._erros = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def registrar(self, etapa, segundos, erro=None):
+        with self._lock:
+            self._tempos[etapa].append(segundos)
+            if erro:
+                self._erros[etapa] += 1
+
+    def tabela(self):
+        """Returns per-step latency summary as a DataFrame (ms)"""
+        linhas = []
+        for etapa in ETAPAS:
+            tempos = self._tempos.get(etapa, [])
+            linhas.append({
+                'etapa': etapa,
+                'n': len(tempos),
+                'erros': self._erros.get(etapa, 0),
+                'p50_ms': round(percentil(tempos, 50) * 1000, 1),
+                'p95_ms': round(percentil(tempos, 95) * 1000, 1),
+                'p99_ms': round(percentil(tempos, 99) * 1000, 1),
+                'max_ms': round(max(tempos) * 1000, 1) if tempos else 0.0
+            })
+        return pd.DataFrame(linhas)
+
+
+def _medir(resultados, etapa, funcao, *args):
+    inicio = time.perf_counter()
+    try:
+        retorno = funcao(*args)
+        resultados.registrar(etapa, time.perf_counter() - inicio)
+        return retorno
+    except Exception as e:
+        resultados.registrar(etapa, time.perf_counter() - inicio, erro=str(e))
+        return None
+
+
+class _EstadoSessao(dict):
+    """Stand-in for st.session_state (dict with attribute access)"""
+
+    def __getattr__(self, nome):
+        try:
+            return self[nome]
+        except KeyError:
+            raise AttributeError(nome)
+
+    def __setattr__(self, nome, valor):
+        self[nome] = valor
+
+
+class SimuladorAluno:
+    """One student session going through the app flow"""
+
+    def __init__(self, ra, df, client, agendador, explicacoes, indice, telemetria, resultados, pensar_s=0.0,
+                 perguntas_lu=2, semente=None):
+        self.ra = ra
+        self.df = df
+        self.client = client
+        self.agendador = agendador
+        self.explicacoes = explicacoes
+        self.indice = indice
+        self.telemetria = telemetria
+        self.resultados = resultados
+        self.pensar_s = pensar_s
+        self.perguntas_lu = perguntas_lu
+        self.aleatorio = random.Random(semente)
+        self.st = types.SimpleNamespace(session_state=_EstadoSessao())
+        self.versao = versao_dados()
+        self.dados = None
+
+    def _pensar(self):
+        if self.pensar_s:
+            time.sleep(self.aleatorio.uniform(0, self.pensar_s))
+
+    def _bootstrap(self):
+        return obter_aluno_sessao(self.st, self.ra, lambda: self.df, versao=self.versao)
+
+    def login(self):
+        self.dados = self._bootstrap()
+
+    def dashboard(self):
+        # Every widget interaction reruns the script: the bootstrap is reused from the session
+        dados = self._bootstrap()
+        grafico_velocimetro_cache(dados['acertos_port'], "Portuguese", "#10b981", go)
+        grafico_velocimetro_cache(dados['acertos_mat'], "Mathematics", "#3b82f6", go)
+        grafico_conteudos_prioritarios_cache(dados.erros_port_df, dados.erros_mat_df, px, pd, go)
+
+    def abrir_questoes(self):
+        for disciplina, erros in (('PORT', self.dados.erros_port_df), ('MAT', self.dados.erros_mat_df)):
+            for numero in erros['questao_numero']:
+                obter_explicacao(self.explicacoes, disciplina, numero)
+
+    def _chamar(self, recurso, **parametros):
+        with self.telemetria.medir(recurso, '', f"carga-{self.ra}", parametros['model']) as medicao:
+            response = chamar_modelo_com_prazo(recurso, self.client, self.ra, medicao, self.agendador, **parametros)
+            medicao.registrar_resposta(response)
+        return response.choices[0].message.content.strip()
+
+    def fabi(self):
+        erros = pd.concat([self.dados.erros_port_df, self.dados.erros_mat_df])
+        if erros.empty:
+            return
+        row = erros.iloc[self.aleatorio.randrange(len(erros))]
+        # The question PDF is not fetched: its extracted sections are replaced by a solution of similar size
+        material = {'habilidade': row['Descritor'], 'conteudo': row['Conteúdo'],
+                    'resposta_comentada': f"Official solution of question {row['questao_numero']}. " * 40}
+        mensagens, _ = criar_mensagens_professor_ia(material, "How to solve this step by step?",
+                                                    row['Disciplina'], int(row['questao_numero']))
+        self._chamar(RECURSO_FABI, model=MODELO_PADRAO, messages=mensagens, temperature=0.7, max_tokens=800)
+
+    def lu(self):
+        dados = self.dados
+        memoria = MemoriaConversa([{"role": "assistant", "content": f"Hello {dados['nome'].split()[0]}! I'm LU."}])
+        resumidor = criar_resumidor_openai(self.client, self.ra, f"carga-{self.ra}", agendador=self.agendador)
+        conteudos = sorted(set(dados.erros_port_df['Conteúdo']) | set(dados.erros_mat_df['Conteúdo'])) or ['studying']
+        sistema = prompt_sistema_lu(dados['nome'], dados['acertos_port'], dados['acertos_mat'])
+        for i in range(self.perguntas_lu):
+            pergunta = f"Can you explain {self.aleatorio.choice(conteudos)}? (question {i + 1})"
+            memoria.adicionar("user", pergunta)
+            resposta = self._chamar(
+                RECURSO_LU, model=MODELO_PADRAO,
+                messages=memoria.mensagens_para_prompt(sistema, contexto=contexto_material(self.indice, pergunta)),
+                temperature=0.8, max_tokens=400
+            )
+            memoria.adicionar("assistant", resposta, resumidor)
+
+    def executar(self):
+        for etapa in ETAPAS:
+            if etapa != 'login' and self.dados is None:
+                return
+            _medir(self.resultados, etapa, getattr(self, etapa))
+            self._pensar()
+
+
+def executar_carga(n_alunos=40, base_url=None, config_mock=None, pensar_s=0.5, max_concorrencia=8,
+                   requisicoes_por_segundo=20.0, df=None, explicacoes=None, semente=42):
+    """Runs the load test; returns (tabela_latencias, metricas_agendador, estatisticas_mock)
+
+    Per-feature deadlines, hedging and circuit breakers are process-wide: read
+    them with tutor.resiliencia.metricas_resiliencia() after the run.
+    """
+    servidor = None
+    estatisticas_mock = None
+    if base_url is None:
+        servidor, base_url, estatisticas_mock = iniciar_servidor_mock(config_mock or ConfigMock(semente=semente))
+
+    df = df if df is not None else gerar_dados_sinteticos(n_alunos, semente=semente)
+    client = OpenAI(api_key="mock", base_url=base_url, max_retries=2, timeout=60)
+    agendador = AgendadorTutor(max_concorrencia=max_concorrencia, requisicoes_por_segundo=requisicoes_por_segundo,
+                               rajada=max_concorrencia)
+    resultados = ResultadosCarga()
+    telemetria = Telemetria(caminho=None)
+    indice = IndiceBM25()
+    indexar_catalogo(indice, catalogo_questoes(df))
+
+    ras = df['RA'].drop_duplicates().tolist()[:n_alunos]
+    alunos = [SimuladorAluno(ra, df, client, agendador, explicacoes or {}, indice, telemetria, resultados, pensar_s,
+                             semente=semente + i)
+              for i, ra in enumerate(ras)]
+    threads = [threading.Thread(target=a.executar, name=f"aluno-{a.ra}") for a in alunos]
+
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        metricas = agendador.metricas()
+    finally:
+        agendador.encerrar()
+        if servidor is not None:
+            servidor.shutdown()
+
+    if estatisticas_mock is not None:
+        estatisticas_mock = {k: v for k, v in estatisticas_mock.items() if k != 'lock'}
+    return resultados.tabela(), metricas, estatisticas_mock
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-student load test against a mock LLM")
+    parser.add_argument('--alunos', type=int, default=40)
+    parser.add_argument('--base-url', default=None, help="external mock/OpenAI-compatible URL (default: start local mock)")
+    parser.add_argument('--pensar-s', type=float, default=0.5, help="max think time between steps")
+    parser.add_argument('--concorrencia', type=int, default=8)
+    parser.add_argument('--rps', type=float, default=20.0)
+    parser.add_argument('--latencia', choices=['fixa', 'uniforme', 'lognormal'], default='lognormal')
+    parser.add_argument('--media-ms', type=float, default=800)
+    parser.add_argument('--desvio-ms', type=float, default=400)
+    parser.add_argument('--taxa-429', type=float, default=0.0)
+    parser.add_argument('--taxa-timeout', type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = ConfigMock(args.latencia, args.media_ms, args.desvio_ms, args.taxa_429, args.taxa_timeout, tempo_timeout_s=5)
+    inicio = time.perf_counter()
+    tabela, metricas, estatisticas = executar_carga(
+        args.alunos, args.base_url, config, args.pensar_s, args.concorrencia, args.rps
+    )
+
+    print(f"\n📊 Load test: {args.alunos} students in {time.perf_counter() - inicio:.1f}s\n")
+    print(tabela.to_string(index=False))
+    print(f"\n🚦 Scheduler: {metricas}")
+    print(f"⏱️ Deadlines/hedges: {metricas_resiliencia()}")
+    print(f"📈 Figure cache: {relatorio_cache_figuras()}")
+    if estatisticas:
+        print(f"🤖 Mock server: {estatisticas}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+# =============================================================================
+# LOCAL OPENAI-COMPATIBLE MOCK SERVER (LOAD TESTS WITHOUT NETWORK OR COST)
+# =============================================================================
+#
+# Usage:
+#   python -m loadtest.mock_server --porta 8765 --latencia lognormal --media-ms 1200 --taxa-429 0.05
+#
+# Then point the OpenAI client to it:
+#   OpenAI(api_key="mock", base_url="http://127.0.0.1:8765/v1")
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tutor.prompts import contar_tokens
+
+
+class ConfigMock:
+    """Latency distribution and fault injection of the mock server"""
+
+    def __init__(self, latencia='lognormal', media_ms=800, desvio_ms=400, taxa_429=0.0, taxa_timeout=0.0,
+                 tempo_timeout_s=30, tokens_resposta=120, atraso_token_ms=10, semente=None):
+        self.latencia = latencia
+        self.media_ms = media_ms
+        self.desvio_ms = desvio_ms
+        self.taxa_429 = taxa_429
+        self.taxa_timeout = taxa_timeout
+        self.tempo_timeout_s = tempo_timeout_s
+        self.tokens_resposta = tokens_resposta
+        self.atraso_token_ms = atraso_token_ms
+        self.aleatorio = random.Random(semente)
+        self._lock = threading.Lock()
+
+    def sortear_latencia(self):
+        """Draws time to first token in seconds from the configured distribution"""
+        with self._lock:
+            if self.latencia == 'fixa':
+                ms = self.media_ms
+            elif self.latencia == 'uniforme':
+                ms = self.aleatorio.uniform(max(0, self.media_ms - self.desvio_ms), self.media_ms + self.desvio_ms)
+            else:
+                # Lognormal with the requested mean/deviation (long right tail, like real APIs)
+                variancia = math.log(1 + (self.desvio_ms / self.media_ms) ** 2) if self.media_ms else 0
+                mu = math.log(self.media_ms) - variancia / 2 if self.media_ms else 0
+                ms = self.aleatorio.lognormvariate(mu, math.sqrt(variancia)) if self.media_ms else 0
+        return ms / 1000
+
+    def sortear_falha(self):
+        """Returns '429', 'timeout' or None"""
+        with self._lock:
+            sorteio = self.aleatorio.random()
+        if sorteio < self.taxa_429:
+            return '429'
+        if sorteio < self.taxa_429 + self.taxa_timeout:
+            return 'timeout'
+        return None
+
+
+def _texto_resposta(mensagens, n_tokens):
+    pergunta = mensagens[-1]['content'] if mensagens else ''
+    base = f"Mock answer about: {pergunta[:60].strip()}. "
+    palavras = (base + "Step by step explanation with a practical tip. " * n_tokens).split()
+    return ' '.join(palavras[:n_tokens])
+
+
+def criar_handler(config, estatisticas):
+    """Builds request handler class bound to a config"""
+
+    class HandlerMock(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, formato, *args):
+            pass
+
+        def _json(self, status, corpo, cabecalhos=None):
+            dados = json.dumps(corpo).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(dados)))
+            for chave, valor in (cabecalhos or {}).items():
+                self.send_header(chave, valor)
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            if self.path.rstrip('/').endswith('/models'):
+                self._json(200, {'object': 'list', 'data': [{'id': 'gpt-4o-mini', 'object': 'model'}]})
+            else:
+                self._json(404, {'error': {'message': 'not found'}})
+
+        def do_POST(self):
+            tamanho = int(self.headers.get('Content-Length', 0))
+            pedido = json.loads(self.rfile.read(tamanho) or b'{}')
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self._json(404, {'error': {'message': 'not found'}})
+                return
+
+            with estatisticas['lock']:
+                estatisticas['requisicoes'] += 1
+
+            falha = config.sortear_falha()
+            if falha == '429':
+                with estatisticas['lock']:
+                    estatisticas['429'] += 1
+                self._json(429, {'error': {'message': 'Rate limit reached (mock)', 'type': 'requests', 'code': 'rate_limit_exceeded'}},
+                           {'Retry-After': '1'})
+                return
+            if falha == 'timeout':
+                with estatisticas['lock']:
+                    estatisticas['timeouts'] += 1
+                time.sleep(config.tempo_timeout_s)
+                self.close_connection = True
+                return
+
+            time.sleep(config.sortear_latencia())
+
+            mensagens = pedido.get('messages', [])
+            n_tokens = min(config.tokens_resposta, pedido.get('max_tokens') or config.tokens_resposta)
+            texto = _texto_resposta(mensagens, n_tokens)
+            tokens_prompt = sum(contar_tokens(m.get('content', '')) for m in mensagens)
+            modelo = pedido.get('model', 'gpt-4o-mini')
+            id_resposta = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+
+            if pedido.get('stream'):
+                self._stream(id_resposta, modelo, texto)
+                return
+
+            self._json(200, {
+                'id': id_resposta,
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': modelo,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': texto}, 'finish_reason': 'stop'}],
+                'usage': {
+                    'prompt_tokens': tokens_prompt,
+                    'completion_tokens': n_tokens,
+                    'total_tokens': tokens_prompt + n_tokens
+                }
+            })
+
+        def _stream(self, id_resposta, modelo, texto):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+
+            def enviar(delta, fim=None):
+                bloco = {
+                    'id': id_resposta, 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': modelo,
+                    'choices': [{'index': 0, 'delta': delta, 'finish_reason': fim}]
+                }
+                self.wfile.write(f"data: {json.dumps(bloco)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+
+            enviar({'role': 'assistant', 'content': ''})
+            for palavra in texto.split():
+                enviar({'content': palavra + ' '})
+                time.sleep(config.atraso_token_ms / 1000)
+            enviar({}, 'stop')
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+    return HandlerMock
+
+
+def iniciar_servidor_mock(config=None, host='127.0.0.1', porta=0):
+    """Starts mock server in a daemon thread; returns (servidor, base_url, estatisticas)"""
+    config = config or ConfigMock()
+    estatisticas = {'requisicoes': 0, '429': 0, 'timeouts': 0, 'lock': threading.Lock()}
+    servidor = ThreadingHTTPServer((host, porta), criar_handler(config, estatisticas))
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="mock-llm", daemon=True).start()
+    base_url = f"http://{host}:{servidor.server_address[1]}/v1"
+    return servidor, base_url, estatisticas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--latencia', choices=['fixa', 'uniforme', 'lognormal'], default='lognormal')
+    parser.add_argument('--media-ms', type=float, default=800)
+    parser.add_argument('--desvio-ms', type=float, default=400)
+    parser.add_argument('--taxa-429', type=float, default=0.0)
+    parser.add_argument('--taxa-timeout', type=float, default=0.0)
+    parser.add_argument('--tempo-timeout-s', type=float, default=30)
+    parser.add_argument('--tokens-resposta', type=int, default=120)
+    args = parser.parse_args()
+
+    config = ConfigMock(args.latencia, args.media_ms, args.desvio_ms, args.taxa_429, args.taxa_timeout,
+                        args.tempo_timeout_s, args.tokens_resposta)
+    servidor, base_url, _ = iniciar_servidor_mock(config, args.host, args.porta)
+    print(f"🤖 Mock LLM listening on {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+# =============================================================================
+# LOCAL BM25 RETRIEVAL INDEX OVER QUESTION MATERIALS (LU GROUNDING)
+# =============================================================================
+#
+# Indexes the question catalog (Conteúdo / Descritor) and the extracted text of
+# the official question PDFs. Sources are re-indexed only when their text changes.
+#
+# Usage:
+#   python -m questions_analysis.indice              # catalog + PDFs
+#   python -m questions_analysis.indice --sem-pdf    # catalog only
+
+import argparse
+import hashlib
+import heapq
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+from helpers.loader import CAMINHO_DADOS, PASTA_DADOS
+from helpers.persistencia import carregar_pickle, salvar_pickle
+
+CAMINHO_INDICE = os.path.join(PASTA_DADOS, 'indice_materiais.pkl')
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+# Passage size (words) and overlap between consecutive passages
+PALAVRAS_POR_TRECHO = 80
+SOBREPOSICAO = 20
+
+STOPWORDS = set("""
+a o e é de da do das dos em no na nos nas um uma uns umas para por com sem que se ao aos à às
+como mais mas ou seu sua seus suas ele ela eles elas isso isto esse essa este esta qual quais
+the of and to in is are for on with as by an be this that it or from at which what how why
+""".split())
+
+
+def normalizar(texto):
+    """Lowercases and strips accents"""
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def tokenizar(texto):
+    """Splits text into index terms (accent-insensitive, no stopwords)"""
+    return [t for t in re.findall(r"[a-z0-9]{2,}", normalizar(texto or '')) if t not in STOPWORDS]
+
+
+def dividir_em_trechos(texto, palavras=PALAVRAS_POR_TRECHO, sobreposicao=SOBREPOSICAO):
+    """Splits long text into overlapping passages"""
+    tokens = (texto or '').split()
+    if not tokens:
+        return []
+    passo = max(1, palavras - sobreposicao)
+    return [' '.join(tokens[i:i + palavras]) for i in range(0, max(1, len(tokens) - sobreposicao), passo)]
+
+
+class IndiceBM25:
+    """Inverted index with BM25 ranking and incremental per-source updates"""
+
+    def __init__(self):
+        self.postings = {}      # term -> {doc_id: tf}
+        self.documentos = {}    # doc_id -> {'texto', 'fonte', 'metadados', 'tamanho', 'termos'}
+        self.fontes = {}        # fonte -> {'hash', 'docs'}
+        self.total_tamanho = 0
+        self._proximo_id = 0
+        self._lock = threading.RLock()
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        del estado['_lock']
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._lock = threading.RLock()
+
+    # ----- updates -----
+
+    def _remover_fonte(self, fonte):
+        for doc_id in self.fontes.pop(fonte, {}).get('docs', []):
+            doc = self.documentos.pop(doc_id)
+            self.total_tamanho -= doc['tamanho']
+            for termo in doc['termos']:
+                lista = self.postings.get(termo)
+                if lista is not None:
+                    lista.pop(doc_id, None)
+                    if not lista:
+                        del self.postings[termo]
+
+    def atualizar_fonte(self, fonte, texto, metadados=None):
+        """(Re)indexes one source; returns False when its text is unchanged"""
+        assinatura = hashlib.sha1((texto or '').encode('utf-8')).hexdigest()
+        with self._lock:
+            if self.fontes.get(fonte, {}).get('hash') == assinatura:
+                return False
+
+            self._remover_fonte(fonte)
+            docs = []
+            for trecho in dividir_em_trechos(texto):
+                termos = Counter(tokenizar(trecho))
+                if not termos:
+                    continue
+                doc_id = self._proximo_id
+                self._proximo_id += 1
+                tamanho = sum(termos.values())
+                self.documentos[doc_id] = {'texto': trecho, 'fonte': fonte, 'metadados': metadados or {},
+                                           'tamanho': tamanho, 'termos': list(termos)}
+                self.total_tamanho += tamanho
+                for termo, tf in termos.items():
+                    self.postings.setdefault(termo, {})[doc_id] = tf
+                docs.append(doc_id)
+
+            self.fontes[fonte] = {'hash': assinatura, 'docs': docs}
+            return True
+
+    # ----- search -----
+
+    def buscar(self, consulta, k=3, filtro=None):
+        """Returns top-k passages [{'texto', 'score', 'fonte', 'metadados'}]
+
+        filtro(metadados) -> bool optionally restricts candidates (e.g. subject).
+        """
+        with self._lock:
+            n_docs = len(self.documentos)
+            if not n_docs:
+                return []
+            media_tamanho = self.total_tamanho / n_docs
+            scores = {}
+            for termo in set(tokenizar(consulta)):
+                lista = self.postings.get(termo)
+                if not lista:
+                    continue
+                idf = math.log(1 + (n_docs - len(lista) + 0.5) / (len(lista) + 0.5))
+                for doc_id, tf in lista.items():
+                    tamanho = self.documentos[doc_id]['tamanho']
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (
+                        tf + K1 * (1 - B + B * tamanho / media_tamanho))
+
+            if filtro is not None:
+                scores = {d: s for d, s in scores.items() if filtro(self.documentos[d]['metadados'])}
+
+            melhores = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [{'texto': self.documentos[d]['texto'], 'score': round(s, 3),
+                     'fonte': self.documentos[d]['fonte'], 'metadados': self.documentos[d]['metadados']}
+                    for d, s in melhores]
+
+
+# ----- persistence -----
+
+def carregar_indice(caminho=CAMINHO_INDICE):
+    """Loads index from disk (empty index if missing or unreadable)"""
+    indice = carregar_pickle(caminho, "materials index")
+    return indice if indice is not None else IndiceBM25()
+
+
+def salvar_indice(indice, caminho=CAMINHO_INDICE):
+    """Writes index atomically"""
+    with indice._lock:
+        salvar_pickle(indice, caminho)
+
+
+# ----- sources -----
+
+def indexar_catalogo(indice, catalogo):
+    """Indexes Conteúdo/Descritor of each question; returns number of updated sources"""
+    atualizadas = 0
+    for _, row in catalogo.iterrows():
+        texto = f"Question {int(row['questao_numero'])} ({row['Disciplina']}). Content: {row['Conteúdo']}. Descriptor: {row.get('Descritor', '')}"
+        metadados = {'disciplina': row['Disciplina'], 'questao_numero': int(row['questao_numero']), 'tipo': 'catalogo'}
+        atualizadas += indice.atualizar_fonte(f"catalogo:{row['Disciplina']}:{int(row['questao_numero'])}", texto, metadados)
+    return atualizadas
+
+
+def indexar_pdfs(indice, catalogo, ler_texto, apenas_novos=False):
+    """Indexes extracted PDF text of each question; returns number of updated sources"""
+    atualizadas = 0
+    for _, row in catalogo.iterrows():
+        url = row.get('Questão')
+        if not isinstance(url, str):
+            continue
+        fonte = f"pdf:{url}"
+        if apenas_novos and fonte in indice.fontes:
+            continue
+        texto = ler_texto(url)
+        if texto:
+            metadados = {'disciplina': row['Disciplina'], 'questao_numero': int(row['questao_numero']), 'tipo': 'pdf'}
+            atualizadas += indice.atualizar_fonte(fonte, texto, metadados)
+    return atualizadas
+
+
+def formatar_trechos(trechos):
+    """Formats retrieved passages for a prompt"""
+    return "\n\n".join(
+        f"[{t['metadados'].get('disciplina', '')} Q{t['metadados'].get('questao_numero', '')}] {t['texto']}" for t in trechos
+    )
+
+
+def contexto_material(indice, pergunta, k=3):
+    """Grounding context with the k most relevant passages for the question, or None"""
+    trechos = indice.buscar(pergunta, k=k)
+    if not trechos:
+        return None
+    return "OFFICIAL QUESTION MATERIAL (use if relevant, cite the question number):\n" + formatar_trechos(trechos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build/refresh the local BM25 index over question materials")
+    parser.add_argument('--dados', default=CAMINHO_DADOS)
+    parser.add_argument('--saida', default=CAMINHO_INDICE)
+    parser.add_argument('--sem-pdf', action='store_true', help="index only the Conteúdo/Descritor catalog")
+    parser.add_argument('--apenas-novos', action='store_true', help="do not re-download PDFs already indexed")
+    args = parser.parse_args()
+
+    import pandas as pd
+    from questions_analysis.precompute import catalogo_questoes
+
+    catalogo = catalogo_questoes(pd.read_csv(args.dados))
+    indice = carregar_indice(args.saida)
+
+    inicio = time.perf_counter()
+    atualizadas = indexar_catalogo(indice, catalogo)
+    if not args.sem_pdf:
+        from questions_analysis.materiais import ler_pdf_gdrive_direto
+        atualizadas += indexar_pdfs(indice, catalogo, ler_pdf_gdrive_direto, args.apenas_novos)
+    salvar_indice(indice, args.saida)
+
+    print(f"✅ Index: {len(indice.documentos)} passages, {len(indice.postings)} terms, "
+          f"{atualizadas} sources updated ({time.perf_counter() - inicio:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# =============================================================================
+# QUESTION MATERIALS (OFFICIAL PDFs ON GOOGLE DRIVE)
+# =============================================================================
+
+import io
+import re
+
+def extrair_file_id_gdrive(url):
+    """Robustly extracts file ID from Google Drive URL"""
+    
+    patterns = [
+        r"/d/([a-zA-Z0-9_-]{33,44})",
+        r"id=([a-zA-Z0-9_-]{33,44})",
+        r"open\?id=([a-zA-Z0-9_-]{33,44})",
+        r"file/d/([a-zA-Z0-9_-]+)",
+    ]
+    
+    for pattern in patterns:
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    
+    return None
+
+def ler_pdf_gdrive_direto(url):
+    """Reads PDF directly from Google Drive with improved method"""
+    # Heavy dependencies loaded on first use only (most sessions never open a PDF)
+    import PyPDF2
+    import pdfplumber
+    import requests
+    
+    try:
+        file_id = extrair_file_id_gdrive(url)
+        if not file_id:
+            print("❌ Could not extract file ID")
+            return None
+        
+        # URL for direct download
+        download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
+        
+        # Headers to avoid blocking
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Accept': 'application/pdf, text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+        }
+        
+        # Download with longer timeout
+        response = requests.get(download_url, headers=headers, timeout=45)
+        response.raise_for_status()
+        
+        # Check if it's PDF
+        content_type = response.headers.get('content-type', '').lower()
+        is_pdf = 'pdf' in content_type or response.content[:4] == b'%PDF'
+        
+        if not is_pdf:
+            # Might be an HTML page (Google Drive asking for confirmation)
+            if 'text/html' in content_type and 'google' in response.text.lower():
+                # Try to extract real download link
+                match = re.search(r'confirm=([^&]+)', response.text)
+                if match:
+                    confirm_code = match.group(1)
+                    download_url = f"https://drive.google.com/uc?export=download&id={file_id}&confirm={confirm_code}"
+                    response = requests.get(download_url, headers=headers, timeout=45)
+                    response.raise_for_status()
+        
+        # Process in memory
+        pdf_file = io.BytesIO(response.content)
+        
+        # First try with pdfplumber (more robust)
+        try:
+            with pdfplumber.open(pdf_file) as pdf:
+                texto = ""
+                for i, page in enumerate(pdf.pages):
+                    page_text = page.extract_text()
+                    if page_text:
+                        texto += f"--- Page {i+1} ---\n{page_text}\n\n"
+                
+                if texto.strip():
+                    return texto
+        except:
+            pass
+        
+        # Fallback to PyPDF2
+        try:
+            pdf_file.seek(0)
+            reader = PyPDF2.PdfReader(pdf_file)
+            texto = ""
+            for i, page in enumerate(reader.pages):
+                page_text = page.extract_text()
+                if page_text:
+                    texto += f"--- Page {i+1} ---\n{page_text}\n\n"
+            
+            return texto if texto.strip() else None
+        except:
+            return None
+            
+    except Exception as e:
+        print(f"❌ Error reading PDF from Google Drive: {e}")
+        return None
@@ -0,0 +1,178 @@
+# =============================================================================
+# BATCH PRECOMPUTATION OF GENERIC QUESTION EXPLANATIONS
+# =============================================================================
+#
+# The initial analysis of a question only depends on the question itself
+# (subject, number, content), so it is generated once per
+# (Disciplina, questao_numero) ahead of time and served instantly by the app.
+#
+# Usage:
+#   python -m questions_analysis.precompute --paralelo 4
+#   python -m questions_analysis.precompute --local      # stand-in model, no network
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from helpers.loader import CAMINHO_DADOS, PASTA_DADOS
+from helpers.persistencia import arquivo_atomico
+from questions_analysis.qest_analysis import criar_prompt_analise_inicial
+
+CAMINHO_EXPLICACOES = os.path.join(PASTA_DADOS, 'explicacoes_questoes.json')
+PARALELISMO_PADRAO = 4
+
+NOMES_DISCIPLINAS = {'PORT': 'Portuguese', 'MAT': 'Mathematics'}
+
+
+def chave_explicacao(disciplina, numero_questao):
+    """Storage key for a question ('PORT:3')"""
+    return f"{disciplina}:{int(numero_questao)}"
+
+
+def catalogo_questoes(df):
+    """Returns one row per (Disciplina, questao_numero) with its content and material link"""
+    colunas = [c for c in ['Disciplina', 'questao_numero', 'Conteúdo', 'Descritor', 'Questão'] if c in df.columns]
+    return df[colunas].drop_duplicates(subset=['Disciplina', 'questao_numero']).sort_values(['Disciplina', 'questao_numero'])
+
+
+# ----- generators (pluggable model) -----
+
+def gerador_openai(client, modelo="gpt-4o-mini"):
+    """Returns generator that calls OpenAI chat completions"""
+    def gerar(prompt):
+        response = client.chat.completions.create(
+            model=modelo,
+            messages=[
+                {"role": "system", "content": "You are a specialized tutor."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=400
+        )
+        return response.choices[0].message.content.strip()
+    gerar.modelo = modelo
+    return gerar
+
+
+def gerador_local(prompt):
+    """Deterministic stand-in model (tests and offline runs)"""
+    linhas = [l.strip() for l in prompt.strip().splitlines() if l.strip()]
+    titulo = next((l for l in linhas if l.startswith('QUESTION')), 'QUESTION')
+    return f"**🔍 {titulo.rstrip(':')}**\n\n1. Read the statement carefully\n2. Identify what is being asked\n3. Recall the main concepts\n4. Apply them step by step"
+
+gerador_local.modelo = "local"
+
+
+# ----- storage -----
+
+def carregar_explicacoes(caminho=CAMINHO_EXPLICACOES):
+    """Loads stored explanations ({} if the file does not exist yet)"""
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def salvar_explicacoes(explicacoes, caminho=CAMINHO_EXPLICACOES):
+    """Writes explanations atomically (temp file + rename)"""
+    with arquivo_atomico(caminho, 'w', encoding='utf-8') as f:
+        json.dump(explicacoes, f, ensure_ascii=False, indent=2)
+
+
+def obter_explicacao(explicacoes, disciplina, numero_questao):
+    """Returns stored explanation text for a question, or None"""
+    registro = explicacoes.get(chave_explicacao(disciplina, numero_questao))
+    return registro['explicacao'] if registro else None
+
+
+# ----- batch job -----
+
+def gerar_explicacoes(catalogo, gerar, ler_texto=None, existentes=None, paralelo=PARALELISMO_PADRAO, forcar=False):
+    """Generates explanations for every catalog question with bounded parallelism
+
+    gerar(prompt) -> text is the model; ler_texto(url) -> text (optional) reads
+    the question material. Questions already in `existentes` with the same
+    content are skipped unless forcar=True. Returns (explicacoes, falhas).
+    """
+    explicacoes = dict(existentes or {})
+    falhas = {}
+
+    pendentes = []
+    for _, row in catalogo.iterrows():
+        chave = chave_explicacao(row['Disciplina'], row['questao_numero'])
+        existente = explicacoes.get(chave)
+        if forcar or existente is None or existente.get('conteudo') != row['Conteúdo']:
+            pendentes.append(row)
+
+    def processar(row):
+        disciplina = NOMES_DISCIPLINAS.get(row['Disciplina'], row['Disciplina'])
+        texto_questao = ''
+        if ler_texto is not None and isinstance(row.get('Questão'), str):
+            texto_questao = ler_texto(row['Questão']) or ''
+        if not texto_questao:
+            texto_questao = f"Descriptor: {row.get('Descritor', '')}"
+
+        prompt = criar_prompt_analise_inicial(texto_questao, disciplina, row['Conteúdo'], int(row['questao_numero']))
+        return gerar(prompt)
+
+    with ThreadPoolExecutor(max_workers=max(1, paralelo)) as executor:
+        futuros = {executor.submit(processar, row): row for row in pendentes}
+        for futuro in as_completed(futuros):
+            row = futuros[futuro]
+            chave = chave_explicacao(row['Disciplina'], row['questao_numero'])
+            try:
+                explicacoes[chave] = {
+                    'disciplina': row['Disciplina'],
+                    'questao_numero': int(row['questao_numero']),
+                    'conteudo': row['Conteúdo'],
+                    'explicacao': futuro.result(),
+                    'modelo': getattr(gerar, 'modelo', 'desconhecido'),
+                    'gerado_em': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                }
+            except Exception as e:
+                falhas[chave] = str(e)[:200]
+
+    return explicacoes, falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute generic explanations for every question")
+    parser.add_argument('--dados', default=CAMINHO_DADOS, help="student/question CSV")
+    parser.add_argument('--saida', default=CAMINHO_EXPLICACOES, help="JSON file with explanations")
+    parser.add_argument('--paralelo', type=int, default=PARALELISMO_PADRAO, help="max concurrent model calls")
+    parser.add_argument('--forcar', action='store_true', help="regenerate questions already stored")
+    parser.add_argument('--local', action='store_true', help="use the local stand-in model (no network)")
+    parser.add_argument('--sem-pdf', action='store_true', help="do not download question PDFs")
+    args = parser.parse_args()
+
+    import pandas as pd
+    catalogo = catalogo_questoes(pd.read_csv(args.dados))
+
+    if args.local:
+        gerar = gerador_local
+    else:
+        from openai import OpenAI
+        gerar = gerador_openai(OpenAI(api_key=os.getenv('OPENAI_API_KEY')))
+
+    ler_texto = None
+    if not args.sem_pdf:
+        from questions_analysis.materiais import ler_pdf_gdrive_direto
+        ler_texto = ler_pdf_gdrive_direto
+
+    inicio = time.perf_counter()
+    explicacoes, falhas = gerar_explicacoes(
+        catalogo, gerar, ler_texto=ler_texto, existentes=carregar_explicacoes(args.saida),
+        paralelo=args.paralelo, forcar=args.forcar
+    )
+    salvar_explicacoes(explicacoes, args.saida)
+
+    print(f"✅ {len(explicacoes)} explanations stored in {args.saida} ({time.perf_counter() - inicio:.1f}s)")
+    for chave, erro in falhas.items():
+        print(f"❌ {chave}: {erro}")
+
+
+if __name__ == '__main__':
+    main()
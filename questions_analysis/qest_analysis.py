@@ -2,11 +2,35 @@
 # QUESTION ANALYSIS FUNCTIONS - UPDATED
 # =============================================================================
 
+from tutor.telemetry import Medicao, obter_telemetria, RECURSO_ANALISE
+
+def criar_prompt_analise_inicial(texto_questao, disciplina, conteudo, numero_questao, contexto_aluno=None):
+    """Creates initial analysis prompt (generic when contexto_aluno is None)"""
+    linha_contexto = ""
+    if contexto_aluno:
+        linha_contexto = f"\n            STUDENT CONTEXT: {contexto_aluno['nome']} has difficulty in {contexto_aluno['conteudos_port'][:1] if contexto_aluno['conteudos_port'] else 'some contents'}\n"
+    
+    return f"""
+            You are a {disciplina} tutor specialized for high school. 
+            
+            QUESTION {numero_questao} - {conteudo}:
+            {texto_questao[:1500]}
+            {linha_contexto}
+            Provide an initial analysis that:
+            1. Identifies what the question is asking
+            2. Highlights the main concepts of {conteudo}
+            3. Suggests a solving strategy
+            4. Indicates where the student might have doubts
+            
+            Be clear and direct. Use maximum 400 words.
+            """
+
 def analisar_questao_com_professor_ia(texto_questao, disciplina, conteudo, contexto_aluno, numero_questao, OPENAI_AVAILABLE, openai, st, os):
     """Complete analysis with option to consult AI Professor"""
     
     # First, basic analysis
     if OPENAI_AVAILABLE:
+        medicao = Medicao(RECURSO_ANALISE, disciplina, st.session_state.get('sessao_id', ''), "gpt-4o-mini")
         try:
             from openai import OpenAI
             
@@ -24,22 +48,7 @@ def analisar_questao_com_professor_ia(texto_questao, disciplina, conteudo, conte
             
             client = OpenAI(api_key=api_key)
             
-            prompt = f"""
-            You are a {disciplina} tutor specialized for high school. 
-            
-            QUESTION {numero_questao} - {conteudo}:
-            {texto_questao[:1500]}
-            
-            STUDENT CONTEXT: {contexto_aluno['nome']} has difficulty in {contexto_aluno['conteudos_port'][:1] if contexto_aluno['conteudos_port'] else 'some contents'}
-            
-            Provide an initial analysis that:
-            1. Identifies what the question is asking
-            2. Highlights the main concepts of {conteudo}
-            3. Suggests a solving strategy
-            4. Indicates where the student might have doubts
-            
-            Be clear and direct. Use maximum 400 words.
-            """
+            prompt = criar_prompt_analise_inicial(texto_questao, disciplina, conteudo, numero_questao, contexto_aluno)
             
             response = client.chat.completions.create(
                 model="gpt-4o-mini",
@@ -50,10 +59,12 @@ def analisar_questao_com_professor_ia(texto_questao, disciplina, conteudo, conte
                 temperature=0.7,
                 max_tokens=400
             )
+            medicao.registrar_resposta(response)
             
             analise_basica = response.choices[0].message.content.strip()
             
-        except:
+        except Exception as e:
+            medicao.usar_fallback(e)
             analise_basica = f"""
             **🔍 Analysis of Question {numero_questao} - {disciplina}**
             
@@ -67,6 +78,8 @@ def analisar_questao_com_professor_ia(texto_questao, disciplina, conteudo, conte
             
             **Tip:** Use AI Professor (button below) to ask specific questions about this question!
             """
+        finally:
+            obter_telemetria().registrar(medicao.como_registro())
     else:
         analise_basica = f"""
         **🔍 Question {numero_questao} - {conteudo} ({disciplina})**
@@ -0,0 +1,133 @@
+import sqlite3
+import threading
+
+from gamefic import armazem as armazem_mod
+from gamefic.armazem import ArmazemGamificacao
+
+
+def _estado(pontos):
+    return {'pontos': pontos, 'nivel': 1, 'streak_dias': 1, 'ultimo_acesso': '2024-01-01', 'questoes_revisadas': 2,
+            'metas_concluidas': 0, 'perguntas_professor': 0, 'dias_estudando': 1, 'conquistas': ['primeira_revisao']}
+
+
+class _Ocupada:
+    """Connection whose writes always hit a locked database"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        return False
+
+    def executemany(self, *args):
+        raise sqlite3.OperationalError("database is locked")
+
+
+def _armazem(tmp_path):
+    # Long interval: only explicit flush/encerrar write
+    return ArmazemGamificacao(str(tmp_path / 'gamificacao.db'), intervalo_flush=60)
+
+
+def test_leitura_ve_escrita_pendente_e_flush_persiste(tmp_path):
+    armazem = _armazem(tmp_path)
+    armazem.salvar(1, _estado(10))
+    armazem.salvar(1, _estado(25))
+    assert armazem.metricas()['pendentes'] == 1
+    assert armazem.carregar(1)['pontos'] == 25
+
+    armazem.flush()
+    assert armazem.metricas()['pendentes'] == 0
+    assert armazem.metricas()['linhas_gravadas'] == 1
+    armazem.encerrar()
+
+    reaberto = _armazem(tmp_path)
+    assert reaberto.carregar(1) == _estado(25)
+    assert reaberto.todos() == {1: 25}
+    reaberto.encerrar()
+
+
+def test_encerrar_grava_pendentes(tmp_path):
+    armazem = _armazem(tmp_path)
+    for ra in range(20):
+        armazem.salvar(ra, _estado(ra))
+    armazem.encerrar()
+
+    reaberto = _armazem(tmp_path)
+    assert reaberto.todos() == {ra: ra for ra in range(20)}
+    reaberto.encerrar()
+
+
+def test_erro_transitorio_mantem_lote_para_o_proximo_flush(tmp_path):
+    armazem = _armazem(tmp_path)
+    armazem.salvar(1, _estado(10))
+
+    conexao = armazem._conexao()
+    armazem._local.conexao = _Ocupada()
+    armazem.flush()
+    assert armazem.metricas()['erros'] == 1
+    assert armazem.metricas()['pendentes'] == 1
+
+    armazem._local.conexao = conexao
+    armazem.flush()
+    assert armazem.metricas()['pendentes'] == 0
+    armazem.encerrar()
+    reaberto = _armazem(tmp_path)
+    assert reaberto.carregar(1)['pontos'] == 10
+    reaberto.encerrar()
+
+
+def test_lote_misto_grava_validos_e_descarta_so_o_invalido(tmp_path):
+    armazem = _armazem(tmp_path)
+    armazem.salvar(1, _estado(10))
+    armazem.salvar(2, _estado(None))
+    armazem.salvar(3, _estado(30))
+    armazem.flush()
+    metricas = armazem.metricas()
+    assert metricas['erros'] == 1
+    assert metricas['descartados'] == 1
+    assert metricas['pendentes'] == 0 and metricas['em_voo'] == 0
+    assert armazem.todos() == {1: 10, 3: 30}
+    assert armazem.carregar(2) is None
+    armazem.encerrar()
+
+
+def test_erro_transitorio_desiste_apos_max_tentativas(tmp_path, monkeypatch):
+    monkeypatch.setattr(armazem_mod, 'MAX_TENTATIVAS', 3)
+    armazem = _armazem(tmp_path)
+    armazem.salvar(1, _estado(10))
+    armazem._local.conexao = _Ocupada()
+    for tentativa in range(1, 3):
+        armazem.flush()
+        assert armazem.metricas()['pendentes'] == 1
+        assert armazem._falhas_seguidas == tentativa
+    armazem.flush()
+    metricas = armazem.metricas()
+    assert metricas['pendentes'] == 0
+    assert metricas['descartados'] == 1
+    assert metricas['erros'] == 3
+    armazem.encerrar()
+
+
+def test_leitura_ve_linha_em_voo_ate_o_commit(tmp_path):
+    armazem = _armazem(tmp_path)
+    armazem.salvar(1, _estado(10))
+    gravando, liberar = threading.Event(), threading.Event()
+    executar = armazem._executar
+
+    def _executar_lento(linhas):
+        gravando.set()
+        liberar.wait(5)
+        executar(linhas)
+
+    armazem._executar = _executar_lento
+    escritor = threading.Thread(target=armazem.flush)
+    escritor.start()
+    assert gravando.wait(5)
+    assert armazem.metricas()['pendentes'] == 0
+    assert armazem.metricas()['em_voo'] == 1
+    assert armazem.carregar(1)['pontos'] == 10
+    assert armazem.todos() == {1: 10}
+    liberar.set()
+    escritor.join(5)
+    assert armazem.metricas()['em_voo'] == 0
+    assert armazem.carregar(1)['pontos'] == 10
+    armazem.encerrar()
@@ -0,0 +1,110 @@
+import hashlib
+
+import pytest
+
+from helpers import assets
+
+
+class _Estado(dict):
+    def __getattr__(self, nome):
+        try:
+            return self[nome]
+        except KeyError:
+            raise AttributeError(nome)
+
+    def __setattr__(self, nome, valor):
+        self[nome] = valor
+
+
+class _St:
+    """Records what a rerun sends to the browser"""
+
+    def __init__(self, servindo=True):
+        self.session_state = _Estado()
+        self.servindo = servindo
+        self.enviados = []
+
+    def get_option(self, nome):
+        assert nome == 'server.enableStaticServing'
+        return self.servindo
+
+    def markdown(self, texto, unsafe_allow_html=False):
+        self.enviados.append(('markdown', texto))
+
+    def image(self, dados, width=None):
+        self.enviados.append(('image', dados))
+
+    def html(self, bloco, height=None):
+        self.enviados.append(('html', bloco))
+
+
+@pytest.fixture(autouse=True)
+def estado_limpo(monkeypatch, tmp_path):
+    monkeypatch.setattr(assets, '_bytes_imagens', {})
+    monkeypatch.setattr(assets, '_imagens_ausentes', set())
+    monkeypatch.setattr(assets, '_estatisticas', {chave: 0 for chave in assets._estatisticas})
+    monkeypatch.setattr(assets, 'RAIZ_APP', str(tmp_path))
+    monkeypatch.setattr(assets, 'PASTA_STATIC', str(tmp_path / 'static'))
+    (tmp_path / 'static').mkdir()
+    (tmp_path / 'static' / 'lu_ideia.png').write_bytes(b'\x89PNG imagem')
+
+
+def test_minificar_css():
+    css = "<style>\n  /* comment */\n  .a {\n    color: red;\n  }\n</style>"
+    assert assets.minificar_css(css) == "<style> .a{color: red;}</style>"
+
+
+def test_css_enviado_uma_vez_por_sessao():
+    css = assets.pre_renderizar_css("<style>\n .a { color: red; }\n</style>")
+    st = _St()
+    assets.exibir_css(st, css, st.html)
+    assets.exibir_css(st, css, st.html)
+    assert len(st.enviados) == 1
+    tipo, bloco = st.enviados[0]
+    assert tipo == 'html' and '.a{color: red;}' in bloco
+
+    relatorio = assets.relatorio_assets()
+    assert relatorio['reruns'] == 2
+    assert relatorio['css_enviado_ultimo_rerun'] == 0
+    assert relatorio['css_enviado_total'] == len(bloco.encode('utf-8'))
+
+    # New browser session, or a changed stylesheet: sent again
+    outra = _St()
+    assets.exibir_css(outra, css, outra.html)
+    assets.exibir_css(st, css.replace('red', 'blue'), st.html)
+    assert len(outra.enviados) == 1 and len(st.enviados) == 2
+
+
+def test_imagem_por_url_com_hash():
+    st = _St(servindo=True)
+    assets.exibir_imagem(st, 'lu_ideia.png', width=200)
+    assets.exibir_imagem(st, 'lu_ideia.png', width=200)
+
+    assinatura = hashlib.sha1(b'\x89PNG imagem').hexdigest()[:12]
+    assert st.enviados[0] == ('markdown', f'<img src="app/static/lu_ideia.png?v={assinatura}" width="200" alt="lu_ideia.png">')
+    relatorio = assets.relatorio_assets()
+    assert relatorio['imagens_url'] == 2
+    assert relatorio['leituras_disco'] == 1
+
+
+def test_imagem_por_bytes_em_memoria(monkeypatch, tmp_path):
+    # Folder outside the served static/ (APP_STATIC elsewhere): bytes are sent instead
+    outra = tmp_path / 'imagens'
+    outra.mkdir()
+    (outra / 'lu_ideia.png').write_bytes(b'bytes da imagem')
+    monkeypatch.setattr(assets, 'PASTA_STATIC', str(outra))
+    st = _St(servindo=True)
+    assets.exibir_imagem(st, 'lu_ideia.png')
+    assets.exibir_imagem(st, 'lu_ideia.png')
+
+    assert st.enviados == [('image', b'bytes da imagem')] * 2
+    assert assets.relatorio_assets()['leituras_disco'] == 1
+
+
+def test_imagem_ausente_e_ignorada(capsys):
+    st = _St(servindo=False)
+    assets.exibir_imagem(st, 'lu_duvida.png')
+    assets.exibir_imagem(st, 'lu_duvida.png')
+    assert st.enviados == []
+    assert len(capsys.readouterr().out.splitlines()) == 1
+    assert assets.relatorio_assets()['imagens_ausentes'] == 1
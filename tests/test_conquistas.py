@@ -0,0 +1,21 @@
+import itertools
+
+import pytest
+
+from gamefic.conquistas import FEATURES, motor_conquistas
+
+pd = pytest.importorskip("pandas")
+
+
+def test_avaliacao_em_lote_igual_a_individual():
+    # Every combination around the rule thresholds
+    vetores = list(itertools.product([0, 9, 10, 11, 12, 14, 15, 17, 18], [0, 9, 10, 12, 15, 18], [0, 1, 3, 4, 8, 9, 20]))
+    features = pd.DataFrame(vetores, columns=list(FEATURES), index=range(len(vetores)))
+    lote = motor_conquistas.avaliar_lote(features, pd)
+
+    for i, vetor in enumerate(vetores):
+        individuais = motor_conquistas.avaliar(vetor)
+        linha = lote.loc[i]
+        nomes_lote = {linha[grupo] for grupo in motor_conquistas.grupos if pd.notna(linha[grupo])}
+        assert nomes_lote == {regra['nome'] for regra in individuais}, vetor
+        assert linha['pontos_conquistas'] == sum(regra['pontos'] for regra in individuais), vetor
@@ -0,0 +1,69 @@
+import pytest
+
+from analytics.cubo import CuboTurmas
+
+pd = pytest.importorskip("pandas")
+
+
+def _respostas(ras, acertos=None):
+    linhas = []
+    for ra in ras:
+        for numero in range(1, 5):
+            acerto = (acertos or {}).get((ra, numero), int((ra + numero) % 3 != 0))
+            linhas.append({'RA': ra, 'Série': '9A' if ra % 2 else '9B', 'Disciplina': 'MAT', 'questao_numero': numero,
+                           'acerto': acerto, 'Conteúdo': 'Álgebra' if numero < 3 else 'Geometria', 'Descritor': 'D1'})
+    return pd.DataFrame(linhas)
+
+
+def _fatia(cubo):
+    return cubo.fatiar(['Conteúdo', 'Série']).reset_index(drop=True)
+
+
+def test_cubo_incremental_igual_ao_completo():
+    cubo = CuboTurmas(pd)
+    cubo.atualizar(_respostas(range(1, 6)), 'v1')
+    df = _respostas(range(1, 10))
+    assert cubo.atualizar(df, 'v2') == 4
+    completo = CuboTurmas(pd)
+    completo.atualizar(df, 'completo')
+    pd.testing.assert_frame_equal(_fatia(cubo), _fatia(completo))
+    assert cubo.distribuicao.contagens('MAT') == completo.distribuicao.contagens('MAT')
+
+
+def test_cubo_reconstruido_quando_aluno_muda():
+    cubo = CuboTurmas(pd)
+    cubo.atualizar(_respostas(range(1, 6)), 'v1')
+    antes = _fatia(cubo)
+    editado = _respostas(range(1, 6), acertos={(1, 1): 0, (3, 1): 0, (5, 1): 0})
+    assert cubo.atualizar(editado, 'v2') == 5
+    completo = CuboTurmas(pd)
+    completo.atualizar(editado, 'completo')
+    pd.testing.assert_frame_equal(_fatia(cubo), _fatia(completo))
+    assert not _fatia(cubo).equals(antes)
+    assert cubo.distribuicao.resumo('MAT')['n'] == 5
+
+
+def test_colunas_nao_agregadas_nao_invalidam_o_cubo():
+    cubo = CuboTurmas(pd)
+    df = _respostas(range(1, 6))
+    cubo.atualizar(df, 'v1')
+    renomeados = df.assign(Nome='renamed', Aula='https://example.com/nova')
+    assert cubo.atualizar(renomeados, 'v2') == 0
+
+
+def test_atualizacao_em_segundo_plano_grava_view_e_cubo(tmp_path):
+    from analytics import cubo as cubo_mod
+    from analytics.itens import carregar_view
+    from helpers.segundo_plano import aguardar_tarefa
+    from helpers.sessao import versao_dados
+
+    dados = str(tmp_path / 'dados.csv')
+    _respostas(range(1, 6)).to_csv(dados, index=False)
+    caminho_view, caminho_cubo = str(tmp_path / 'view.pkl'), str(tmp_path / 'cubo.pkl')
+
+    assert cubo_mod.atualizar_em_segundo_plano(dados, caminho_view, caminho_cubo)
+    assert aguardar_tarefa(cubo_mod.TAREFA_AGREGADOS, timeout=30)
+    view, cubo = carregar_view(pd, caminho_view), cubo_mod.carregar_cubo(pd, caminho_cubo)
+    assert view.versao == cubo.versao == versao_dados(dados)
+    assert view.assinaturas == cubo.assinaturas
+    assert len(cubo.ras) == 5 and cubo.distribuicao.resumo('MAT')['n'] == 5
@@ -0,0 +1,21 @@
+from analytics.distribuicao import ESCOPO_ESCOLA, DistribuicaoNotas
+
+
+def test_comparar_usa_turma_e_percentil_com_empates():
+    distribuicao = DistribuicaoNotas()
+    for nota, turma in [(10, '9A'), (12, '9A'), (12, '9A'), (18, '9B')]:
+        distribuicao.adicionar('PORT', nota, turma)
+
+    comparacao = distribuicao.comparar('PORT', 12, '9A')
+    assert comparacao['escopo'] == '9A'
+    assert comparacao['percentil'] == round(100 * (1 + 0.5 * 2) / 3, 1)
+    assert comparacao['percentil_escola'] == 50.0
+    assert distribuicao.comparar('PORT', 12, '9C')['escopo'] == ESCOPO_ESCOLA
+
+
+def test_comparar_nao_cria_histogramas():
+    distribuicao = DistribuicaoNotas()
+    comparacao = distribuicao.comparar('MAT', 7, '9A')
+    assert comparacao['percentil'] is None
+    assert comparacao['percentil_escola'] is None
+    assert distribuicao.histogramas == {}
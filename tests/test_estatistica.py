@@ -0,0 +1,13 @@
+from helpers.estatistica import percentil
+
+
+def test_percentil_vazio_e_zero():
+    assert percentil([], 50) == 0.0
+
+
+def test_percentil_rank_mais_proximo():
+    valores = list(range(100, 0, -1))
+    assert percentil(valores, 50) == 50
+    assert percentil(valores, 99) == 99
+    assert percentil(valores, 100) == 100
+    assert percentil(valores, 0) == 1
@@ -0,0 +1,88 @@
+import os
+import time
+import types
+
+from gamefic import game
+from gamefic.armazem import ArmazemGamificacao
+from gamefic.conquistas import motor_conquistas
+from gamefic.eventos import CABECALHO, REGISTRO, RegistroEventos, reproduzir
+
+
+class _Estado(dict):
+    def __getattr__(self, nome):
+        return self[nome]
+
+    def __setattr__(self, nome, valor):
+        self[nome] = valor
+
+
+def test_reproducao_igual_ao_estado_salvo(tmp_path, monkeypatch):
+    armazem = ArmazemGamificacao(str(tmp_path / 'gamificacao.db'), intervalo_flush=60)
+    registro = RegistroEventos(str(tmp_path / 'eventos.bin'), intervalo_flush=60)
+    monkeypatch.setattr(game, 'obter_armazem', lambda: armazem)
+    monkeypatch.setattr(game, 'obter_registro_eventos', lambda: registro)
+
+    aluno = {'acertos_port': 18, 'acertos_mat': 11, 'erros_port_df': [], 'erros_mat_df': [1, 2]}
+    for ra in (101, 202):
+        st = types.SimpleNamespace(session_state=_Estado())
+        game.inicializar_sistema_gamificacao(st, ra)
+        game.registrar_acesso_diario(st, time.strftime("%Y-%m-%d"))
+        for acao in ('revisao_questao', 'revisao_questao', 'pergunta_professor', 'conclusao_meta', 'interacao_lu'):
+            game.atualizar_pontuacao(acao, st=st)
+        game.verificar_conquistas(aluno, st)
+    registro.encerrar()
+    armazem.encerrar()
+
+    reproduzidos = reproduzir(registro.caminho, usar_snapshot=False)
+    leitura = ArmazemGamificacao(armazem.caminho, intervalo_flush=60)
+    for ra in (101, 202):
+        salvo = leitura.carregar(ra)
+        estado = reproduzidos[ra]
+        for campo in ('pontos', 'nivel', 'streak_dias', 'ultimo_acesso', 'questoes_revisadas',
+                      'metas_concluidas', 'perguntas_professor', 'dias_estudando'):
+            assert estado[campo] == salvo[campo], campo
+        assert estado['conquistas'] == [c['nome'] for c in salvo['conquistas']]
+    leitura.encerrar()
+
+
+def test_conquista_gravada_pelo_id_da_regra(tmp_path):
+    registro = RegistroEventos(str(tmp_path / 'eventos.bin'), intervalo_flush=60)
+    regra = motor_conquistas.por_nome["Perfect Balance"]
+    registro.registrar(7, 'conquista_desbloqueada', regra['pontos'], regra['id'])
+    registro.encerrar()
+    assert reproduzir(registro.caminho, 7)[7]['conquistas'] == ["Perfect Balance"]
+
+
+def test_registro_parcial_e_descartado(tmp_path):
+    caminho = str(tmp_path / 'eventos.bin')
+    registro = RegistroEventos(caminho, intervalo_flush=60)
+    registro.registrar(1, 'revisao_questao', 5, timestamp=1700000000)
+    registro.registrar(1, 'revisao_questao', 5, timestamp=1700000100)
+    registro.encerrar()
+
+    # Crash in the middle of an append
+    with open(caminho, 'ab') as f:
+        f.write(REGISTRO.pack(1, 1700000200, 0, 5, 0)[:7])
+    assert reproduzir(caminho, 1)[1]['pontos'] == 10
+
+    registro = RegistroEventos(caminho, intervalo_flush=60)
+    assert os.path.getsize(caminho) == len(CABECALHO) + 2 * REGISTRO.size
+    registro.registrar(1, 'revisao_questao', 5, timestamp=1700000300)
+    registro.encerrar()
+    estado = reproduzir(caminho, 1)[1]
+    assert estado['pontos'] == 15
+    assert estado['questoes_revisadas'] == 3
+
+
+def test_snapshot_mais_cauda_igual_ao_log_completo(tmp_path):
+    caminho = str(tmp_path / 'eventos.bin')
+    registro = RegistroEventos(caminho, intervalo_flush=60, snapshot_a_cada=3)
+    for i in range(5):
+        registro.registrar(i % 2, 'revisao_questao', 5, timestamp=1700000000 + i * 86400)
+    registro.encerrar()
+    registro = RegistroEventos(caminho, intervalo_flush=60, snapshot_a_cada=3)
+    registro.salvar_snapshot()
+    registro.registrar(0, 'pergunta_professor', 8, timestamp=1700000000 + 5 * 86400)
+    registro.encerrar()
+    assert reproduzir(caminho) == reproduzir(caminho, usar_snapshot=False)
+    assert registro.metricas()['snapshots'] == 1
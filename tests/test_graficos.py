@@ -0,0 +1,61 @@
+import pytest
+
+go = pytest.importorskip("plotly.graph_objects")
+
+from graphs.graphs import CacheFiguras, criar_grafico_velocimetro
+
+
+def _construtor(chamadas, acertos):
+    def construir():
+        chamadas.append(acertos)
+        return criar_grafico_velocimetro(acertos, "Portuguese", "#10b981", go)
+    return construir
+
+
+def test_acerto_devolve_figura_igual_sem_reconstruir():
+    cache = CacheFiguras()
+    chamadas = []
+    original = cache.obter('velocimetro', 10, _construtor(chamadas, 10), go)
+    restaurada = cache.obter('velocimetro', 10, _construtor(chamadas, 10), go)
+
+    assert chamadas == [10]
+    assert restaurada.to_dict() == original.to_dict()
+    relatorio = cache.relatorio()[0]
+    assert (relatorio['acertos'], relatorio['falhas'], relatorio['taxa_acerto']) == (1, 1, 0.5)
+
+
+def test_cada_acerto_recebe_figura_propria():
+    cache = CacheFiguras()
+    cache.obter('velocimetro', 10, _construtor([], 10), go)
+    primeira = cache.obter('velocimetro', 10, _construtor([], 10), go)
+    primeira.update_layout(title_text="alterada")
+    segunda = cache.obter('velocimetro', 10, _construtor([], 10), go)
+    assert segunda.layout.title.text != "alterada"
+
+
+def test_figura_nula_e_cacheada():
+    cache = CacheFiguras()
+    chamadas = []
+
+    def construir():
+        chamadas.append(1)
+        return None
+
+    assert cache.obter('conteudos_prioritarios', (), construir, go) is None
+    assert cache.obter('conteudos_prioritarios', (), construir, go) is None
+    assert chamadas == [1]
+
+
+def test_lru_descarta_o_menos_usado():
+    cache = CacheFiguras(maximo=2)
+    chamadas = []
+    for acertos in (1, 2):
+        cache.obter('velocimetro', acertos, _construtor(chamadas, acertos), go)
+    # Touch 1 so that 2 is the least recently used when 3 comes in
+    cache.obter('velocimetro', 1, _construtor(chamadas, 1), go)
+    cache.obter('velocimetro', 3, _construtor(chamadas, 3), go)
+
+    cache.obter('velocimetro', 1, _construtor(chamadas, 1), go)
+    cache.obter('velocimetro', 2, _construtor(chamadas, 2), go)
+    assert chamadas == [1, 2, 3, 2]
+    assert cache.relatorio()[0]['specs_em_cache'] == 2
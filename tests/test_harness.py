@@ -0,0 +1,22 @@
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("plotly")
+pytest.importorskip("openai")
+
+from loadtest.harness import ETAPAS, executar_carga
+from loadtest.mock_server import ConfigMock
+
+
+def test_carga_percorre_o_fluxo_do_app_contra_o_mock():
+    config = ConfigMock('fixa', media_ms=20, desvio_ms=0, tokens_resposta=20, atraso_token_ms=0, semente=1)
+    tabela, metricas, estatisticas = executar_carga(n_alunos=4, config_mock=config, pensar_s=0.0,
+                                                    requisicoes_por_segundo=100.0)
+
+    por_etapa = tabela.set_index('etapa')
+    assert list(por_etapa.index) == ETAPAS
+    assert (por_etapa['n'] == 4).all()
+    assert por_etapa['erros'].sum() == 0
+    # One FABI call and two LU turns per student (coalesced duplicates never reach the server)
+    assert metricas['submetidos'] == 4 * 3
+    assert estatisticas['requisicoes'] == metricas['submetidos'] - metricas['coalescidos']
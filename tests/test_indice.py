@@ -0,0 +1,61 @@
+import math
+
+from questions_analysis.indice import IndiceBM25, carregar_indice, salvar_indice, tokenizar, K1, B
+
+
+def indice_pequeno():
+    indice = IndiceBM25()
+    indice.atualizar_fonte('a', "Frações e números decimais: soma de frações com denominadores diferentes",
+                           {'disciplina': 'MAT'})
+    indice.atualizar_fonte('b', "Interpretação de texto e figuras de linguagem: metáfora e metonímia",
+                           {'disciplina': 'PORT'})
+    indice.atualizar_fonte('c', "Porcentagem e frações na resolução de problemas do cotidiano",
+                           {'disciplina': 'MAT'})
+    return indice
+
+
+def test_tokenizar_ignora_acentos_e_stopwords():
+    assert tokenizar("A Interpretação de Textos") == ['interpretacao', 'textos']
+
+
+def test_ranking_prefere_documento_com_termos_raros():
+    resultados = indice_pequeno().buscar("metáfora no texto", k=3)
+    assert [r['fonte'] for r in resultados] == ['b']
+
+
+def test_score_bm25_confere_com_formula():
+    indice = indice_pequeno()
+    resultado = indice.buscar("frações", k=3)
+    assert {r['fonte'] for r in resultado} == {'a', 'c'}
+
+    n_docs = len(indice.documentos)
+    media = indice.total_tamanho / n_docs
+    idf = math.log(1 + (n_docs - 2 + 0.5) / (2 + 0.5))
+    for r in resultado:
+        doc = next(d for d in indice.documentos.values() if d['fonte'] == r['fonte'])
+        tf = tokenizar(doc['texto']).count('fracoes')
+        esperado = idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * doc['tamanho'] / media))
+        assert r['score'] == round(esperado, 3)
+    # 'a' mentions the term twice in a passage of similar length
+    assert resultado[0]['fonte'] == 'a'
+
+
+def test_filtro_por_metadados():
+    resultados = indice_pequeno().buscar("frações texto", k=3, filtro=lambda m: m['disciplina'] == 'PORT')
+    assert [r['fonte'] for r in resultados] == ['b']
+
+
+def test_atualizacao_incremental_substitui_fonte():
+    indice = indice_pequeno()
+    assert indice.atualizar_fonte('a', "Frações e números decimais: soma de frações com denominadores diferentes") is False
+    assert indice.atualizar_fonte('a', "Geometria plana: área do triângulo") is True
+    assert indice.buscar("decimais") == []
+    assert [r['fonte'] for r in indice.buscar("triângulo")] == ['a']
+    assert indice.total_tamanho == sum(d['tamanho'] for d in indice.documentos.values())
+
+
+def test_persistencia(tmp_path):
+    caminho = str(tmp_path / 'indice.pkl')
+    salvar_indice(indice_pequeno(), caminho)
+    recarregado = carregar_indice(caminho)
+    assert [r['fonte'] for r in recarregado.buscar("metáfora")] == ['b']
@@ -0,0 +1,56 @@
+import pytest
+
+from analytics import irt
+
+np = pytest.importorskip("numpy")
+
+
+def _simular(n_alunos=4000, n_itens=12, semente=3):
+    aleatorio = np.random.default_rng(semente)
+    theta = aleatorio.normal(size=n_alunos)
+    a = aleatorio.uniform(0.7, 2.0, n_itens)
+    b = np.linspace(-1.5, 1.5, n_itens)
+    p = 1 / (1 + np.exp(-(np.outer(theta, a) - a * b)))
+    X = (aleatorio.random(p.shape) < p).astype(float)
+    return X, theta, a, b
+
+
+def test_recupera_parametros_2pl():
+    X, theta, a, b = _simular()
+    a_est, c_est, _, iteracoes = irt.calibrar(np, X, '2pl', tamanho_bloco=1000)
+    assert iteracoes < irt.MAX_ITERACOES
+    assert np.abs(a_est - a).max() < 0.35
+    assert np.abs(-c_est / a_est - b).max() < 0.25
+
+    theta_est = irt.estimar_habilidades(np, X, a_est, c_est)
+    assert np.corrcoef(theta, theta_est)[0, 1] > 0.85
+
+
+def test_recomeco_a_quente_converge_rapido_ao_mesmo_ponto():
+    X, _, _, _ = _simular(n_alunos=2000)
+    a, c, _, iteracoes_frio = irt.calibrar(np, X, '2pl')
+    a_q, c_q, _, iteracoes_quente = irt.calibrar(np, X, '2pl', inicial=(a, c))
+    assert iteracoes_quente < iteracoes_frio
+    assert np.abs(a_q - a).max() < 0.01
+    assert np.abs(c_q - c).max() < 0.01
+
+
+def test_recalibracao_em_segundo_plano_grava_versao(tmp_path):
+    pd = pytest.importorskip("pandas")
+    from helpers.sessao import versao_dados
+
+    X, _, _, _ = _simular(n_alunos=300, n_itens=6)
+    linhas = [{'RA': ra, 'Disciplina': 'MAT', 'questao_numero': j + 1, 'acerto': int(X[ra, j])}
+              for ra in range(len(X)) for j in range(X.shape[1])]
+    dados = str(tmp_path / 'dados.csv')
+    pd.DataFrame(linhas).to_csv(dados, index=False)
+    saida = str(tmp_path / 'irt.pkl')
+
+    from helpers.segundo_plano import aguardar_tarefa
+
+    assert irt.recalibrar_em_segundo_plano(dados, saida)
+    assert aguardar_tarefa(irt.TAREFA_RECALIBRACAO, timeout=60)
+    calibracoes, versao = irt.carregar_calibracoes(saida)
+    assert versao == versao_dados(dados)
+    assert set(calibracoes) == {'MAT'}
+    assert len(calibracoes['MAT'].habilidades) == 300
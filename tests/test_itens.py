@@ -0,0 +1,63 @@
+import pytest
+
+from analytics.itens import ViewItens
+
+pd = pytest.importorskip("pandas")
+
+
+def _respostas(ras, acertos=None):
+    linhas = []
+    for ra in ras:
+        for numero in range(1, 5):
+            acerto = (acertos or {}).get((ra, numero), int((ra + numero) % 3 != 0))
+            linhas.append({'RA': ra, 'Nome': f'Aluno {ra}', 'Série': '9A' if ra % 2 else '9B', 'Disciplina': 'MAT',
+                           'questao_numero': numero, 'acerto': acerto, 'erro': 1 - acerto,
+                           'Conteúdo': 'Álgebra' if numero < 3 else 'Geometria'})
+    return pd.DataFrame(linhas)
+
+
+def _completa(df):
+    view = ViewItens(pd)
+    view.atualizar(df, 'completa')
+    return view
+
+
+def _iguais(view, referencia):
+    pd.testing.assert_frame_equal(view.analise_itens(), referencia.analise_itens())
+    pd.testing.assert_frame_equal(view.analise_itens('9A'), referencia.analise_itens('9A'))
+
+
+def test_acrescimo_soma_apenas_alunos_novos():
+    view = ViewItens(pd)
+    assert view.atualizar(_respostas(range(1, 6)), 'v1') == 5
+    assert view.atualizar(_respostas(range(1, 6)), 'v1') is None
+    df = _respostas(range(1, 9))
+    assert view.atualizar(df, 'v2') == 3
+    _iguais(view, _completa(df))
+
+
+def test_edicao_ou_remocao_reconstroi_a_view():
+    view = ViewItens(pd)
+    view.atualizar(_respostas(range(1, 6)), 'v1')
+
+    editado = _respostas(range(1, 6), acertos={(2, 1): 0, (2, 2): 0})
+    assert view.atualizar(editado, 'v2') == 5
+    _iguais(view, _completa(editado))
+
+    removido = _respostas(range(2, 6))
+    assert view.atualizar(removido, 'v3') == 4
+    _iguais(view, _completa(removido))
+    assert set(view.ras) == {2, 3, 4, 5}
+
+
+def test_view_persistida_mantem_versao(tmp_path):
+    from analytics.itens import carregar_view, salvar_view
+
+    view = ViewItens(pd)
+    view.atualizar(_respostas(range(1, 4)), 'v1')
+    caminho = str(tmp_path / 'view.pkl')
+    salvar_view(view, caminho)
+    carregada = carregar_view(pd, caminho)
+    assert carregada.versao == 'v1'
+    assert carregada.atualizar(_respostas(range(1, 4)), 'v1') is None
+    _iguais(carregada, view)
@@ -0,0 +1,45 @@
+import os
+import time
+import types
+
+from helpers import memoria_sessao
+
+
+class _Estado(dict):
+    def __getattr__(self, nome):
+        return self[nome]
+
+    def __setattr__(self, nome, valor):
+        self[nome] = valor
+
+
+def _st():
+    return types.SimpleNamespace(session_state=_Estado())
+
+
+def test_sessao_ativa_nao_e_removida_pela_limpeza(tmp_path, monkeypatch):
+    monkeypatch.setattr(memoria_sessao, 'PASTA_DERRAMAMENTO', str(tmp_path))
+    st = _st()
+    st.session_state['professor_history'] = [{'role': 'user', 'content': 'x' * 2000}]
+    memoria_sessao.aplicar_orcamento(st, 'sessao', orcamento=0)
+    memoria_sessao.aplicar_orcamento(st, 'sessao', orcamento=0)
+    assert 'professor_history' not in st.session_state
+
+    pasta = tmp_path / 'sessao'
+    antigo = time.time() - 2 * memoria_sessao.EXPIRACAO_SESSAO_S
+    os.utime(pasta, (antigo, antigo))
+    memoria_sessao.aplicar_orcamento(st, 'sessao', orcamento=0)
+    assert memoria_sessao.limpar_sessoes_expiradas() == 0
+
+    historico = memoria_sessao.historico_sessao(st, 'professor_history', 'sessao')
+    assert historico[0]['content'] == 'x' * 2000
+
+
+def test_sessao_abandonada_e_removida(tmp_path, monkeypatch):
+    monkeypatch.setattr(memoria_sessao, 'PASTA_DERRAMAMENTO', str(tmp_path))
+    pasta = tmp_path / 'abandonada'
+    pasta.mkdir()
+    antigo = time.time() - 2 * memoria_sessao.EXPIRACAO_SESSAO_S
+    os.utime(pasta, (antigo, antigo))
+    assert memoria_sessao.limpar_sessoes_expiradas() == 1
+    assert not pasta.exists()
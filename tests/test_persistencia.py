@@ -0,0 +1,68 @@
+import multiprocessing
+import os
+import threading
+
+import pytest
+
+from helpers.persistencia import arquivo_atomico, carregar_pickle, salvar_pickle
+
+
+def test_pickle_ida_e_volta(tmp_path):
+    caminho = str(tmp_path / 'sub' / 'dados.pkl')
+    salvar_pickle({'versao': 'v1', 'valores': [1, 2]}, caminho)
+    assert carregar_pickle(caminho, "test data") == {'versao': 'v1', 'valores': [1, 2]}
+    assert carregar_pickle(str(tmp_path / 'faltando.pkl'), "test data") is None
+
+
+def test_falha_na_escrita_mantem_arquivo_anterior(tmp_path):
+    caminho = str(tmp_path / 'dados.txt')
+    with arquivo_atomico(caminho, 'w', encoding='utf-8') as f:
+        f.write('antigo')
+    with pytest.raises(RuntimeError):
+        with arquivo_atomico(caminho, 'w', encoding='utf-8') as f:
+            f.write('pela metade')
+            raise RuntimeError("disk full")
+    with open(caminho, encoding='utf-8') as f:
+        assert f.read() == 'antigo'
+    assert os.listdir(tmp_path) == ['dados.txt']
+
+
+def test_arquivo_corrompido_e_ignorado(tmp_path):
+    caminho = tmp_path / 'dados.pkl'
+    caminho.write_bytes(b'not a pickle')
+    assert carregar_pickle(str(caminho), "test data") is None
+
+
+def _escrever_varias_vezes(caminho, marca, vezes=30):
+    for i in range(vezes):
+        salvar_pickle({'marca': marca, 'i': i, 'carga': [marca] * 20000}, caminho)
+
+
+def test_escritores_concorrentes_nunca_deixam_arquivo_pela_metade(tmp_path):
+    caminho = str(tmp_path / 'dados.pkl')
+    salvar_pickle({'marca': 'inicial', 'i': 0, 'carga': []}, caminho)
+    erros = []
+    parar = threading.Event()
+
+    def ler():
+        while not parar.is_set():
+            dados = carregar_pickle(caminho, "test data")
+            if dados is None or dados['carga'] != [dados['marca']] * len(dados['carga']):
+                erros.append(dados)
+
+    leitor = threading.Thread(target=ler)
+    leitor.start()
+    threads = [threading.Thread(target=_escrever_varias_vezes, args=(caminho, f't{n}')) for n in range(4)]
+    processos = [multiprocessing.get_context('fork').Process(target=_escrever_varias_vezes, args=(caminho, f'p{n}'))
+                 for n in range(2)]
+    for tarefa in threads + processos:
+        tarefa.start()
+    for tarefa in threads + processos:
+        tarefa.join()
+    parar.set()
+    leitor.join()
+
+    assert erros == []
+    assert all(p.exitcode == 0 for p in processos)
+    assert carregar_pickle(caminho, "test data")['i'] == 29
+    assert os.listdir(tmp_path) == ['dados.pkl']
@@ -0,0 +1,54 @@
+import bisect
+import random
+
+from gamefic.placar import ESCOPO_ESCOLA, ListaSaltos, Placar
+
+
+def _conferir(lista, referencia):
+    assert len(lista) == len(referencia)
+    assert lista.primeiros(len(referencia) + 1) == referencia
+    for i, chave in enumerate(referencia):
+        assert lista.posicao(chave) == i
+
+
+def test_lista_saltos_igual_a_lista_ordenada():
+    aleatorio = random.Random(7)
+    lista = ListaSaltos(semente=1)
+    referencia = []
+    for passo in range(2000):
+        chave = (-aleatorio.randint(0, 300), aleatorio.randint(0, 50))
+        if chave in referencia and aleatorio.random() < 0.6:
+            assert lista.remover(chave)
+            referencia.remove(chave)
+        elif chave not in referencia:
+            lista.inserir(chave)
+            bisect.insort(referencia, chave)
+        else:
+            assert lista.posicao(chave) == bisect.bisect_left(referencia, chave)
+        if passo % 250 == 0:
+            _conferir(lista, referencia)
+    _conferir(lista, referencia)
+    assert lista.posicao((1, -1)) is None
+    assert not lista.remover((1, -1))
+
+
+def test_placar_por_escola_e_turma():
+    placar = Placar()
+    placar.atualizar(1, 50, '9A', 'Ana')
+    placar.atualizar(2, 80, '9A', 'Bia')
+    placar.atualizar(3, 80, '9B', 'Caio')
+    placar.atualizar(4, 10, '9B', 'Duda')
+
+    # Ties broken by RA
+    assert [item['ra'] for item in placar.top(4)] == [2, 3, 1, 4]
+    assert placar.ranking(1) == (3, 4)
+    assert placar.ranking(1, '9A') == (2, 2)
+
+    placar.atualizar(4, 100)
+    assert placar.turma(4) == '9B'
+    assert placar.ranking(4) == (1, 4)
+    assert placar.ranking(4, '9B') == (1, 2)
+    assert placar.top(1, '9B') == [{'posicao': 1, 'ra': 4, 'nome': 'Duda', 'pontos': 100}]
+    assert placar.ranking(99) == (None, 0)
+    assert placar.top(3, 'inexistente') == []
+    assert len(placar.escopos[ESCOPO_ESCOLA]) == 4
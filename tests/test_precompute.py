@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+from helpers.sessao import versao_dados
+from questions_analysis.precompute import (
+    carregar_explicacoes, gerador_local, gerar_explicacoes, obter_explicacao, salvar_explicacoes
+)
+
+pd = pytest.importorskip("pandas")
+
+
+def _catalogo(conteudos=None):
+    conteudos = conteudos or {}
+    return pd.DataFrame([
+        {'Disciplina': d, 'questao_numero': q, 'Conteúdo': conteudos.get((d, q), f'{d} content {q}'), 'Descritor': f'D{q:02d}'}
+        for d in ('PORT', 'MAT') for q in (1, 2)
+    ])
+
+
+def _contando(chamadas):
+    def gerar(prompt):
+        chamadas.append(prompt)
+        return gerador_local(prompt)
+    gerar.modelo = 'contando'
+    return gerar
+
+
+def test_gera_todas_e_pula_as_inalteradas():
+    chamadas = []
+    explicacoes, falhas = gerar_explicacoes(_catalogo(), _contando(chamadas), paralelo=2)
+    assert len(explicacoes) == 4 and not falhas and len(chamadas) == 4
+    assert obter_explicacao(explicacoes, 'MAT', 2).startswith("**🔍 QUESTION 2")
+
+    chamadas.clear()
+    mesmas, _ = gerar_explicacoes(_catalogo(), _contando(chamadas), existentes=explicacoes)
+    assert chamadas == [] and mesmas == explicacoes
+
+    alterado = _catalogo({('PORT', 2): 'Punctuation'})
+    novas, _ = gerar_explicacoes(alterado, _contando(chamadas), existentes=explicacoes)
+    assert len(chamadas) == 1 and 'Punctuation' in chamadas[0]
+    assert novas['PORT:2']['conteudo'] == 'Punctuation'
+
+    chamadas.clear()
+    gerar_explicacoes(_catalogo(), _contando(chamadas), existentes=explicacoes, forcar=True)
+    assert len(chamadas) == 4
+
+
+def test_falha_do_modelo_nao_interrompe_o_lote():
+    def gerar(prompt):
+        if 'QUESTION 1 ' in prompt:
+            raise RuntimeError("rate limited")
+        return gerador_local(prompt)
+
+    explicacoes, falhas = gerar_explicacoes(_catalogo(), gerar)
+    assert set(falhas) == {'PORT:1', 'MAT:1'}
+    assert set(explicacoes) == {'PORT:2', 'MAT:2'}
+
+
+def test_gravacao_atomica_e_versao_do_arquivo(tmp_path):
+    caminho = str(tmp_path / 'explicacoes.json')
+    assert carregar_explicacoes(caminho) == {}
+
+    explicacoes, _ = gerar_explicacoes(_catalogo(), gerador_local)
+    salvar_explicacoes(explicacoes, caminho)
+    versao = versao_dados(caminho)
+    assert carregar_explicacoes(caminho) == explicacoes
+
+    # A failed write keeps the previous file and its version, and leaves no temp file
+    with pytest.raises(TypeError):
+        salvar_explicacoes({'PORT:1': {'explicacao': object()}}, caminho)
+    assert carregar_explicacoes(caminho) == explicacoes
+    assert versao_dados(caminho) == versao
+    assert os.listdir(tmp_path) == ['explicacoes.json']
+
+    # A new batch changes the version the app caches the file by
+    explicacoes['PORT:1']['explicacao'] += " (revised)"
+    salvar_explicacoes(explicacoes, caminho)
+    assert versao_dados(caminho) != versao
+    with open(caminho, encoding='utf-8') as f:
+        assert json.load(f)['PORT:1']['explicacao'].endswith("(revised)")
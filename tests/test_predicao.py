@@ -0,0 +1,41 @@
+import pytest
+
+from analytics import predicao
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+
+def _respostas(n_alunos=600, semente=5):
+    aleatorio = np.random.default_rng(semente)
+    habilidade = aleatorio.normal(size=n_alunos)
+    linhas = []
+    for ra in range(1, n_alunos + 1):
+        for disciplina in ('PORT', 'MAT'):
+            for questao in range(1, 7):
+                p = 1 / (1 + np.exp(-(habilidade[ra - 1] - (questao - 3.5) / 2)))
+                acerto = int(aleatorio.random() < p)
+                linhas.append({'RA': ra, 'Disciplina': disciplina, 'questao_numero': questao,
+                               'Conteúdo': f'C{(questao + 1) // 2}', 'acerto': acerto})
+    return pd.DataFrame(linhas)
+
+
+def test_pontuacao_por_blocos_igual_a_bloco_unico():
+    df = _respostas()
+    inteiro, pesos_inteiro, _ = predicao.pontuar_populacao(df, np, pd, tamanho_bloco=len(df))
+    blocos, pesos_blocos, _ = predicao.pontuar_populacao(df, np, pd, tamanho_bloco=37)
+    assert np.allclose(pesos_inteiro, pesos_blocos)
+    pd.testing.assert_frame_equal(inteiro.sort_index(), blocos.sort_index())
+
+
+def test_validacao_em_alunos_retidos_supera_facilidade_do_item():
+    _, _, validacao = predicao.pontuar_populacao(_respostas(), np, pd)
+    assert validacao['alunos_validacao'] == 120
+    assert validacao['log_loss'] < validacao['log_loss_base']
+
+
+def test_potencial_nunca_abaixo_da_estimativa_atual():
+    predicoes, _, _ = predicao.pontuar_populacao(_respostas(), np, pd)
+    assert (predicoes['nota_potencial'] >= predicoes['nota_estimada']).all()
+    assert predicao.previsao_aluno(predicoes, 1)['acertos'] == predicoes.loc[1, 'acertos']
+    assert predicao.previsao_aluno(predicoes, 10 ** 9) is None
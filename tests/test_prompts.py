@@ -0,0 +1,95 @@
+import sys
+import types
+
+import pytest
+
+from tutor import prompts
+from tutor.prompts import ajustar_material_ao_orcamento, contar_tokens, cortar_em_tokens, CARACTERES_POR_TOKEN
+
+
+class _CodificadorPalavras:
+    """One token per word (stands in for tiktoken)"""
+
+    def encode(self, texto):
+        return texto.split()
+
+    def decode(self, tokens):
+        return ' '.join(tokens)
+
+
+@pytest.fixture
+def estimativa(monkeypatch):
+    monkeypatch.setattr(prompts, '_codificador', lambda modelo=None: None)
+
+
+@pytest.fixture
+def por_palavra(monkeypatch):
+    monkeypatch.setattr(prompts, '_codificador', lambda modelo=None: _CodificadorPalavras())
+
+
+def test_estimativa_por_caracteres(estimativa):
+    assert contar_tokens("") == 0
+    assert contar_tokens("abcde") == 2
+    texto = "palavra " * 100
+    cortado = cortar_em_tokens(texto, 10)
+    assert len(cortado) <= 10 * CARACTERES_POR_TOKEN
+    # Cut at a word boundary
+    assert cortado.split() == ["palavra"] * len(cortado.split())
+    assert cortar_em_tokens("curto", 10) == "curto"
+    assert cortar_em_tokens(texto, 0) == ""
+
+
+def test_corte_com_codificador(por_palavra):
+    texto = " ".join(f"p{i}" for i in range(50))
+    assert cortar_em_tokens(texto, 5) == "p0 p1 p2 p3 p4"
+    assert cortar_em_tokens(texto, 50) == texto
+
+
+def test_codificador_que_nao_carrega_usa_estimativa(monkeypatch):
+    def falhar(*args):
+        raise ValueError("Unknown encoding o200k_base")
+
+    monkeypatch.setitem(sys.modules, 'tiktoken', types.SimpleNamespace(encoding_for_model=falhar, get_encoding=falhar))
+    prompts._codificador.cache_clear()
+    try:
+        assert prompts._codificador() is None
+        assert contar_tokens("abcdefgh") == 2
+    finally:
+        prompts._codificador.cache_clear()
+
+
+def test_material_respeita_orcamento_e_prioridade(por_palavra):
+    material = {
+        'habilidade': "habilidade " * 5,
+        'conteudo': "conteudo " * 5,
+        'resposta_comentada': "solucao " * 100,
+        'explicacao': "explicacao " * 100,
+    }
+    texto = ajustar_material_ao_orcamento(material, orcamento_tokens=30)
+    assert texto.count("habilidade") == 5
+    assert texto.count("conteudo") == 5
+    # The solution takes what is left; the explanation (lower priority) is dropped
+    assert texto.count("solucao") == 20
+    assert "explicacao" not in texto
+
+
+def test_texto_completo_so_sem_solucao(por_palavra):
+    com_solucao = ajustar_material_ao_orcamento({'resposta_comentada': "solucao", 'texto_completo': "pdf inteiro"}, 100)
+    assert "pdf" not in com_solucao
+    sem_solucao = ajustar_material_ao_orcamento({'habilidade': "D01", 'texto_completo': "pdf inteiro"}, 100)
+    assert "pdf inteiro" in sem_solucao
+    assert ajustar_material_ao_orcamento({}, 100) == "• No official material available"
+
+
+def test_material_no_modo_estimativa_fica_no_orcamento(estimativa):
+    material = {'habilidade': "h" * 400, 'resposta_comentada': "palavra " * 1000}
+    texto = ajustar_material_ao_orcamento(material, orcamento_tokens=200)
+    secoes = [linha.split(": ", 1)[1] for linha in texto.splitlines()]
+    assert sum(contar_tokens(secao) for secao in secoes) <= 200
+
+
+def test_prefixo_estatico_nao_varia_entre_perguntas(por_palavra):
+    a, _ = prompts.criar_mensagens_professor_ia({'habilidade': "D01"}, "pergunta 1", "Matemática", 3)
+    b, _ = prompts.criar_mensagens_professor_ia({'habilidade': "D07"}, "outra", "Português", 9)
+    assert a[0] == b[0] and a[0]['role'] == 'system'
+    assert a[1] != b[1]
@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+from tutor import resiliencia
+from tutor.resiliencia import DisjuntorCircuito, executar_com_prazo, obter_controle, PrazoExcedido
+from tutor.scheduler import AgendadorTutor
+
+
+@pytest.fixture
+def agendador():
+    agendador = AgendadorTutor(max_concorrencia=2, requisicoes_por_segundo=1000, rajada=1000)
+    yield agendador
+    agendador.encerrar()
+
+
+def test_hedge_fura_fila_do_aluno(agendador, monkeypatch):
+    monkeypatch.setattr(resiliencia, 'HEDGE_MINIMO_S', 0.1)
+    controle = obter_controle('teste_hedge')
+    for _ in range(10):
+        controle.registrar_latencia(0.05)
+    chamadas = []
+
+    def modelo(nome, duracao):
+        chamadas.append(nome)
+        time.sleep(duracao)
+        return nome
+
+    def tentativa(hedge, cancelado):
+        if hedge:
+            return agendador.executar(1, modelo, 'hedge', 0.01, prioritario=True, cancelado=cancelado)
+        return agendador.executar(1, modelo, 'primario', 0.6, cancelado=cancelado)
+
+    resultado = {}
+    principal = threading.Thread(target=lambda: resultado.setdefault('r', executar_com_prazo('teste_hedge', tentativa)))
+    principal.start()
+    time.sleep(0.02)
+    # Other slot: a short call of another student, then this student's queue of slow calls
+    outros = [threading.Thread(target=agendador.executar, args=(2, modelo, 'outro', 0.05))]
+    outros += [threading.Thread(target=agendador.executar, args=(1, modelo, f'fila{i}', 0.2)) for i in range(3)]
+    for t in outros:
+        t.start()
+    principal.join(timeout=5)
+    for t in outros:
+        t.join(timeout=5)
+
+    # Without priority the hedge would run after fila2, once the primary already finished
+    assert resultado['r'] == 'hedge'
+    assert chamadas.index('hedge') < chamadas.index('fila1')
+    assert controle.metricas()['hedges_vencedores'] == 1
+
+
+def test_tentativa_na_fila_e_descartada_quando_cancelada(agendador):
+    chamadas = []
+    liberar = threading.Event()
+    # Both slots busy, so the next request stays queued
+    ocupados = [threading.Thread(target=agendador.executar, args=(ra, liberar.wait, 5)) for ra in (1, 3)]
+    for t in ocupados:
+        t.start()
+    time.sleep(0.05)
+
+    cancelado = threading.Event()
+    erros = []
+
+    def esperar():
+        try:
+            agendador.executar(2, chamadas.append, 'nao deveria rodar', cancelado=cancelado)
+        except Exception as e:
+            erros.append(type(e).__name__)
+
+    t = threading.Thread(target=esperar)
+    t.start()
+    time.sleep(0.05)
+    cancelado.set()
+    t.join(timeout=2)
+    liberar.set()
+    for t in ocupados:
+        t.join(timeout=2)
+    time.sleep(0.05)
+
+    assert erros == ['CancelledError']
+    assert chamadas == []
+    assert agendador.metricas()['cancelados'] == 1
+    assert agendador.metricas()['profundidade_fila'] == 0
+
+
+def test_prazo_excedido_cancela_tentativas():
+    controle = obter_controle('teste_prazo')
+    controle.prazo_s = 0.2
+    eventos = []
+
+    def tentativa(hedge, cancelado):
+        eventos.append(cancelado)
+        cancelado.wait(2)
+        return 'tarde'
+
+    with pytest.raises(PrazoExcedido):
+        executar_com_prazo('teste_prazo', tentativa, hedge=False)
+    assert all(e.is_set() for e in eventos)
+
+
+def test_disjuntor_abre_com_erros_concorrentes():
+    disjuntor = DisjuntorCircuito(janela=1000, espera_s=60)
+    threads = [threading.Thread(target=lambda: [disjuntor.registrar(False) for _ in range(100)]) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert disjuntor.estado() == 'aberto'
+    assert not disjuntor.permitir()
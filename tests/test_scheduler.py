@@ -0,0 +1,170 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from tutor.scheduler import AgendadorTutor, BaldeTokens, chave_pedido
+
+
+@pytest.fixture
+def agendador():
+    agendadores = []
+
+    def criar(max_concorrencia=1, requisicoes_por_segundo=1000.0, rajada=1000):
+        novo = AgendadorTutor(max_concorrencia, requisicoes_por_segundo, rajada)
+        agendadores.append(novo)
+        return novo
+
+    yield criar
+    for a in agendadores:
+        a.encerrar()
+
+
+def _esperar(condicao, timeout=5):
+    limite = time.monotonic() + timeout
+    while not condicao():
+        assert time.monotonic() < limite, "timed out"
+        time.sleep(0.005)
+
+
+def _em_segundo_plano(funcao, *args, **kwargs):
+    """Runs funcao in a thread; returns (thread, resultado dict with 'valor' or 'erro')"""
+    resultado = {}
+
+    def alvo():
+        try:
+            resultado['valor'] = funcao(*args, **kwargs)
+        except BaseException as e:
+            resultado['erro'] = e
+
+    thread = threading.Thread(target=alvo)
+    thread.start()
+    return thread, resultado
+
+
+def _ocupar(agendador):
+    """Holds the only slot until the returned event is set"""
+    liberar = threading.Event()
+    thread, _ = _em_segundo_plano(agendador.executar, 'ocupante', liberar.wait, 5)
+    _esperar(lambda: agendador.metricas()['em_execucao'] == 1)
+    return liberar, thread
+
+
+def _enfileirar(agendador, *args, **kwargs):
+    """Submits from a thread and waits until the request is queued (keeps submission order)"""
+    antes = agendador.metricas()['submetidos']
+    thread, resultado = _em_segundo_plano(agendador.executar, *args, **kwargs)
+    _esperar(lambda: agendador.metricas()['submetidos'] == antes + 1)
+    return thread, resultado
+
+
+def test_limite_de_concorrencia(agendador):
+    agendador = agendador(max_concorrencia=2)
+    lock = threading.Lock()
+    estado = {'ativas': 0, 'pico': 0}
+
+    def chamada():
+        with lock:
+            estado['ativas'] += 1
+            estado['pico'] = max(estado['pico'], estado['ativas'])
+        time.sleep(0.03)
+        with lock:
+            estado['ativas'] -= 1
+
+    threads = [_em_segundo_plano(agendador.executar, f"aluno-{i}", chamada)[0] for i in range(8)]
+    for t in threads:
+        t.join(5)
+    assert estado['pico'] == 2
+    assert agendador.metricas()['concluidos'] == 8
+
+
+def test_balde_de_tokens_limita_a_taxa():
+    async def adquirir(n):
+        balde = BaldeTokens(taxa=20, capacidade=2)
+        inicio = time.monotonic()
+        tempos = []
+        for _ in range(n):
+            await balde.adquirir()
+            tempos.append(time.monotonic() - inicio)
+        return tempos
+
+    tempos = asyncio.run(adquirir(6))
+    # The burst goes out at once; the other 4 tokens refill at 20/s
+    assert tempos[1] < 0.03
+    assert 0.17 <= tempos[-1] < 0.5
+
+
+def test_filas_por_aluno_sao_atendidas_em_rodizio(agendador):
+    agendador = agendador()
+    ordem = []
+    liberar, ocupante = _ocupar(agendador)
+
+    threads = [_enfileirar(agendador, aluno, ordem.append, f"{aluno}{i}")[0]
+               for aluno, i in (('A', 1), ('A', 2), ('A', 3), ('B', 1))]
+    liberar.set()
+    for t in threads + [ocupante]:
+        t.join(5)
+    assert ordem == ['A1', 'B1', 'A2', 'A3']
+
+
+def test_pedidos_identicos_sao_coalescidos(agendador):
+    agendador = agendador()
+    liberar = threading.Event()
+    chamadas = []
+
+    def chamada(pergunta):
+        chamadas.append(pergunta)
+        liberar.wait(5)
+        return f"resposta: {pergunta}"
+
+    chave = chave_pedido(model='m', messages=[{'role': 'user', 'content': 'oi'}])
+    pedidos = [_enfileirar(agendador, f"aluno-{i}", chamada, 'oi', chave=chave) for i in range(4)]
+    liberar.set()
+    for thread, _ in pedidos:
+        thread.join(5)
+
+    assert chamadas == ['oi']
+    assert [resultado['valor'] for _, resultado in pedidos] == ['resposta: oi'] * 4
+    assert agendador.metricas()['coalescidos'] == 3
+
+
+def test_pedido_cancelado_na_fila_nao_e_executado(agendador):
+    agendador = agendador()
+    chamadas = []
+    liberar, ocupante = _ocupar(agendador)
+
+    cancelado = threading.Event()
+    thread, resultado = _enfileirar(agendador, 'A', chamadas.append, 'cancelada', cancelado=cancelado)
+    cancelado.set()
+    thread.join(5)
+    assert isinstance(resultado['erro'], concurrent.futures.CancelledError)
+
+    liberar.set()
+    ocupante.join(5)
+    _esperar(lambda: agendador.metricas()['cancelados'] == 1)
+    assert chamadas == []
+
+
+def test_pedido_prioritario_fura_as_filas(agendador):
+    agendador = agendador()
+    ordem = []
+    liberar, ocupante = _ocupar(agendador)
+
+    threads = [_enfileirar(agendador, 'A', ordem.append, 'primario')[0],
+               _enfileirar(agendador, 'B', ordem.append, 'outro')[0],
+               _enfileirar(agendador, 'A', ordem.append, 'hedge', prioritario=True)[0]]
+    liberar.set()
+    for t in threads + [ocupante]:
+        t.join(5)
+    assert ordem == ['hedge', 'primario', 'outro']
+
+
+def test_timeout_do_chamador(agendador):
+    agendador = agendador()
+    liberar, ocupante = _ocupar(agendador)
+    with pytest.raises(concurrent.futures.TimeoutError):
+        agendador.executar('A', lambda: None, timeout=0.05)
+    liberar.set()
+    ocupante.join(5)
@@ -0,0 +1,57 @@
+import pytest
+
+from analytics.similares import conteudos_compartilhados, construir_indice
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+
+def _respostas(alunos):
+    """alunos: {ra: {(disciplina, questao): erro}} (missing questions = not answered)"""
+    return pd.DataFrame([
+        {'RA': ra, 'Disciplina': d, 'questao_numero': q, 'erro': erro, 'acerto': 1 - erro,
+         'Conteúdo': f'{d}-{(q + 1) // 2}'}
+        for ra, respostas in alunos.items() for (d, q), erro in respostas.items()
+    ])
+
+
+def _todas(erradas, disciplinas=('PORT', 'MAT')):
+    return {(d, q): int((d, q) in erradas) for d in disciplinas for q in range(1, 5)}
+
+
+def test_disciplina_nao_respondida_nao_conta_como_acerto():
+    alunos = {
+        1: _todas({('PORT', 1), ('MAT', 1), ('MAT', 2), ('MAT', 3)}),
+        # Same Portuguese errors, Mathematics not answered
+        2: _todas({('PORT', 1)}, disciplinas=('PORT',)),
+        # Answered everything, same Portuguese errors, no Mathematics errors
+        3: _todas({('PORT', 1)}),
+    }
+    indice = construir_indice(_respostas(alunos), np)
+    for metrica in ('jaccard', 'hamming'):
+        similaridade = indice.similaridades(1, metrica)
+        assert similaridade[indice.posicoes[2]] == 1.0
+        assert similaridade[indice.posicoes[3]] < similaridade[indice.posicoes[2]]
+
+
+def test_comparacao_conta_apenas_vizinhos_que_responderam():
+    alunos = {
+        1: _todas({('MAT', 1), ('PORT', 2)}),
+        2: _todas({('MAT', 1)}, disciplinas=('MAT',)),
+        3: _todas({('PORT', 2)}, disciplinas=('PORT',)),
+    }
+    indice = construir_indice(_respostas(alunos), np)
+    comparacao = {(item['disciplina'], item['questao_numero']): item for item in indice.comparar_com_vizinhos(1, k=2)}
+    # Each question was answered (and missed) by exactly one neighbour
+    assert comparacao[('MAT', 1)]['tambem_erraram'] == 1.0
+    assert comparacao[('PORT', 2)]['tambem_erraram'] == 1.0
+    compartilhados = conteudos_compartilhados(list(comparacao.values()))
+    assert {(item['disciplina'], item['conteudo']) for item in compartilhados} == {('MAT', 'MAT-1'), ('PORT', 'PORT-1')}
+
+
+def test_grupos_separam_padroes_de_erro():
+    alunos = {ra: _todas({('MAT', 1), ('MAT', 2)} if ra < 10 else {('PORT', 3), ('PORT', 4)}) for ra in range(20)}
+    indice = construir_indice(_respostas(alunos), np)
+    rotulos = indice.agrupar(2)
+    assert len(set(rotulos[:10])) == 1 and len(set(rotulos[10:])) == 1
+    assert rotulos[0] != rotulos[10]
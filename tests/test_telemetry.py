@@ -0,0 +1,75 @@
+import json
+
+from tutor.telemetry import Medicao, Telemetria, estimar_custo, ler_registros, resumir
+
+
+def _registro(recurso='FABI', tempo=100.0, fallback=False, custo=0.001, disciplina='Matemática'):
+    return {'recurso': recurso, 'disciplina': disciplina, 'sessao': 's1', 'tempo_total_ms': tempo,
+            'tokens_prompt': 100, 'tokens_cache': 40, 'tokens_completion': 20, 'tentativas': 1 if fallback else 0,
+            'fallback': fallback, 'erro': 'timeout' if fallback else None, 'custo_usd': custo}
+
+
+def test_medir_grava_registro_mesmo_com_erro(tmp_path):
+    caminho = str(tmp_path / 'metricas.jsonl')
+    telemetria = Telemetria(caminho)
+    try:
+        with telemetria.medir('LU', 'Português', 's1') as medicao:
+            medicao.nova_tentativa('timeout')
+            raise RuntimeError("falhou")
+    except RuntimeError:
+        pass
+
+    registros = ler_registros(caminho)
+    assert len(registros) == 1
+    assert registros[0]['recurso'] == 'LU'
+    assert registros[0]['tentativas'] == 1
+    assert registros[0]['erro'] == 'falhou'
+    assert telemetria.registros() == registros
+
+
+def test_custo_desconta_tokens_em_cache():
+    assert estimar_custo('modelo-desconhecido', 1000, 0, 1000) == 0.0
+    sem_cache = estimar_custo('gpt-4o-mini', 1_000_000, 0, 0)
+    com_cache = estimar_custo('gpt-4o-mini', 1_000_000, 1_000_000, 0)
+    assert sem_cache == 0.15 and com_cache == 0.075
+
+
+def test_medicao_sem_caminho_fica_so_em_memoria():
+    telemetria = Telemetria(caminho=None)
+    telemetria.registrar(Medicao('FABI', 'Matemática', 's1', 'gpt-4o-mini').como_registro())
+    assert len(telemetria.registros()) == 1
+
+
+def test_arquivo_e_rotacionado_e_leitura_fica_limitada(tmp_path):
+    caminho = str(tmp_path / 'metricas.jsonl')
+    telemetria = Telemetria(caminho, tamanho_maximo=2000)
+    for i in range(100):
+        telemetria.registrar({**_registro(), 'sessao': f's{i}'})
+
+    assert (tmp_path / 'metricas.jsonl.1').exists()
+    assert (tmp_path / 'metricas.jsonl').stat().st_size < 2000 + 500
+    rotacionados = ler_registros(caminho + '.1')
+    atuais = ler_registros(caminho)
+    assert [r['sessao'] for r in rotacionados + atuais] == [f's{i}' for i in range(100 - len(rotacionados + atuais), 100)]
+    assert ler_registros(caminho, limite=1) == atuais[-1:]
+
+
+def test_leitura_ignora_linha_corrompida(tmp_path):
+    caminho = tmp_path / 'metricas.jsonl'
+    caminho.write_text(json.dumps(_registro()) + '\n{corrompida\n\n', encoding='utf-8')
+    assert len(ler_registros(str(caminho))) == 1
+    assert ler_registros(str(tmp_path / 'inexistente.jsonl')) == []
+
+
+def test_resumir_agrupa_e_soma():
+    registros = [_registro(tempo=t) for t in (100, 200, 300)] + [_registro('LU', 50, fallback=True, disciplina='')]
+    resumo = {r['recurso']: r for r in resumir(registros)}
+    assert resumo['FABI']['requisicoes'] == 3
+    assert resumo['FABI']['p50_ms'] == 200
+    assert resumo['FABI']['tokens_cache'] == 120
+    assert resumo['FABI']['fallbacks'] == 0
+    assert resumo['LU']['fallbacks'] == 1 and resumo['LU']['erros'] == 1 and resumo['LU']['tentativas'] == 1
+    assert resumo['FABI']['custo_usd'] == 0.003
+
+    por_disciplina = {r['disciplina'] for r in resumir(registros, 'disciplina')}
+    assert por_disciplina == {'Matemática', '-'}
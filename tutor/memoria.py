@@ -0,0 +1,116 @@
+# =============================================================================
+# LU CONVERSATION MEMORY (ROLLING SUMMARY + BOUNDED RECENT WINDOW)
+# =============================================================================
+
+from concurrent.futures import ThreadPoolExecutor
+
+from tutor.prompts import cortar_em_tokens
+from tutor.scheduler import obter_agendador
+from tutor.telemetry import medir_chamada
+
+# Raw messages always sent to the model (3 user/assistant turns)
+JANELA_PROMPT = 6
+# Extra raw messages tolerated before older ones are folded into the summary
+LOTE_RESUMO = 4
+# Summary size cap
+MAX_TOKENS_RESUMO = 300
+MAX_LINHAS_RESUMO_LOCAL = 10
+
+RECURSO_RESUMO = 'LU_resumo'
+
+# Summaries run off the critical path, in the background
+_executor_resumos = ThreadPoolExecutor(max_workers=2, thread_name_prefix="lu-resumo")
+
+
+def criar_resumidor_openai(client, aluno_id, sessao='', modelo="gpt-4o-mini", agendador=None):
+    """Returns resumidor(resumo, mensagens) that calls the model through the shared scheduler
+
+    Built in the script thread so the background thread never touches st.session_state.
+    """
+    def resumir(resumo_atual, mensagens):
+        conversa = "\n".join(f"{m['role'].upper()}: {m['content']}" for m in mensagens)
+        with medir_chamada(RECURSO_RESUMO, '', sessao, modelo) as medicao:
+            response = (agendador or obter_agendador()).executar(
+                aluno_id,
+                client.chat.completions.create,
+                model=modelo,
+                messages=[
+                    {"role": "system", "content": "You maintain a compact memory of a tutoring chat. Keep the student's goals, difficulties, decisions and open questions. Maximum 150 words, bullet points."},
+                    {"role": "user", "content": f"CURRENT SUMMARY:\n{resumo_atual or '(empty)'}\n\nNEW MESSAGES:\n{conversa}\n\nUpdated summary:"}
+                ],
+                temperature=0.3,
+                max_tokens=MAX_TOKENS_RESUMO
+            )
+            medicao.registrar_resposta(response)
+        return response.choices[0].message.content.strip()
+    return resumir
+
+
+def resumidor_local(resumo_atual, mensagens):
+    """Extractive summary without model (basic mode and fallback)"""
+    linhas = resumo_atual.splitlines() if resumo_atual else []
+    for m in mensagens:
+        if m['role'] == 'user':
+            linhas.append(f"• Student asked: {m['content'][:120]}")
+    # Most recent topics win when the summary is full
+    return "\n".join(linhas[-MAX_LINHAS_RESUMO_LOCAL:])
+
+
+class MemoriaConversa:
+    """Keeps a running summary plus a bounded window of raw messages
+
+    `mensagens` is the raw window (displayed and sent to the model). When it
+    grows past JANELA_PROMPT + LOTE_RESUMO, the oldest messages are folded into
+    `resumo` by a background job, so prompt size and session memory stay bounded.
+    """
+
+    def __init__(self, mensagens_iniciais=None, janela=JANELA_PROMPT, lote=LOTE_RESUMO):
+        self.mensagens = list(mensagens_iniciais or [])
+        self.resumo = ""
+        self.janela = janela
+        self.lote = lote
+        self.total_mensagens = len(self.mensagens)
+        self._em_resumo = []
+        self._futuro = None
+
+    def adicionar(self, role, content, resumidor=None):
+        """Appends message; folds older messages in background when the window is full"""
+        self.aplicar_resumo_pronto()
+        self.mensagens.append({"role": role, "content": content})
+        self.total_mensagens += 1
+
+        if len(self.mensagens) > self.janela + self.lote and self._futuro is None:
+            excedente = len(self.mensagens) - self.janela
+            self._em_resumo = self.mensagens[:excedente]
+            del self.mensagens[:excedente]
+            self._futuro = _executor_resumos.submit(resumidor or resumidor_local, self.resumo, list(self._em_resumo))
+
+    def aplicar_resumo_pronto(self):
+        """Adopts background summary if finished (never blocks)"""
+        if self._futuro is None or not self._futuro.done():
+            return
+        try:
+            novo_resumo = self._futuro.result()
+        except Exception:
+            # Keep context even if the model failed
+            novo_resumo = resumidor_local(self.resumo, self._em_resumo)
+        self.resumo = cortar_em_tokens(novo_resumo, MAX_TOKENS_RESUMO)
+        self._em_resumo = []
+        self._futuro = None
+
+    def mensagens_para_prompt(self, prompt_sistema, contexto=None):
+        """System prompt + summary + optional grounding context + in-flight and recent raw messages"""
+        self.aplicar_resumo_pronto()
+        mensagens = [{"role": "system", "content": prompt_sistema}]
+        if self.resumo:
+            mensagens.append({"role": "system", "content": f"SUMMARY OF EARLIER CONVERSATION:\n{self.resumo}"})
+        if contexto:
+            mensagens.append({"role": "system", "content": contexto})
+        mensagens.extend(self._em_resumo)
+        mensagens.extend(self.mensagens)
+        return mensagens
+
+    @property
+    def mensagens_resumidas(self):
+        """How many messages are no longer kept raw"""
+        return self.total_mensagens - len(self.mensagens)
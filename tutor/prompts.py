@@ -0,0 +1,212 @@
+# =============================================================================
+# PROMPT ASSEMBLY FOR AI PROFESSOR (TOKEN BUDGET + STATIC INSTRUCTIONS)
+# =============================================================================
+
+from functools import lru_cache
+
+MODELO_PADRAO = "gpt-4o-mini"
+
+# Tokens reserved for the official question material (skill, solution, explanation)
+ORCAMENTO_MATERIAL_TOKENS = 700
+
+# Approximate characters per token when tiktoken is not installed
+CARACTERES_POR_TOKEN = 4
+
+# Fixed overhead the chat format adds per message and per request
+TOKENS_POR_MENSAGEM = 3
+TOKENS_RESPOSTA_PRIMING = 3
+
+# Static instructions, identical on every call; everything that varies goes in
+# the user message. (At ~450 tokens this is below the 1024-token minimum of
+# provider prompt caching, so no cache hit is expected from the ordering alone.)
+INSTRUCOES_FABI = """YOU ARE: FABI, a high school specialist teacher of the subject given in the student message.
+
+⚠️ CRITICAL CONTEXT - READ CAREFULLY:
+You are helping with ONE specific question of ONE subject, both given in the student message
+IGNORE any content from other subjects or questions in the attached material
+FOCUS SOLELY on that specific question of that subject
+
+MANDATORY INSTRUCTIONS - FOLLOW STRICTLY:
+1. ✅ ANSWER ABOUT THE GIVEN QUESTION OF THE GIVEN SUBJECT ONLY
+2. ✅ DO NOT answer about other subjects or unrelated formulas
+3. ✅ If the question mentions concepts from another subject, redirect to the given subject
+4. ✅ USE THE OFFICIAL material of the question (KNOWLEDGE BASE) as main source
+5. ✅ ANSWER DIRECTLY - without preliminaries or introductions
+6. ✅ BE COMPLETE but CONCISE - all necessary information at once
+7. ✅ EXPLAIN AS A TEACHER - clear, step by step, with examples
+8. ✅ GIVE PRACTICAL TIPS - avoid common mistakes
+9. ✅ SHOW THE COMPLETE reasoning
+10. ✅ MANDATORY: Use UNICODE SYMBOLS in ALL mathematical formulas
+
+FORMATTING FOR ANSWERS - MANDATORY:
+📐 Mathematics: ALWAYS use UNICODE SYMBOLS - NEVER use LaTeX or $:
+   • Multiplication: use × (example: 3 × 4 = 12)
+   • Division: use ÷ (example: 12 ÷ 3 = 4)
+   • Power: use ² ³ ⁴ (example: 5² = 25, 2³ = 8)
+   • Square root: use √ (example: √16 = 4)
+   • Pi: use π (example: 2πr for circumference)
+   • Degrees: use ° (example: 90°)
+   • Approximately: use ≈ (example: π ≈ 3.14)
+   • Plus/Minus: use ± (example: x = 5 ± 2)
+   • Inequalities: use ≤ ≥ (example: x ≤ 10)
+📝 Portuguese: Use clear structure with numbered topics
+🔢 Examples: With real numbers/words
+💡 Tips: For memorization or avoiding mistakes
+
+Answer as a teacher of the given subject - WITHOUT LEAVING THE SCOPE OF THE GIVEN QUESTION."""
+
+# Material sections in priority order: earlier sections get budget first
+SECOES_MATERIAL = [
+    ('habilidade', 'Skill assessed'),
+    ('conteudo', 'Main content'),
+    ('resposta_comentada', 'Commented solution'),
+    ('explicacao', 'Pedagogical explanation'),
+    ('texto_completo', 'Material excerpt'),
+]
+
+
+@lru_cache(maxsize=None)
+def _codificador(modelo=MODELO_PADRAO):
+    """Returns tiktoken encoder for the model, or None when it can't be loaded (cached per process)
+
+    tiktoken is imported here, on the first token count, so importing this module stays cheap at cold start.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(modelo)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # Unknown encoding in an old tiktoken, or BPE file download failed
+        print(f"❌ Error loading tokenizer for {modelo}, using character estimate: {e}")
+        return None
+
+
+def contar_tokens(texto, modelo=MODELO_PADRAO):
+    """Counts tokens locally (tiktoken when it loads, estimate otherwise)"""
+    if not texto:
+        return 0
+    codificador = _codificador(modelo)
+    if codificador is not None:
+        return len(codificador.encode(texto))
+    return -(-len(texto) // CARACTERES_POR_TOKEN)
+
+
+def contar_tokens_mensagens(mensagens, modelo=MODELO_PADRAO):
+    """Counts prompt tokens of a chat message list, including format overhead"""
+    total = TOKENS_RESPOSTA_PRIMING
+    for msg in mensagens:
+        total += TOKENS_POR_MENSAGEM + contar_tokens(msg['content'], modelo)
+    return total
+
+
+def cortar_em_tokens(texto, max_tokens, modelo=MODELO_PADRAO):
+    """Truncates text to at most max_tokens tokens"""
+    if not texto or max_tokens <= 0:
+        return ""
+    codificador = _codificador(modelo)
+    if codificador is not None:
+        tokens = codificador.encode(texto)
+        if len(tokens) <= max_tokens:
+            return texto
+        return codificador.decode(tokens[:max_tokens]).rstrip()
+
+    limite = max_tokens * CARACTERES_POR_TOKEN
+    if len(texto) <= limite:
+        return texto
+    # Avoid cutting in the middle of a word
+    corte = texto[:limite]
+    espaco = corte.rfind(' ')
+    return (corte[:espaco] if espaco > limite // 2 else corte).rstrip()
+
+
+def ajustar_material_ao_orcamento(conteudo_estruturado, orcamento_tokens=ORCAMENTO_MATERIAL_TOKENS, modelo=MODELO_PADRAO):
+    """Fits question material sections into a token budget, by priority"""
+    secoes = []
+    restante = orcamento_tokens
+    tem_solucao = conteudo_estruturado.get('resposta_comentada') or conteudo_estruturado.get('explicacao')
+
+    for chave, rotulo in SECOES_MATERIAL:
+        # Full text only helps when no solution/explanation was extracted
+        if chave == 'texto_completo' and tem_solucao:
+            continue
+
+        texto = (conteudo_estruturado.get(chave) or '').strip()
+        if not texto or restante <= 0:
+            continue
+
+        texto = cortar_em_tokens(texto, restante, modelo)
+        restante -= contar_tokens(texto, modelo)
+        secoes.append(f"• {rotulo}: {texto}")
+
+    return "\n".join(secoes) if secoes else "• No official material available"
+
+
+def criar_mensagens_professor_ia(conteudo_estruturado, pergunta_aluno, disciplina, numero_questao,
+                                 orcamento_material=ORCAMENTO_MATERIAL_TOKENS, lembrete=None, modelo=MODELO_PADRAO):
+    """Creates AI Professor messages: static system instructions + variable user message
+
+    Returns (mensagens, tokens_prompt) where tokens_prompt is the local count.
+    """
+    material = ajustar_material_ao_orcamento(conteudo_estruturado, orcamento_material, modelo)
+
+    conteudo_usuario = f"""SUBJECT: {disciplina.upper()}
+QUESTION: {numero_questao}
+
+KNOWLEDGE BASE - QUESTION {numero_questao} ({disciplina.upper()}):
+{material}
+
+STUDENT'S QUESTION: {pergunta_aluno}"""
+
+    if lembrete:
+        conteudo_usuario += f"\n\n{lembrete}"
+
+    mensagens = [
+        {"role": "system", "content": INSTRUCOES_FABI},
+        {"role": "user", "content": conteudo_usuario}
+    ]
+
+    return mensagens, contar_tokens_mensagens(mensagens, modelo)
+
+
+def prompt_sistema_lu(nome, acertos_port, acertos_mat):
+    """System prompt of tutor LU for one student"""
+    return f"""You are LU, an intelligent and empathetic tutor. The student {nome} has {acertos_port} correct in Portuguese and {acertos_mat} in Mathematics. 
+
+CHARACTERISTICS:
+- Be helpful, encouraging and motivating
+- Respect the student's level
+- Use clear and accessible language
+- Line breaks for better readability
+
+MATHEMATICS ANSWER FORMATTING:
+If the question involves mathematics:
+- Use UNICODE SYMBOLS: × ÷ ² ³ √ π ° ≈ ± ≤ ≥ α β γ θ
+- Never use [ ... ] for formulas
+- Examples: "Area = πr²", "Volume = (4/3)πr³", "x = 5 ± 2"
+- Use **bold** to highlight main formulas
+- Structure with:
+  * **Formula:** (use Unicode symbols)
+  * **Meaning:** (what each letter means)
+  * **Example:** (with real numbers)
+  * **Tip:** (to memorize or avoid mistakes)
+
+Be brief but complete in your answers."""
+
+
+def tokens_da_resposta(response):
+    """Extracts token usage reported by the API (prompt, cached, completion)"""
+    uso = getattr(response, 'usage', None)
+    if uso is None:
+        return {'prompt': 0, 'cache': 0, 'completion': 0}
+
+    detalhes = getattr(uso, 'prompt_tokens_details', None)
+    return {
+        'prompt': getattr(uso, 'prompt_tokens', 0) or 0,
+        'cache': (getattr(detalhes, 'cached_tokens', 0) or 0) if detalhes else 0,
+        'completion': getattr(uso, 'completion_tokens', 0) or 0
+    }
@@ -0,0 +1,278 @@
+# =============================================================================
+# DEADLINES, HEDGED REQUESTS AND CIRCUIT BREAKER FOR TUTOR CALLS
+# =============================================================================
+
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from helpers.estatistica import percentil
+from tutor.scheduler import obter_agendador, chave_pedido
+from tutor.telemetry import RECURSO_FABI, RECURSO_LU, RECURSO_ANALISE
+
+# Max time a student waits per feature (seconds)
+PRAZOS = {
+    RECURSO_FABI: 25.0,
+    RECURSO_LU: 12.0,
+    RECURSO_ANALISE: 10.0,
+}
+PRAZO_PADRAO = 15.0
+
+# Hedge: fire a second request when the first is slower than this percentile
+PERCENTIL_HEDGE = 90
+AMOSTRAS_MINIMAS_HEDGE = 10
+HEDGE_MINIMO_S = 1.0
+
+# Circuit breaker: open when error rate in the window crosses the threshold
+JANELA_DISJUNTOR = 20
+AMOSTRAS_MINIMAS_DISJUNTOR = 5
+TAXA_ERRO_ABERTURA = 0.5
+ESPERA_REABERTURA_S = 30.0
+
+MAX_RESPOSTAS_CACHE = 500
+
+_executor_tentativas = ThreadPoolExecutor(max_workers=32, thread_name_prefix="tutor-tentativa")
+
+
+class PrazoExcedido(Exception):
+    """Tutor call did not finish within the feature deadline"""
+
+
+class CircuitoAberto(Exception):
+    """Feature is failing too often; calls are short-circuited to the fallback path"""
+
+
+class DisjuntorCircuito:
+    """Closed -> open (after error spike) -> half-open (one trial) -> closed"""
+
+    def __init__(self, janela=JANELA_DISJUNTOR, taxa_abertura=TAXA_ERRO_ABERTURA, espera_s=ESPERA_REABERTURA_S):
+        self.resultados = deque(maxlen=janela)
+        self.taxa_abertura = taxa_abertura
+        self.espera_s = espera_s
+        self.aberto_ate = 0.0
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+
+    @property
+    def aberto(self):
+        return time.monotonic() < self.aberto_ate
+
+    def permitir(self):
+        """True if a call may go to the model (consumes the half-open trial)"""
+        with self._lock:
+            if time.monotonic() < self.aberto_ate:
+                return False
+            if self.aberto_ate and not self._teste_em_andamento:
+                self._teste_em_andamento = True
+                return True
+            return not self._teste_em_andamento
+
+    def registrar(self, sucesso):
+        with self._lock:
+            if self._teste_em_andamento:
+                # Half-open trial decides
+                self._teste_em_andamento = False
+                if sucesso:
+                    self.aberto_ate = 0.0
+                    self.resultados.clear()
+                else:
+                    self.aberto_ate = time.monotonic() + self.espera_s
+                return
+
+            self.resultados.append(bool(sucesso))
+            erros = self.resultados.count(False)
+            if len(self.resultados) >= AMOSTRAS_MINIMAS_DISJUNTOR and erros / len(self.resultados) >= self.taxa_abertura:
+                self.aberto_ate = time.monotonic() + self.espera_s
+                self.resultados.clear()
+
+    def estado(self):
+        with self._lock:
+            if time.monotonic() < self.aberto_ate:
+                return 'aberto'
+            return 'meio_aberto' if self.aberto_ate else 'fechado'
+
+
+class ControleRecurso:
+    """Latency history, hedge threshold and circuit breaker of one feature"""
+
+    def __init__(self, recurso):
+        self.recurso = recurso
+        self.prazo_s = PRAZOS.get(recurso, PRAZO_PADRAO)
+        self.latencias = deque(maxlen=200)
+        self.disjuntor = DisjuntorCircuito()
+        self.contadores = {'chamadas': 0, 'hedges': 0, 'hedges_vencedores': 0, 'prazos_excedidos': 0, 'curto_circuito': 0,
+                           'cancelados': 0}
+        self._lock = threading.Lock()
+
+    def limiar_hedge(self):
+        """Seconds after which a hedged second request is sent"""
+        with self._lock:
+            amostras = list(self.latencias)
+        if len(amostras) < AMOSTRAS_MINIMAS_HEDGE:
+            return self.prazo_s * 0.5
+        p = percentil(amostras, PERCENTIL_HEDGE)
+        return min(max(p, HEDGE_MINIMO_S), self.prazo_s * 0.6)
+
+    def registrar_latencia(self, segundos):
+        with self._lock:
+            self.latencias.append(segundos)
+
+    def contar(self, nome):
+        """Increments a counter (calls from many Streamlit threads)"""
+        with self._lock:
+            self.contadores[nome] += 1
+
+    def metricas(self):
+        with self._lock:
+            amostras = list(self.latencias)
+            contadores = dict(self.contadores)
+        return {'recurso': self.recurso, 'estado': self.disjuntor.estado(),
+                'p50_ms': round(percentil(amostras, 50) * 1000, 1), 'p99_ms': round(percentil(amostras, 99) * 1000, 1),
+                'limiar_hedge_ms': round(self.limiar_hedge() * 1000, 1), **contadores}
+
+
+_controles = {}
+_controles_lock = threading.Lock()
+
+
+def obter_controle(recurso):
+    """Returns process-wide control of a feature"""
+    with _controles_lock:
+        if recurso not in _controles:
+            _controles[recurso] = ControleRecurso(recurso)
+        return _controles[recurso]
+
+
+def metricas_resiliencia():
+    """Metrics of every feature seen so far"""
+    with _controles_lock:
+        controles = list(_controles.values())
+    return [c.metricas() for c in controles]
+
+
+def _cancelar_pendentes(pendentes, controle):
+    """Withdraws attempts that are no longer needed (winner found, or deadline/error)"""
+    for futuro, (_, cancelado) in pendentes.items():
+        cancelado.set()
+        futuro.cancel()
+        controle.contar('cancelados')
+
+
+def executar_com_prazo(recurso, tentativa, hedge=True, medicao=None):
+    """Runs tentativa(hedge, cancelado) under the feature deadline, with optional hedged second request
+
+    tentativa(False, cancelado) is the primary call, tentativa(True, cancelado) the
+    hedge: it should skip the per-student fair queue and request coalescing.
+    cancelado is a threading.Event set when the attempt's result is no longer
+    wanted (the other branch won or the deadline passed), so a queued attempt
+    can be dropped before it spends tokens. Raises CircuitoAberto or
+    PrazoExcedido so the caller can serve its fallback; the first successful
+    response wins.
+    """
+    controle = obter_controle(recurso)
+    if not controle.disjuntor.permitir():
+        controle.contar('curto_circuito')
+        raise CircuitoAberto(f"{recurso} circuit open")
+
+    controle.contar('chamadas')
+    inicio = time.monotonic()
+    limite = inicio + controle.prazo_s
+
+    def disparar(eh_hedge):
+        cancelado = threading.Event()
+        pendentes[_executor_tentativas.submit(tentativa, eh_hedge, cancelado)] = (eh_hedge, cancelado)
+
+    pendentes = {}
+    disparar(False)
+    hedge_enviado = False
+    erro = None
+
+    try:
+        while pendentes:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+
+            espera = restante
+            if hedge and not hedge_enviado:
+                espera = min(restante, max(0.0, inicio + controle.limiar_hedge() - time.monotonic()))
+
+            prontos, _ = wait(pendentes, timeout=espera, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                eh_hedge, _ = pendentes.pop(futuro)
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    erro = e
+                    continue
+                controle.registrar_latencia(time.monotonic() - inicio)
+                controle.disjuntor.registrar(True)
+                if eh_hedge:
+                    controle.contar('hedges_vencedores')
+                return resultado
+
+            # Primary still running past the hedge threshold: send the second request
+            if hedge and not hedge_enviado and not prontos and pendentes and erro is None:
+                hedge_enviado = True
+                controle.contar('hedges')
+                if medicao is not None:
+                    medicao.nova_tentativa("hedge")
+                disparar(True)
+    finally:
+        # Loser / late attempts: stop them before they reach the model
+        _cancelar_pendentes(pendentes, controle)
+
+    controle.disjuntor.registrar(False)
+    if erro is not None and not pendentes:
+        raise erro
+    controle.contar('prazos_excedidos')
+    raise PrazoExcedido(f"{recurso} exceeded {controle.prazo_s:.0f}s deadline")
+
+
+def chamar_modelo_com_prazo(recurso, client, aluno_id, medicao=None, agendador=None, **parametros):
+    """Scheduled chat completion under the feature deadline, with a hedged second request when slow"""
+    agendador = agendador or obter_agendador()
+
+    def tentativa(hedge, cancelado):
+        # The hedge skips the student's fair queue (it would wait behind its own primary) and coalescing
+        return agendador.executar(
+            aluno_id,
+            client.chat.completions.create,
+            chave=None if hedge else chave_pedido(**parametros),
+            prioritario=hedge,
+            cancelado=cancelado,
+            **parametros
+        )
+
+    return executar_com_prazo(recurso, tentativa, medicao=medicao)
+
+
+class CacheRespostas:
+    """Small LRU of recent tutor answers, used as the fast fallback path"""
+
+    def __init__(self, maximo=MAX_RESPOSTAS_CACHE):
+        self.maximo = maximo
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def chave(*partes):
+        return '|'.join(' '.join(str(p).lower().split()) for p in partes)
+
+    def obter(self, chave):
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                return self._itens[chave]
+        return None
+
+    def guardar(self, chave, resposta):
+        with self._lock:
+            self._itens[chave] = resposta
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.maximo:
+                self._itens.popitem(last=False)
+
+
+cache_respostas = CacheRespostas()
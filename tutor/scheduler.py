@@ -0,0 +1,268 @@
+# =============================================================================
+# ASYNC REQUEST SCHEDULER FOR TUTOR CALLS (FABI AND LU)
+# =============================================================================
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from helpers.estatistica import percentil
+
+# Defaults sized for a class of 30-40 students on a single worker process
+MAX_CONCORRENCIA = 8
+REQUISICOES_POR_SEGUNDO = 5.0
+RAJADA_MAXIMA = 10
+TIMEOUT_PADRAO = 90
+
+# How many recent wait times are kept for percentiles
+JANELA_METRICAS = 1000
+
+# How often a blocked executar() checks whether its caller withdrew the request
+INTERVALO_CANCELAMENTO_S = 0.05
+
+
+def chave_pedido(**parametros):
+    """Builds coalescing key from call parameters (model, messages, temperature...)"""
+    bruto = json.dumps(parametros, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(bruto.encode('utf-8')).hexdigest()
+
+
+class BaldeTokens:
+    """Token bucket rate limiter (asyncio, used only inside the scheduler loop)"""
+
+    def __init__(self, taxa, capacidade):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self._tokens = float(capacidade)
+        self._ultimo = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _reabastecer(self):
+        agora = time.monotonic()
+        self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    async def adquirir(self):
+        """Waits until one token is available and consumes it"""
+        async with self._lock:
+            while True:
+                self._reabastecer()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.taxa)
+
+
+class _Pedido:
+    __slots__ = ('aluno_id', 'funcao', 'args', 'kwargs', 'futuro', 'chave', 'enfileirado_em', 'cancelado',
+                 'compartilhado')
+
+    def __init__(self, aluno_id, funcao, args, kwargs, futuro, chave, cancelado=None):
+        self.aluno_id = aluno_id
+        self.funcao = funcao
+        self.args = args
+        self.kwargs = kwargs
+        self.futuro = futuro
+        self.chave = chave
+        self.enfileirado_em = time.monotonic()
+        # threading.Event set by the caller when the result is no longer wanted
+        self.cancelado = cancelado
+        # Another caller coalesced onto this request (must run even if cancelled)
+        self.compartilhado = False
+
+
+class AgendadorTutor:
+    """Process-wide scheduler: concurrency cap, rate limit, per-student fair queues
+    and coalescing of identical in-flight requests.
+
+    Runs its own asyncio loop in a daemon thread so Streamlit script threads can
+    submit blocking calls with executar() and simply wait for the result.
+    """
+
+    def __init__(self, max_concorrencia=MAX_CONCORRENCIA, requisicoes_por_segundo=REQUISICOES_POR_SEGUNDO,
+                 rajada=RAJADA_MAXIMA):
+        self.max_concorrencia = max_concorrencia
+        self._executor = ThreadPoolExecutor(max_workers=max_concorrencia, thread_name_prefix="tutor-llm")
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="agendador-tutor", daemon=True)
+        self._thread.start()
+
+        # Per-student FIFO queues, visited round-robin (loop thread only)
+        self._filas = OrderedDict()
+        # Served before the fair queues (hedges must not wait behind their own primary)
+        self._prioritarios = deque()
+        # Queued requests, kept as a plain int so other threads can read it without touching _filas
+        self._profundidade = 0
+        self._em_andamento = {}
+        self._em_execucao = 0
+
+        self._esperas = deque(maxlen=JANELA_METRICAS)
+        self._contadores = {'submetidos': 0, 'concluidos': 0, 'erros': 0, 'coalescidos': 0, 'cancelados': 0}
+
+        asyncio.run_coroutine_threadsafe(self._iniciar(requisicoes_por_segundo, rajada), self._loop).result()
+
+    async def _iniciar(self, requisicoes_por_segundo, rajada):
+        self._balde = BaldeTokens(requisicoes_por_segundo, rajada)
+        self._sinal = asyncio.Condition()
+        self._trabalhadores = [self._loop.create_task(self._trabalhador()) for _ in range(self.max_concorrencia)]
+
+    # ----- queueing -----
+
+    def _ha_pedidos(self):
+        return bool(self._prioritarios) or bool(self._filas)
+
+    def _proximo_pedido(self):
+        """Takes next priority request, else next request round-robin across students (fair queuing)"""
+        if self._prioritarios:
+            self._profundidade -= 1
+            return self._prioritarios.popleft()
+        aluno_id, fila = self._filas.popitem(last=False)
+        pedido = fila.popleft()
+        self._profundidade -= 1
+        if fila:
+            self._filas[aluno_id] = fila
+        return pedido
+
+    async def _trabalhador(self):
+        while True:
+            async with self._sinal:
+                await self._sinal.wait_for(self._ha_pedidos)
+                pedido = self._proximo_pedido()
+
+            # Caller gave up before it started (e.g. the other hedge branch won): free the slot
+            if pedido.cancelado is not None and pedido.cancelado.is_set() and not pedido.compartilhado:
+                if not pedido.futuro.done():
+                    pedido.futuro.cancel()
+                self._contadores['cancelados'] += 1
+                if pedido.chave is not None:
+                    self._em_andamento.pop(pedido.chave, None)
+                continue
+
+            await self._balde.adquirir()
+            self._esperas.append(time.monotonic() - pedido.enfileirado_em)
+            self._em_execucao += 1
+            try:
+                if asyncio.iscoroutinefunction(pedido.funcao):
+                    resultado = await pedido.funcao(*pedido.args, **pedido.kwargs)
+                else:
+                    resultado = await self._loop.run_in_executor(
+                        self._executor, lambda p=pedido: p.funcao(*p.args, **p.kwargs))
+                if not pedido.futuro.done():
+                    pedido.futuro.set_result(resultado)
+                self._contadores['concluidos'] += 1
+            except Exception as e:
+                if not pedido.futuro.done():
+                    pedido.futuro.set_exception(e)
+                self._contadores['erros'] += 1
+            finally:
+                self._em_execucao -= 1
+                if pedido.chave is not None:
+                    self._em_andamento.pop(pedido.chave, None)
+
+    async def _enfileirar(self, aluno_id, funcao, args, kwargs, chave, prioritario=False, cancelado=None):
+        self._contadores['submetidos'] += 1
+
+        # Identical request already queued or running: share its result
+        if chave is not None and chave in self._em_andamento:
+            self._contadores['coalescidos'] += 1
+            existente = self._em_andamento[chave]
+            existente.compartilhado = True
+            return existente.futuro
+
+        futuro = self._loop.create_future()
+        pedido = _Pedido(aluno_id, funcao, args, kwargs, futuro, chave, cancelado)
+        if chave is not None:
+            self._em_andamento[chave] = pedido
+
+        async with self._sinal:
+            if prioritario:
+                self._prioritarios.append(pedido)
+            else:
+                self._filas.setdefault(aluno_id, deque()).append(pedido)
+            self._profundidade += 1
+            self._sinal.notify()
+        return futuro
+
+    async def executar_async(self, aluno_id, funcao, *args, chave=None, prioritario=False, cancelado=None, **kwargs):
+        """Schedules a call from inside the scheduler loop and awaits its result"""
+        futuro = await self._enfileirar(aluno_id, funcao, args, kwargs, chave, prioritario, cancelado)
+        return await asyncio.shield(futuro)
+
+    def executar(self, aluno_id, funcao, *args, chave=None, timeout=TIMEOUT_PADRAO, prioritario=False,
+                 cancelado=None, **kwargs):
+        """Schedules a call from any thread and blocks until it finishes
+
+        prioritario skips the per-student fair queues. cancelado (threading.Event)
+        withdraws the request: it is dropped if it has not started yet, and the
+        caller stops waiting with CancelledError. A call already sent to the model
+        cannot be interrupted (the sync client has no abort).
+        Raises TimeoutError if the result is not ready within timeout seconds.
+        """
+        pendente = asyncio.run_coroutine_threadsafe(
+            self.executar_async(aluno_id, funcao, *args, chave=chave, prioritario=prioritario,
+                                cancelado=cancelado, **kwargs), self._loop)
+        limite = time.monotonic() + timeout
+        try:
+            while True:
+                espera = limite - time.monotonic()
+                if cancelado is not None:
+                    if cancelado.is_set():
+                        pendente.cancel()
+                        raise concurrent.futures.CancelledError()
+                    espera = min(espera, INTERVALO_CANCELAMENTO_S)
+                try:
+                    return pendente.result(timeout=max(0.0, espera))
+                except concurrent.futures.TimeoutError:
+                    if pendente.done() or time.monotonic() >= limite:
+                        raise
+        except concurrent.futures.TimeoutError:
+            pendente.cancel()
+            raise
+
+    # ----- metrics -----
+
+    def metricas(self):
+        """Returns queue depth, in-flight count, counters and wait-time percentiles (ms)
+
+        Called from Streamlit threads: reads only counters and atomic copies, never iterates _filas.
+        """
+        esperas = self._esperas.copy()
+        return {
+            'profundidade_fila': self._profundidade,
+            'alunos_na_fila': len(self._filas),
+            'em_execucao': self._em_execucao,
+            **self._contadores,
+            'espera_p50_ms': round(percentil(esperas, 50) * 1000, 1),
+            'espera_p95_ms': round(percentil(esperas, 95) * 1000, 1),
+            'espera_max_ms': round(max(esperas) * 1000, 1) if esperas else 0.0
+        }
+
+    async def _cancelar_trabalhadores(self):
+        for tarefa in self._trabalhadores:
+            tarefa.cancel()
+        await asyncio.gather(*self._trabalhadores, return_exceptions=True)
+
+    def encerrar(self):
+        """Stops loop and worker threads (used by tests and load harness)"""
+        asyncio.run_coroutine_threadsafe(self._cancelar_trabalhadores(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False)
+
+
+_agendador = None
+_agendador_lock = threading.Lock()
+
+
+def obter_agendador():
+    """Returns the scheduler shared by the whole process"""
+    global _agendador
+    with _agendador_lock:
+        if _agendador is None:
+            _agendador = AgendadorTutor()
+        return _agendador
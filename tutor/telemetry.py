@@ -0,0 +1,196 @@
+# =============================================================================
+# TELEMETRY FOR TUTOR MODEL CALLS (LATENCY, TOKENS, RETRIES, COST)
+# =============================================================================
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from helpers.estatistica import percentil
+from helpers.loader import PASTA_DADOS
+from tutor.prompts import tokens_da_resposta
+
+CAMINHO_METRICAS = os.getenv('TUTOR_METRICAS', os.path.join(PASTA_DADOS, 'metricas_tutor.jsonl'))
+
+# The metrics file is rotated to <caminho>.1 past this size, so reading it stays bounded
+TAMANHO_MAXIMO_BYTES = int(os.getenv('TUTOR_METRICAS_MAX_BYTES', 5 * 1024 * 1024))
+
+# Features tagged in the records
+RECURSO_FABI = 'FABI'
+RECURSO_LU = 'LU'
+RECURSO_ANALISE = 'analise_inicial'
+
+# USD per 1M tokens (input, cached input, output)
+PRECOS_POR_MILHAO = {
+    'gpt-4o-mini': {'entrada': 0.15, 'cache': 0.075, 'saida': 0.60},
+    'gpt-4o': {'entrada': 2.50, 'cache': 1.25, 'saida': 10.00},
+}
+
+# Records kept in memory for the admin panel
+JANELA_MEMORIA = 2000
+
+
+def estimar_custo(modelo, tokens_prompt, tokens_cache, tokens_completion):
+    """Estimates call cost in USD (0 for unknown models)"""
+    preco = PRECOS_POR_MILHAO.get(modelo)
+    if not preco:
+        return 0.0
+    nao_cache = max(0, tokens_prompt - tokens_cache)
+    return (nao_cache * preco['entrada'] + tokens_cache * preco['cache'] + tokens_completion * preco['saida']) / 1_000_000
+
+
+class Medicao:
+    """Collects data of one tutor request (may span several model calls)"""
+
+    def __init__(self, recurso, disciplina, sessao, modelo):
+        self.recurso = recurso
+        self.disciplina = disciplina
+        self.sessao = sessao
+        self.modelo = modelo
+        self.inicio = time.perf_counter()
+        self.tokens_prompt = 0
+        self.tokens_cache = 0
+        self.tokens_completion = 0
+        self.chamadas = 0
+        self.tentativas = 0
+        self.fallback = False
+        self.erro = None
+
+    def registrar_resposta(self, response):
+        """Adds token usage of a completed model response"""
+        uso = tokens_da_resposta(response)
+        self.tokens_prompt += uso['prompt']
+        self.tokens_cache += uso['cache']
+        self.tokens_completion += uso['completion']
+        self.chamadas += 1
+
+    def nova_tentativa(self, motivo=''):
+        """Marks a retry of the model call"""
+        self.tentativas += 1
+        if motivo:
+            self.erro = motivo
+
+    def usar_fallback(self, motivo):
+        """Marks that the student received the template answer instead of the model"""
+        self.fallback = True
+        self.erro = str(motivo)[:200]
+
+    def como_registro(self):
+        fim = time.perf_counter()
+        return {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'recurso': self.recurso,
+            'disciplina': self.disciplina,
+            'sessao': self.sessao,
+            'modelo': self.modelo,
+            'tempo_total_ms': round((fim - self.inicio) * 1000, 1),
+            'tokens_prompt': self.tokens_prompt,
+            'tokens_cache': self.tokens_cache,
+            'tokens_completion': self.tokens_completion,
+            'chamadas': self.chamadas,
+            'tentativas': self.tentativas,
+            'fallback': self.fallback,
+            'erro': self.erro,
+            'custo_usd': round(estimar_custo(self.modelo, self.tokens_prompt, self.tokens_cache, self.tokens_completion), 6)
+        }
+
+
+class Telemetria:
+    """Thread-safe sink: keeps recent records in memory and appends them to a size-capped JSONL file"""
+
+    def __init__(self, caminho=CAMINHO_METRICAS, tamanho_maximo=TAMANHO_MAXIMO_BYTES):
+        self.caminho = caminho
+        self.tamanho_maximo = tamanho_maximo
+        self._registros = deque(maxlen=JANELA_MEMORIA)
+        self._lock = threading.Lock()
+
+    def registrar(self, registro):
+        with self._lock:
+            self._registros.append(registro)
+            if not self.caminho:
+                return
+            try:
+                pasta = os.path.dirname(self.caminho)
+                if pasta:
+                    os.makedirs(pasta, exist_ok=True)
+                if os.path.exists(self.caminho) and os.path.getsize(self.caminho) >= self.tamanho_maximo:
+                    os.replace(self.caminho, self.caminho + '.1')
+                with open(self.caminho, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            except OSError:
+                # Metrics must never break a tutor answer
+                pass
+
+    def registros(self):
+        with self._lock:
+            return list(self._registros)
+
+    @contextmanager
+    def medir(self, recurso, disciplina='', sessao='', modelo='gpt-4o-mini'):
+        """Context manager around one tutor request; records even on error"""
+        medicao = Medicao(recurso, disciplina, sessao, modelo)
+        try:
+            yield medicao
+        except Exception as e:
+            medicao.erro = str(e)[:200]
+            raise
+        finally:
+            self.registrar(medicao.como_registro())
+
+
+def ler_registros(caminho=CAMINHO_METRICAS, limite=JANELA_MEMORIA):
+    """Reads the last `limite` records of the current metrics file (rotated files are not read)"""
+    if not os.path.exists(caminho):
+        return []
+    registros = deque(maxlen=limite)
+    with open(caminho, encoding='utf-8') as f:
+        for linha in f:
+            linha = linha.strip()
+            if linha:
+                try:
+                    registros.append(json.loads(linha))
+                except ValueError:
+                    continue
+    return list(registros)
+
+
+def resumir(registros, agrupar_por='recurso'):
+    """Summarizes records per group: calls, latency percentiles, tokens, retries, fallbacks, cost"""
+    grupos = {}
+    for r in registros:
+        grupos.setdefault(r.get(agrupar_por) or '-', []).append(r)
+
+    resumo = []
+    for grupo, itens in sorted(grupos.items()):
+        tempos = [r['tempo_total_ms'] for r in itens]
+        resumo.append({
+            agrupar_por: grupo,
+            'requisicoes': len(itens),
+            'p50_ms': percentil(tempos, 50),
+            'p95_ms': percentil(tempos, 95),
+            'tokens_prompt': sum(r['tokens_prompt'] for r in itens),
+            'tokens_cache': sum(r['tokens_cache'] for r in itens),
+            'tokens_completion': sum(r['tokens_completion'] for r in itens),
+            'tentativas': sum(r['tentativas'] for r in itens),
+            'fallbacks': sum(1 for r in itens if r['fallback']),
+            'erros': sum(1 for r in itens if r['erro']),
+            'custo_usd': round(sum(r['custo_usd'] for r in itens), 4)
+        })
+    return resumo
+
+
+_telemetria = Telemetria()
+
+
+def obter_telemetria():
+    """Returns the process-wide telemetry sink"""
+    return _telemetria
+
+
+def medir_chamada(recurso, disciplina='', sessao='', modelo='gpt-4o-mini'):
+    """Shortcut for obter_telemetria().medir(...)"""
+    return _telemetria.medir(recurso, disciplina, sessao, modelo)